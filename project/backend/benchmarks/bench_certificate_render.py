@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Certificate rendering microbenchmark
+
+Compares the original per-certificate renderer (fonts loaded and every
+element drawn for each certificate, QR written to disk and re-read) with
+the pre-rendered CertificateTemplate. Each mode runs in its own process so
+peak memory is measured independently.
+
+    python benchmarks/bench_certificate_render.py --count 200
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+def legacy_render(out_dir, user_name, course_name, certificate_id, verification_url):
+    """The renderer as it was before CertificateTemplate, kept for comparison"""
+    import qrcode
+    from PIL import Image, ImageDraw, ImageFont
+    
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=10, border=4)
+    qr.add_data(verification_url)
+    qr.make(fit=True)
+    qr_path = f"{out_dir}/qr_{certificate_id}.png"
+    qr.make_image(fill_color="black", back_color="white").save(qr_path)
+    
+    width, height = 800, 600
+    image = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(image)
+    try:
+        title_font = ImageFont.truetype("arial.ttf", 36)
+        name_font = ImageFont.truetype("arial.ttf", 28)
+        text_font = ImageFont.truetype("arial.ttf", 18)
+        small_font = ImageFont.truetype("arial.ttf", 14)
+    except OSError:
+        title_font = name_font = text_font = small_font = ImageFont.load_default()
+    
+    def centered(text, font, y, fill):
+        bbox = draw.textbbox((0, 0), text, font=font)
+        draw.text(((width - (bbox[2] - bbox[0])) // 2, y), text, fill=fill, font=font)
+    
+    draw.rectangle([20, 20, width-20, height-20], outline="#2563eb", width=3)
+    draw.rectangle([30, 30, width-30, height-30], outline="#2563eb", width=1)
+    centered("Certificate of Completion", title_font, 80, "#1f2937")
+    centered("This certifies that", text_font, 150, "#6b7280")
+    centered(user_name, name_font, 190, "#2563eb")
+    centered("has successfully completed", text_font, 240, "#6b7280")
+    centered(course_name, name_font, 280, "#1f2937")
+    centered(f"Completion Date: {datetime.now().strftime('%B %d, %Y')}", text_font, 350, "#6b7280")
+    draw.text((50, height - 80), f"Certificate ID: {certificate_id}", fill="#6b7280", font=small_font)
+    draw.text((50, height - 60), "SkillBridge", fill="#2563eb", font=text_font)
+    qr_image = Image.open(qr_path).resize((80, 80))
+    image.paste(qr_image, (width - 130, height - 130))
+    draw.text((width - 130, height - 45), "Verify Online", fill="#6b7280", font=small_font)
+    image.save(f"{out_dir}/cert_{certificate_id}.png")
+
+def template_render(out_dir, user_name, course_name, certificate_id, verification_url):
+    from certificate_generator import get_certificate_template
+    
+    template = get_certificate_template()
+    modules = template.qr_modules(verification_url)
+    template.qr_file_image(modules).save(f"{out_dir}/qr_{certificate_id}.png")
+    image = template.render(user_name, course_name, certificate_id, datetime.now(), modules)
+    image.save(f"{out_dir}/cert_{certificate_id}.png")
+
+def run_mode(mode, count):
+    """Render `count` certificates in this process and return timing/memory figures"""
+    render = legacy_render if mode == 'legacy' else template_render
+    out_dir = tempfile.mkdtemp(prefix=f"bench_{mode}_")
+    
+    # Imports and the one-off template build are reported separately from steady state
+    started = time.perf_counter()
+    render(out_dir, "Warm Up", "Digital Literacy Basics", "SB-WARM-UP", "https://skillbridge.edu/verify/SB-WARM-UP")
+    first_ms = (time.perf_counter() - started) * 1000
+    
+    timings = []
+    for i in range(count):
+        certificate_id = f"SB-BENCH-{i:06d}"
+        started = time.perf_counter()
+        render(out_dir, f"Learner {i}", "Digital Literacy Basics", certificate_id,
+               f"https://skillbridge.edu/verify/{certificate_id}")
+        timings.append((time.perf_counter() - started) * 1000)
+    
+    timings.sort()
+    return {
+        'mode': mode,
+        'count': count,
+        'first_render_ms': round(first_ms, 3),
+        'mean_ms': round(sum(timings) / count, 3),
+        'p50_ms': round(timings[count // 2], 3),
+        'p95_ms': round(timings[min(count - 1, int(count * 0.95))], 3),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=200, help='certificates per mode')
+    parser.add_argument('--mode', choices=['legacy', 'template'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.count)))
+        return
+    
+    results = {}
+    for mode in ('legacy', 'template'):
+        output = subprocess.check_output([sys.executable, __file__, '--mode', mode, '--count', str(args.count)])
+        results[mode] = json.loads(output)
+    results['speedup'] = round(results['legacy']['mean_ms'] / results['template']['mean_ms'], 2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
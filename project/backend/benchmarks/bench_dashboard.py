@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Dashboard read model benchmark
+
+Times GET /api/dashboard through the Flask test client against a temporary
+database in three states: cold (the user's version was just bumped, so the
+read model is rebuilt), warm (served from the stored payload) and
+revalidated (If-None-Match with the current ETag, answered with 304).
+
+    python benchmarks/bench_dashboard.py --lessons 2000 --iterations 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def summarize(timings):
+    timings = sorted(timings)
+    return {
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lessons', type=int, default=2000, help='completed lessons for the benchmark user')
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+    
+    os.environ.setdefault('SKILLBRIDGE_BCRYPT_ROUNDS', '4')
+    os.chdir(tempfile.mkdtemp(prefix='bench_dashboard_'))
+    import app as server
+    app = server.create_app(init_db=True)
+    db = server.db
+    
+    client = app.test_client()
+    token = client.post('/api/auth/register', json={
+        'user_id': 'bench', 'password': 'bench', 'name': 'Bench User'
+    }).get_json()['token']
+    headers = {'Authorization': f'Bearer {token}'}
+    
+    with db.connection() as conn:
+        user_id = conn.execute("SELECT id FROM users WHERE user_id = 'bench'").fetchone()[0]
+        conn.executemany('''
+            INSERT INTO skillsnaps (course_id, title, description, content, duration_minutes,
+                                    difficulty_level, category, order_index)
+            VALUES (1, ?, '', '', 10, 'Beginner', 'Benchmark', ?)
+        ''', [(f'Lesson {i}', 100 + i) for i in range(args.lessons)])
+        conn.executemany('INSERT INTO enrollments (user_id, course_id) VALUES (?, ?)',
+                         [(user_id, course_id) for course_id in range(1, 7)])
+        conn.execute('''
+            INSERT INTO user_progress (user_id, skillsnap_id, completed_at)
+            SELECT ?, id, CURRENT_TIMESTAMP FROM skillsnaps WHERE course_id = 1
+        ''', (user_id,))
+        conn.commit()
+    
+    def timed_get(extra_headers=None):
+        started = time.perf_counter()
+        response = client.get('/api/dashboard', headers={**headers, **(extra_headers or {})})
+        elapsed = (time.perf_counter() - started) * 1000
+        return response, elapsed
+    
+    cold, warm, revalidated = [], [], []
+    for _ in range(args.iterations):
+        with db.connection() as conn:
+            conn.execute('UPDATE user_dashboards SET version = version + 1 WHERE user_id = ?', (user_id,))
+            conn.commit()
+        response, elapsed = timed_get()
+        cold.append(elapsed)
+    
+    etag = response.headers['ETag']
+    for _ in range(args.iterations):
+        response, elapsed = timed_get()
+        warm.append(elapsed)
+        assert response.status_code == 200
+    
+    for _ in range(args.iterations):
+        response, elapsed = timed_get({'If-None-Match': etag})
+        revalidated.append(elapsed)
+        assert response.status_code == 304
+    
+    print(json.dumps({
+        'lessons_completed': args.lessons,
+        'iterations': args.iterations,
+        'payload_bytes': len(client.get('/api/dashboard', headers=headers).data),
+        'cold': summarize(cold),
+        'warm': summarize(warm),
+        'not_modified': summarize(revalidated)
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Endpoint benchmark suite
+
+Builds a synthetic database in a temporary directory (removed afterwards),
+then drives the main API flows through the Flask test client from
+--concurrency threads (each with its own client) and prints per-scenario
+latency percentiles and throughput as JSON. Pass --output to save the result and --baseline to
+report the change against an earlier run.
+
+    python benchmarks/bench_endpoints.py --users 2000 --requests 500 --concurrency 8 --output after.json --baseline before.json
+
+Scenarios: login, dashboard, skillsnaps, complete, recommendations, verify,
+generate. Certificate generation runs last because rendering continues in
+the background after each request returns. Logins beyond the password
+hasher's queue are answered 503 by design; they show up in status_codes.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+SCENARIOS = ('login', 'dashboard', 'skillsnaps', 'complete', 'recommendations', 'verify', 'generate')
+PASSWORD = 'bench-password'
+
+PROFILES = [
+    ('beginner', 'Basic computer literacy', '10-15 minutes', 'Find employment'),
+    ('basic', 'Digital marketing', '30 minutes', 'Start a business'),
+    ('intermediate', 'Data entry & analysis', '1 hour', 'Improve current job'),
+    ('advanced', 'Online business skills', 'More than 1 hour', 'Personal development')
+]
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def seed(db, auth_manager, args, rng):
+    """Fill the database with users, lessons, progress and certificates; returns the fixtures"""
+    password_hash = auth_manager.hash_password(PASSWORD)
+    
+    with db.connection() as conn:
+        conn.executemany('''
+            INSERT INTO skillsnaps (course_id, title, description, content, duration_minutes,
+                                    difficulty_level, category, order_index)
+            VALUES (?, ?, '', '', 10, 'Beginner', 'Benchmark', ?)
+        ''', [(course_id, f'Lesson {course_id}.{i}', 100 + i)
+              for course_id in range(1, 7) for i in range(args.lessons)])
+        
+        conn.executemany('''
+            INSERT INTO users (user_id, password_hash, name, aptitude_level, interests, time_commitment, goals)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [(f'bench{i}', password_hash, f'Bench Learner {i}', *PROFILES[i % len(PROFILES)])
+              for i in range(args.users)])
+        users = [row[0] for row in conn.execute("SELECT id FROM users WHERE user_id LIKE 'bench%' ORDER BY id")]
+        
+        lessons = {}
+        for course_id, skillsnap_id in conn.execute('SELECT course_id, id FROM skillsnaps ORDER BY id'):
+            lessons.setdefault(course_id, []).append(skillsnap_id)
+        
+        conn.executemany('INSERT INTO enrollments (user_id, course_id) VALUES (?, ?)',
+                         [(user_id, course_id) for user_id in users for course_id in (1, 2, 3)])
+        
+        # A third of the learners finished course 1; the rest did a random share of courses 1 and 3.
+        # Course 2 is left untouched so the completion scenario always records new progress.
+        graduates = users[::3]
+        graduate_set = set(graduates)
+        progress = []
+        for user_id in users:
+            if user_id in graduate_set:
+                progress.extend((user_id, skillsnap_id) for skillsnap_id in lessons[1])
+            else:
+                pool = lessons[1] + lessons[3]
+                progress.extend((user_id, skillsnap_id) for skillsnap_id in rng.sample(pool, min(len(pool), args.completions)))
+        conn.executemany('''
+            INSERT INTO user_progress (user_id, skillsnap_id, completed_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+        ''', progress)
+        
+        # Half the graduates already hold a (rendered) certificate
+        certified = graduates[::2]
+        certificates = [f'SB-BENCH-{user_id:08d}' for user_id in certified]
+        conn.executemany('''
+            INSERT INTO certificates (user_id, course_id, certificate_id, verification_url, status, rendered_at)
+            VALUES (?, 1, ?, ?, 'ready', CURRENT_TIMESTAMP)
+        ''', [(user_id, certificate_id, f'https://skillbridge.edu/verify/{certificate_id}')
+              for user_id, certificate_id in zip(certified, certificates)])
+        conn.commit()
+    
+    return {
+        'users': users,
+        'uncertified_graduates': graduates[1::2],
+        'course_2_lessons': lessons[2],
+        'certificates': certificates,
+        'progress_rows': len(progress)
+    }
+
+def build_requests(name, count, fixtures, tokens, rng):
+    """List of (method, path, json, headers) for a scenario"""
+    users = fixtures['users']
+    auth = lambda user_id: {'Authorization': f'Bearer {tokens[user_id]}'}
+    
+    if name == 'login':
+        return [('POST', '/api/auth/login', {'user_id': f'bench{rng.randrange(len(users))}', 'password': PASSWORD}, None)
+                for _ in range(count)]
+    if name == 'dashboard':
+        return [('GET', '/api/dashboard', None, auth(rng.choice(users))) for _ in range(count)]
+    if name == 'skillsnaps':
+        return [('GET', f'/api/courses/{rng.randint(1, 6)}/skillsnaps', None, auth(rng.choice(users)))
+                for _ in range(count)]
+    if name == 'complete':
+        pairs = [(user_id, skillsnap_id) for user_id in users for skillsnap_id in fixtures['course_2_lessons']]
+        return [('POST', f'/api/skillsnaps/{skillsnap_id}/complete', {'time_spent': 10}, auth(user_id))
+                for user_id, skillsnap_id in rng.sample(pairs, min(count, len(pairs)))]
+    if name == 'recommendations':
+        return [('GET', '/api/recommendations', None, auth(rng.choice(users))) for _ in range(count)]
+    if name == 'verify':
+        # Mostly real IDs, with made-up ones mixed in as a public endpoint would see
+        return [('GET', f"/api/certificates/verify/{rng.choice(fixtures['certificates']) if rng.random() < 0.8 else f'SB-FAKE-{i:06d}'}",
+                 None, None) for i in range(count)]
+    if name == 'generate':
+        graduates = fixtures['uncertified_graduates'][:count]
+        return [('POST', '/api/certificates/generate', {'course_id': 1}, auth(user_id)) for user_id in graduates]
+    raise ValueError(name)
+
+def run_scenario(app, requests, concurrency):
+    """Send the requests from `concurrency` threads and summarize latency and throughput"""
+    local = threading.local()
+    
+    def send(item):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        method, path, body, headers = item
+        started = time.perf_counter()
+        response = client.open(path, method=method, json=body, headers=headers)
+        response.get_data()
+        return (time.perf_counter() - started) * 1000, response.status_code
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, requests))
+    wall = time.perf_counter() - started
+    
+    timings = sorted(elapsed for elapsed, _ in results)
+    statuses = {}
+    for _, status in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'requests': len(results),
+        'concurrency': concurrency,
+        'status_codes': statuses,
+        'errors': sum(count for status, count in statuses.items() if int(status) >= 400),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'rps': round(len(results) / wall, 1)
+    }
+
+def compare(results, baseline):
+    """Percentage change of each scenario's p50/p95/p99 and rps against a baseline run"""
+    change = lambda new, old: round((new - old) / old * 100, 1) if old else None
+    comparison = {}
+    for name, result in results['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if before:
+            comparison[name] = {key: change(result[key], before[key]) for key in ('p50_ms', 'p95_ms', 'p99_ms', 'rps')}
+    return comparison
+
+def wait_for_background_work(server, timeout=60):
+    """Let queued renders and recommendation refreshes finish before the working directory goes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        renders = server.certificate_generator.render_queue_depth() if server.certificate_generator.built else 0
+        refreshes = server.quiz_manager.recommendation_stats() if server.quiz_manager.built else None
+        if not renders and not (refreshes and refreshes['queued']):
+            return
+        time.sleep(0.05)
+
+def run_suite(args, scenarios, workdir):
+    """Seed a database in workdir and run the scenarios against it"""
+    os.environ['SKILLBRIDGE_DB'] = os.path.join(workdir, 'skillbridge.db')
+    import app as server
+    app = server.create_app(init_db=True)
+    try:
+        rng = random.Random(args.seed)
+        
+        started = time.perf_counter()
+        fixtures = seed(server.db, server.auth_manager, args, rng)
+        seed_seconds = time.perf_counter() - started
+        tokens = {user_id: server.auth_manager.generate_token(user_id) for user_id in fixtures['users']}
+        
+        results = {
+            'config': {
+                'users': args.users,
+                'lessons_per_course': args.lessons,
+                'progress_rows': fixtures['progress_rows'],
+                'certificates': len(fixtures['certificates']),
+                'requests_per_scenario': args.requests,
+                'concurrency': args.concurrency,
+                'bcrypt_rounds': int(args.bcrypt_rounds),
+                'seed': args.seed,
+                'seed_seconds': round(seed_seconds, 2)
+            },
+            'scenarios': {}
+        }
+        for name in scenarios:
+            requests = build_requests(name, args.requests, fixtures, tokens, rng)
+            if requests:
+                results['scenarios'][name] = run_scenario(app, requests, args.concurrency)
+        
+        return results
+    finally:
+        wait_for_background_work(server)
+        server.db.pool.close_all()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000, help='synthetic learners')
+    parser.add_argument('--lessons', type=int, default=50, help='extra skillsnaps per course')
+    parser.add_argument('--completions', type=int, default=20, help='completed lessons per non-graduate learner')
+    parser.add_argument('--requests', type=int, default=300, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma-separated subset to run')
+    parser.add_argument('--bcrypt-rounds', default='4', help='cost factor for the synthetic accounts')
+    parser.add_argument('--seed', type=int, default=1, help='random seed for data and request mix')
+    parser.add_argument('--output', help='also write the JSON result to this file')
+    parser.add_argument('--baseline', help='earlier result to compare against')
+    args = parser.parse_args()
+    
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    # Keep certificate generation last; its renders keep running after the requests return
+    scenarios.sort(key=SCENARIOS.index)
+    # Relative --output/--baseline paths are relative to where the suite was started
+    output_path = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+    
+    os.environ['SKILLBRIDGE_BCRYPT_ROUNDS'] = args.bcrypt_rounds
+    started_in = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix='bench_endpoints_')
+    os.chdir(workdir)
+    try:
+        results = run_suite(args, scenarios, workdir)
+    finally:
+        os.chdir(started_in)
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    if baseline_path:
+        with open(baseline_path) as f:
+            results['baseline_change_pct'] = compare(results, json.load(f))
+    
+    output = json.dumps(results, indent=2)
+    if output_path:
+        with open(output_path, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Catalog search benchmark
+
+Seeds a temporary database with --lessons skillsnaps (synthetic lesson text
+with a Zipf word distribution) and times CourseManager.search_catalog for
+several query shapes: rare and common whole words, two-word queries, and
+type-ahead prefixes of 2, 4 and 6 letters. Prints per-shape latency
+percentiles and how many lessons each shape matches as JSON.
+
+    python benchmarks/bench_search.py --lessons 100000 --iterations 200
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def summarize(timings):
+    timings = sorted(timings)
+    return {
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3)
+    }
+
+def query_shapes(words, rng):
+    """Query generators by shape; `words` is ordered most frequent first"""
+    common, rare = words[:10], words[-40:]
+    long_words = [word for word in words if len(word) >= 6]
+    return {
+        'rare_word': lambda: (rng.choice(rare), False),
+        'common_word': lambda: (rng.choice(common), False),
+        'two_words': lambda: (f'{rng.choice(words)} {rng.choice(rare)}', False),
+        'prefix_2': lambda: (rng.choice(words)[:2], True),
+        'prefix_4': lambda: (rng.choice(long_words)[:4], True),
+        'prefix_6': lambda: (rng.choice(long_words)[:6], True),
+        'typing_phrase': lambda: (f'{rng.choice(common)} {rng.choice(long_words)[:3]}', True),
+        'no_match': lambda: (f'zq{rng.randrange(10 ** 6)}', False)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lessons', type=int, default=100000, help='total skillsnaps in the catalog')
+    parser.add_argument('--lessons-per-course', type=int, default=400)
+    parser.add_argument('--iterations', type=int, default=200, help='queries per shape')
+    parser.add_argument('--limit', type=int, default=10, help='results per query')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='also write the JSON result to this file')
+    args = parser.parse_args()
+    output_path = os.path.abspath(args.output) if args.output else None  # before the chdir below
+    
+    os.environ.setdefault('SKILLBRIDGE_BCRYPT_ROUNDS', '4')
+    workdir = tempfile.mkdtemp(prefix='bench_search_')
+    os.chdir(workdir)
+    db_path = os.path.join(workdir, 'skillbridge.db')
+    
+    from seeder import LESSON_WORDS, DataSeeder
+    from search import match_expression
+    started = time.perf_counter()
+    courses = math.ceil(args.lessons / args.lessons_per_course)
+    DataSeeder(db_path, seed=args.seed, log=lambda message: None).run(
+        users=10, lessons_per_course=args.lessons_per_course, extra_courses=max(0, courses - 6)
+    )
+    seed_seconds = time.perf_counter() - started
+    
+    import app as server
+    server.create_app(db_path, start_background=False)
+    course_manager = server.course_manager
+    
+    with server.db.connection() as conn:
+        lessons = conn.execute('SELECT COUNT(*) FROM skillsnaps').fetchone()[0]
+        
+        def matches(text, prefix):
+            expression = match_expression(text, prefix)
+            if expression is None:
+                return 0
+            return conn.execute('SELECT COUNT(*) FROM skillsnaps_fts WHERE skillsnaps_fts MATCH ?',
+                                (expression,)).fetchone()[0]
+        
+        rng = random.Random(args.seed)
+        results = {
+            'config': {
+                'lessons': lessons,
+                'courses': courses,
+                'iterations': args.iterations,
+                'limit': args.limit,
+                'seed_seconds': round(seed_seconds, 1),
+                'database_mb': round(os.path.getsize(db_path) / 2 ** 20, 1)
+            },
+            'queries': {}
+        }
+        for name, make_query in query_shapes(LESSON_WORDS, rng).items():
+            queries = [make_query() for _ in range(args.iterations)]
+            # One untimed pass so every shape is measured with a warm page cache
+            for text, prefix in queries[:10]:
+                course_manager.search_catalog(text, args.limit, prefix)
+            
+            timings = []
+            for text, prefix in queries:
+                started = time.perf_counter()
+                course_manager.search_catalog(text, args.limit, prefix)
+                timings.append((time.perf_counter() - started) * 1000)
+            
+            sample = queries[:20]
+            results['queries'][name] = {
+                **summarize(timings),
+                'example': queries[0][0] + ('*' if queries[0][1] else ''),
+                'mean_matches': round(sum(matches(text, prefix) for text, prefix in sample) / len(sample))
+            }
+    
+    output = json.dumps(results, indent=2)
+    if output_path:
+        with open(output_path, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+if __name__ == '__main__':
+    main()
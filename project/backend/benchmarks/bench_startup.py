@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+API process startup benchmark
+
+Starts fresh interpreters against an initialized temporary database and
+measures what each worker pays before serving: time to import the app
+module, time for create_app(), the first request, resident memory, and
+which heavy optional modules got loaded along the way. Medians over
+--runs processes are printed as JSON; with --max-import-ms / --max-rss-mb
+the exit status is 1 when a budget is exceeded, so CI can catch regressions.
+
+    python benchmarks/bench_startup.py --runs 5 --max-import-ms 400 --max-rss-mb 80
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC)
+
+# Modules a request-serving worker should not need until it renders or recommends
+HEAVY_MODULES = ('PIL', 'qrcode', 'numpy', 'multiprocessing')
+
+def rss_mb():
+    """Current resident set size, falling back to the peak where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+    except (OSError, ValueError):
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+def probe():
+    """Measure one cold start in this process"""
+    started = time.perf_counter()
+    import app as server
+    import_ms = (time.perf_counter() - started) * 1000
+    
+    started = time.perf_counter()
+    app = server.create_app(start_background=False)
+    create_ms = (time.perf_counter() - started) * 1000
+    rss_after_create = rss_mb()
+    
+    client = app.test_client()
+    started = time.perf_counter()
+    status = client.get('/api/courses').status_code
+    first_request_ms = (time.perf_counter() - started) * 1000
+    
+    return {
+        'import_ms': round(import_ms, 3),
+        'create_app_ms': round(create_ms, 3),
+        'first_request_ms': round(first_request_ms, 3),
+        'first_request_status': status,
+        'rss_mb': rss_after_create,
+        'rss_after_request_mb': rss_mb(),
+        'heavy_modules': [name for name in HEAVY_MODULES if name in sys.modules]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='fresh processes to start')
+    parser.add_argument('--max-import-ms', type=float, help='fail if median import time exceeds this')
+    parser.add_argument('--max-rss-mb', type=float, help='fail if median RSS after create_app exceeds this')
+    parser.add_argument('--probe', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.probe:
+        print(json.dumps(probe()))
+        return 0
+    
+    workdir = tempfile.mkdtemp(prefix='bench_startup_')
+    db_path = os.path.join(workdir, 'skillbridge.db')
+    from database import Database
+    Database(db_path).pool.close_all()
+    
+    env = dict(os.environ, SKILLBRIDGE_DB=db_path)
+    samples = []
+    for _ in range(args.runs):
+        output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--probe'], cwd=workdir, env=env)
+        samples.append(json.loads(output))
+    
+    median = lambda key: round(statistics.median(sample[key] for sample in samples), 3)
+    results = {
+        'runs': args.runs,
+        'import_ms': median('import_ms'),
+        'create_app_ms': median('create_app_ms'),
+        'first_request_ms': median('first_request_ms'),
+        'rss_mb': median('rss_mb'),
+        'rss_after_request_mb': median('rss_after_request_mb'),
+        'heavy_modules': sorted({name for sample in samples for name in sample['heavy_modules']})
+    }
+    
+    over_budget = []
+    if args.max_import_ms is not None and results['import_ms'] > args.max_import_ms:
+        over_budget.append('import_ms')
+    if args.max_rss_mb is not None and results['rss_mb'] > args.max_rss_mb:
+        over_budget.append('rss_mb')
+    results['over_budget'] = over_budget
+    
+    print(json.dumps(results, indent=2))
+    return 1 if over_budget else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
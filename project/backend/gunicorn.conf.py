@@ -0,0 +1,33 @@
+"""
+gunicorn settings for SkillBridge
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is loaded once in the master and forked into the workers, so the
+imported modules are shared copy-on-write. Each worker serves requests on a
+thread pool, builds its own certificate verification filter in the
+background, and resets its SQLite pool after the fork.
+"""
+
+import multiprocessing
+import os
+
+os.environ['SKILLBRIDGE_FORKING_SERVER'] = '1'
+
+bind = os.environ.get('SKILLBRIDGE_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('SKILLBRIDGE_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.environ.get('SKILLBRIDGE_THREADS', '4'))
+worker_class = 'gthread'
+preload_app = True
+timeout = int(os.environ.get('SKILLBRIDGE_TIMEOUT', '30'))
+graceful_timeout = 30
+keepalive = 5
+max_requests = int(os.environ.get('SKILLBRIDGE_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+accesslog = '-'
+
+def post_fork(server, worker):
+    from app import start_background_work
+    # Every worker, including replacements for recycled ones, resumes pending
+    # renders; the database claim in resume_pending_renders splits them up
+    start_background_work()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+SkillBridge management commands
+
+    python manage.py init-db
+    python manage.py --db data/scale.db init-db
+    python manage.py --db data/scale.db seed --users 500000
+    python manage.py issue-certificates --course-id 1 --workers 4
+    python manage.py reconcile-progress --dry-run
+    python manage.py migrate-storage
+    python manage.py prune-legacy-files
+    python manage.py refresh-recommendations --all
+    python manage.py set-role --user-id coordinator1 --role staff
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add the src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from database import Database
+
+def open_database(path):
+    """Open a database that init-db has brought up to date; other commands never migrate"""
+    db = Database(path, initialize=False)
+    pending = db.pending_migrations()
+    if pending:
+        db.pool.close_all()
+        sys.exit(f"Database schema is {pending} migration(s) behind; run `python manage.py init-db` first")
+    return db
+
+def init_db(args):
+    """Apply pending schema migrations and load the sample catalog"""
+    db = Database(args.db, initialize=False)
+    before = db.schema_version()
+    applied = db.init_database()
+    print(json.dumps({
+        'success': True,
+        'schema_version_before': before,
+        'schema_version': db.schema_version(),
+        'applied': applied
+    }, indent=2))
+    return 0
+
+def seed(args):
+    """Fill a scratch database with large volumes of synthetic learners and activity"""
+    from seeder import DataSeeder
+    
+    open_database(args.db).pool.close_all()
+    result = DataSeeder(args.db, seed=args.seed).run(
+        users=args.users,
+        lessons_per_course=args.lessons_per_course,
+        extra_courses=args.extra_courses,
+        days=args.days,
+        batch_size=args.batch_size
+    )
+    print(json.dumps(result, indent=2))
+    return 0 if result['success'] else 1
+
+def issue_certificates(args):
+    """Issue certificates to everyone who completed a course"""
+    from certificate_generator import CertificateGenerator
+    
+    db = open_database(args.db)
+    generator = CertificateGenerator(db)
+    
+    course_id = args.course_id
+    if course_id is None:
+        with db.connection() as conn:
+            row = conn.execute('SELECT id FROM courses WHERE course_name = ?', (args.course_name,)).fetchone()
+        if not row:
+            print(f"Course not found: {args.course_name}", file=sys.stderr)
+            return 1
+        course_id = row[0]
+    
+    result = generator.issue_cohort_certificates(course_id, workers=args.workers)
+    print(json.dumps(result, indent=2))
+    return 0 if result['success'] and not result['failed'] else 1
+
+def reconcile_progress(args):
+    """Audit and repair the incrementally maintained progress counters"""
+    from course_manager import CourseManager
+    
+    result = CourseManager(open_database(args.db)).reconcile_progress(dry_run=args.dry_run)
+    print(json.dumps(result, indent=2))
+    return 0 if result['success'] else 1
+
+def migrate_storage(args):
+    """Copy certificate and QR images into the sharded content-addressed layout"""
+    from certificate_generator import CertificateGenerator
+    
+    generator = CertificateGenerator(open_database(args.db))
+    result = generator.migrate_storage(dry_run=args.dry_run)
+    print(json.dumps(result, indent=2))
+    return 0 if result['success'] else 1
+
+def prune_legacy_files(args):
+    """Delete flat certificate and QR images that migrate-storage has copied"""
+    from certificate_generator import CertificateGenerator
+    
+    generator = CertificateGenerator(open_database(args.db))
+    result = generator.prune_legacy_files(dry_run=args.dry_run)
+    print(json.dumps(result, indent=2))
+    return 0 if result['success'] else 1
+
+def refresh_recommendations(args):
+    """Rebuild the stored per-user recommendations in batches"""
+    from quiz_manager import QuizManager
+    
+    started = time.perf_counter()
+    refreshed = QuizManager(open_database(args.db)).recommender.refresh_all(
+        batch_size=args.batch_size, stale_only=not args.all
+    )
+    print(json.dumps({
+        'success': True,
+        'refreshed': refreshed,
+        'seconds': round(time.perf_counter() - started, 2)
+    }, indent=2))
+    return 0
+
+def set_role(args):
+    """Grant or revoke staff access for an account"""
+    db = open_database(args.db)
+    with db.connection() as conn:
+        cursor = conn.execute('UPDATE users SET role = ? WHERE user_id = ?', (args.role, args.user_id))
+        conn.commit()
+    if cursor.rowcount == 0:
+        print(f"User not found: {args.user_id}", file=sys.stderr)
+        return 1
+    # Running servers pick the change up when their cached copy of the user expires (60s)
+    print(json.dumps({'success': True, 'user_id': args.user_id, 'role': args.role}, indent=2))
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="SkillBridge management commands")
+    parser.add_argument('--db', default=os.environ.get('SKILLBRIDGE_DB', 'data/skillbridge.db'), help='SQLite database path')
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    init = commands.add_parser('init-db', help='apply schema migrations and sample data (run once per deploy)')
+    init.set_defaults(handler=init_db)
+    
+    seeding = commands.add_parser('seed', help='bulk-load synthetic data for scale testing (scratch databases only)')
+    seeding.add_argument('--users', type=int, default=10000)
+    seeding.add_argument('--lessons-per-course', type=int, default=40, help='top every course up to this many lessons')
+    seeding.add_argument('--extra-courses', type=int, default=0, help='synthetic courses to add to the catalog')
+    seeding.add_argument('--days', type=int, default=365, help='spread activity over this many past days')
+    seeding.add_argument('--batch-size', type=int, default=10000, help='users per transaction')
+    seeding.add_argument('--seed', type=int, default=None, help='random seed for a reproducible dataset')
+    seeding.set_defaults(handler=seed)
+    
+    issue = commands.add_parser('issue-certificates', help='batch-issue certificates for a course cohort')
+    course = issue.add_mutually_exclusive_group(required=True)
+    course.add_argument('--course-id', type=int)
+    course.add_argument('--course-name')
+    issue.add_argument('--workers', type=int, default=None, help='render processes (default: CPU count)')
+    issue.set_defaults(handler=issue_certificates)
+    
+    reconcile = commands.add_parser('reconcile-progress', help='recompute course progress counters from scratch')
+    reconcile.add_argument('--dry-run', action='store_true', help='report drift without fixing it')
+    reconcile.set_defaults(handler=reconcile_progress)
+    
+    storage = commands.add_parser('migrate-storage', help='copy images from the flat directories into sharded storage')
+    storage.add_argument('--dry-run', action='store_true', help='count files that would be copied')
+    storage.set_defaults(handler=migrate_storage)
+    
+    prune = commands.add_parser('prune-legacy-files', help='delete flat images already copied by migrate-storage')
+    prune.add_argument('--dry-run', action='store_true', help='count files that would be deleted')
+    prune.set_defaults(handler=prune_legacy_files)
+    
+    recommendations = commands.add_parser('refresh-recommendations', help='rebuild stored recommendations (e.g. after seeding)')
+    recommendations.add_argument('--all', action='store_true', help='rebuild every user, not only stale and missing rows')
+    recommendations.add_argument('--batch-size', type=int, default=5000, help='users scored per matrix product')
+    recommendations.set_defaults(handler=refresh_recommendations)
+    
+    role = commands.add_parser('set-role', help='grant or revoke staff access (analytics endpoints)')
+    role.add_argument('--user-id', required=True, help='login ID of the account')
+    role.add_argument('--role', required=True, choices=('learner', 'staff', 'admin'))
+    role.set_defaults(handler=set_role)
+    
+    args = parser.parse_args()
+    return args.handler(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
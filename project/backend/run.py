@@ -10,7 +10,7 @@ import sys
 # Add the src directory to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from app import app
+from app import create_app
 
 if __name__ == '__main__':
     print("🚀 Starting SkillBridge Backend Server...")
@@ -33,5 +33,9 @@ if __name__ == '__main__':
     os.makedirs('certificates', exist_ok=True)
     os.makedirs('static', exist_ok=True)
     
+    # Development server: applies migrations and sample data on startup.
+    # For production see wsgi.py and gunicorn.conf.py.
+    app = create_app(init_db=True)
+    
     # Run the Flask application
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -1,33 +1,205 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify
+from werkzeug.security import safe_join
 from flask_cors import CORS
 import os
+import threading
 from datetime import datetime
 
 # Import our modules
 from database import Database
-from auth import AuthManager, require_auth
+from auth import AuthManager, HasherBusy, require_auth, require_staff
 from course_manager import CourseManager
-from certificate_generator import CertificateGenerator
-from quiz_manager import QuizManager
+from certificate_generator import CertificateGenerator, public_status
+from quiz_manager import ANSWER_DIMENSIONS, QuizManager
+from http_cache import (
+    FileServer, SerializedResponse, cached_json_response, etag_matches, not_modified, parse_sqlite_timestamp
+)
+from cache import VersionedCache
+from pagination import InvalidCursor, parse_limit
+from search import DEFAULT_RESULTS, MAX_RESULTS, InvalidQuery
+from metrics import MetricsRegistry, RequestMetrics
 
 # Initialize Flask app
-app = Flask(__name__)
+app = Flask(__name__, static_folder=None)  # /static is served by serve_static below
 CORS(app)  # Enable CORS for frontend communication
 
-# Initialize components
-db = Database()
-auth_manager = AuthManager(db)
-course_manager = CourseManager(db)
-certificate_generator = CertificateGenerator(db)
-quiz_manager = QuizManager(db)
+# Per-process request metrics, exposed on /metrics
+metrics = MetricsRegistry()
+RequestMetrics(metrics).init_app(app)
 
-# Make auth_manager available to decorators
-app.auth_manager = auth_manager
+# Components are wired by create_app(); importing this module touches no database
+db = None
+auth_manager = None
+course_manager = None
+certificate_generator = None
+quiz_manager = None
+catalog_cache = None
+CATALOG_CACHE_CONTROL = 'public, max-age=60'
+
+class LazyComponent:
+    """Stand-in for a manager that is constructed on first attribute access"""
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+    
+    @property
+    def built(self):
+        return self._instance is not None
+    
+    def _get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+    
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+def create_app(db_path=None, init_db=False, start_background=True):
+    """Wire the components into the app and return it (only the first call does any work).
+    
+    Schema changes are made only when `init_db` is set (the development
+    server does); production runs `manage.py init-db` once and the app
+    refuses to start on an out-of-date schema. A preloading server passes
+    start_background=False and calls start_background_work() in each worker.
+    """
+    global db, auth_manager, course_manager, certificate_generator, quiz_manager, catalog_cache
+    if db is not None:
+        return app
+    
+    database = Database(
+        db_path or os.environ.get('SKILLBRIDGE_DB', 'data/skillbridge.db'),
+        pool_size=int(os.environ.get('SKILLBRIDGE_DB_POOL_SIZE', '8')),
+        initialize=init_db
+    )
+    pending = database.pending_migrations()
+    if pending:
+        raise RuntimeError(f"Database schema is {pending} migration(s) behind; run `python manage.py init-db`")
+    if os.environ.get('SKILLBRIDGE_SQL_TRACE', '').lower() in ('1', 'true', 'yes'):
+        database.enable_tracing(
+            slow_ms=float(os.environ.get('SKILLBRIDGE_SLOW_QUERY_MS', '100')),
+            repeat_threshold=int(os.environ.get('SKILLBRIDGE_SQL_REPEAT_THRESHOLD', '5'))
+        )
+    
+    # Managers are built by the first request that needs one; the certificate
+    # verification filter is built by start_background_work()
+    auth_manager = LazyComponent(lambda: AuthManager(database))
+    course_manager = LazyComponent(lambda: CourseManager(database))
+    certificate_generator = LazyComponent(lambda: CertificateGenerator(database))
+    quiz_manager = LazyComponent(lambda: QuizManager(database, auth_manager))
+    
+    # Pre-serialized catalog responses, rebuilt when the catalog_version trigger counter moves
+    catalog_cache = VersionedCache(lambda: course_manager.get_catalog_version(), check_interval=1.0)
+    
+    # Make auth_manager available to decorators
+    app.auth_manager = auth_manager
+    db = database
+    metrics.register_collector(collect_component_metrics)
+    
+    if start_background:
+        start_background_work()
+    return app
+
+def collect_component_metrics():
+    """Scrape-time samples from the database pool and work queues"""
+    pool = db.pool_stats()
+    samples = [
+        ('skillbridge_db_connections_opened_total', 'counter', 'SQLite connections opened', pool['created']),
+        ('skillbridge_db_queries_total', 'counter', 'SQL statements executed', pool['queries']),
+        ('skillbridge_db_query_seconds_total', 'counter', 'Time spent executing and fetching SQL',
+         pool['query_time_ms'] / 1000),
+        ('skillbridge_db_pool_in_use', 'gauge', 'Pooled connections checked out', pool['in_use']),
+        ('skillbridge_db_pool_idle', 'gauge', 'Pooled connections idle', pool['idle']),
+        ('skillbridge_db_pool_timeouts_total', 'counter', 'Connection checkouts that timed out', pool['timeouts']),
+        ('skillbridge_certificate_render_queue', 'gauge', 'Certificate renders queued or running',
+         certificate_generator.render_queue_depth() if certificate_generator.built else 0)
+    ]
+    if auth_manager.built:
+        hasher = auth_manager.hasher.stats()
+        samples.append(('skillbridge_password_hash_queue', 'gauge', 'Password hashes waiting for a worker',
+                        hasher['queued']))
+        samples.append(('skillbridge_password_hash_rejected_total', 'counter',
+                        'Password hashes refused because the queue was full', hasher['rejected']))
+    recommendations = quiz_manager.recommendation_stats() if quiz_manager.built else None
+    if recommendations:
+        samples.append(('skillbridge_recommendation_refresh_queue', 'gauge', 'Users waiting for a recommendation refresh',
+                        recommendations['queued']))
+        samples.append(('skillbridge_recommendations_refreshed_total', 'counter',
+                        'Stored recommendation lists rebuilt in the background', recommendations['refreshed']))
+    return samples
+
+def start_background_work(resume_renders=True):
+    """Start per-process background work; must run after any fork"""
+    # Verification lookups query the database until the filter is ready
+    certificate_generator.start_filter_build()
+    if resume_renders:
+        certificate_generator.resume_pending_renders()
+
+def serve_catalog(key, build):
+    """Serve a cached catalog response, answering conditional requests with 304"""
+    def serialize(version):
+        return SerializedResponse(build(), parse_sqlite_timestamp(version[1]))
+    
+    cached = catalog_cache.get(key, serialize)
+    return cached_json_response(cached.body, cached.etag, CATALOG_CACHE_CONTROL, cached.last_modified)
+
+# Certificate and QR images are immutable once written
+file_server = FileServer()
+
+@app.before_request
+def begin_sql_trace():
+    if db is not None and db.tracer is not None:
+        db.tracer.begin(f"{request.method} {request.path}")
+
+@app.after_request
+def end_sql_trace(response):
+    if db is not None and db.tracer is not None:
+        trace = db.tracer.end()
+        if trace is not None and app.debug:
+            response.headers['X-SQL-Queries'] = str(trace.query_count)
+            response.headers['X-SQL-Time-Ms'] = f"{trace.total_ms:.3f}"
+            response.headers['Server-Timing'] = f'db;dur={trace.total_ms:.3f};desc="{trace.query_count} queries"'
+    return response
 
 # Health check endpoint
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
+    try:
+        database = {'reachable': True, 'latency_ms': db.ping()}
+    except Exception as e:
+        database = {'reachable': False, 'error': str(e)}
+    
+    # Components that no request has needed yet report null rather than being built here
+    auth_built = auth_manager.built
+    certificates_built = certificate_generator.built
+    hasher_stats = auth_manager.hasher.stats() if auth_built else None
+    quiz_stats = quiz_manager.recommendation_stats() if quiz_manager.built else None
+    pool_stats = db.pool_stats()
+    return jsonify({
+        'status': 'healthy' if database['reachable'] else 'unhealthy',
+        'timestamp': datetime.now().isoformat(),
+        'database': database,
+        'queues': {
+            'certificate_render': certificate_generator.render_queue_depth() if certificates_built else 0,
+            'password_hashing': hasher_stats['queued'] if hasher_stats else 0,
+            'database_pool_in_use': pool_stats['in_use'],
+            'recommendation_refresh': quiz_stats['queued'] if quiz_stats else 0
+        },
+        'database_pool': pool_stats,
+        'sql_trace': db.tracer.stats() if db.tracer is not None else None,
+        'user_cache': auth_manager.user_cache.stats() if auth_built else None,
+        'password_hasher': hasher_stats,
+        'catalog_cache': catalog_cache.stats(),
+        'recommendations': quiz_stats,
+        'certificate_verification': certificate_generator.verification_stats() if certificates_built else None,
+        'file_cache': file_server.stats()
+    }), 200 if database['reachable'] else 503
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return app.response_class(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 # Authentication endpoints
 @app.route('/api/auth/register', methods=['POST'])
@@ -71,8 +243,22 @@ def get_current_user():
 # Course endpoints
 @app.route('/api/courses', methods=['GET'])
 def get_courses():
-    courses = course_manager.get_all_courses()
-    return jsonify({'courses': courses})
+    return serve_catalog('courses', lambda: {'courses': course_manager.get_all_courses()})
+
+@app.route('/api/search', methods=['GET'])
+def search_catalog():
+    kind = request.args.get('type', 'all')
+    if kind not in ('all', 'courses', 'skillsnaps'):
+        return jsonify({'error': 'type must be all, courses or skillsnaps'}), 400
+    
+    query = request.args.get('q', '')
+    results = course_manager.search_catalog(
+        query,
+        parse_limit(request.args.get('limit'), DEFAULT_RESULTS, MAX_RESULTS),
+        prefix=request.args.get('prefix', '1') != '0',
+        kinds=('courses', 'skillsnaps') if kind == 'all' else (kind,)
+    )
+    return jsonify({'query': query, **results})
 
 @app.route('/api/courses/<int:course_id>/skillsnaps', methods=['GET'])
 @require_auth
@@ -83,8 +269,22 @@ def get_course_skillsnaps(course_id):
 @app.route('/api/enrollments', methods=['GET'])
 @require_auth
 def get_user_enrollments():
-    enrollments = course_manager.get_user_enrollments(request.current_user['id'])
-    return jsonify({'enrollments': enrollments})
+    enrollments, next_cursor = course_manager.get_enrollments_page(
+        request.current_user['id'],
+        parse_limit(request.args.get('limit')),
+        request.args.get('cursor')
+    )
+    return jsonify({'enrollments': enrollments, 'next_cursor': next_cursor})
+
+@app.route('/api/activity', methods=['GET'])
+@require_auth
+def get_activity():
+    activity, next_cursor = course_manager.get_activity_page(
+        request.current_user['id'],
+        parse_limit(request.args.get('limit')),
+        request.args.get('cursor')
+    )
+    return jsonify({'activity': activity, 'next_cursor': next_cursor})
 
 @app.route('/api/enrollments', methods=['POST'])
 @require_auth
@@ -119,17 +319,45 @@ def complete_skillsnap(skillsnap_id):
     else:
         return jsonify(result), 400
 
+@app.route('/api/progress/sync', methods=['POST'])
+@require_auth
+def sync_offline_progress():
+    data = request.get_json() or {}
+    
+    result = course_manager.sync_offline_progress(
+        request.current_user['id'],
+        data.get('completions', [])
+    )
+    
+    if result['success']:
+        return jsonify(result), 200
+    else:
+        return jsonify(result), 400
+
 @app.route('/api/dashboard', methods=['GET'])
 @require_auth
 def get_dashboard():
-    dashboard_data = course_manager.get_user_dashboard(request.current_user['id'])
-    return jsonify(dashboard_data)
+    user_id = request.current_user['id']
+    
+    # The ETag is the read model's version, so an unchanged dashboard costs one PK lookup
+    known_version = None
+    for tag in request.if_none_match.as_set():
+        prefix = f"dashboard-{user_id}-"
+        if tag.startswith(prefix) and tag[len(prefix):].isdigit():
+            known_version = int(tag[len(prefix):])
+    
+    version, payload = course_manager.get_dashboard_snapshot(user_id, known_version)
+    etag = f"dashboard-{user_id}-{version}"
+    
+    if payload is None or etag_matches(etag):
+        return not_modified(etag, 'private, no-cache')
+    
+    return cached_json_response(payload, etag, 'private, no-cache')
 
 # Quiz endpoints
 @app.route('/api/quiz/questions', methods=['GET'])
 def get_quiz_questions():
-    questions = quiz_manager.get_onboarding_questions()
-    return jsonify({'questions': questions})
+    return serve_catalog('quiz_questions', lambda: {'questions': quiz_manager.get_onboarding_questions()})
 
 @app.route('/api/quiz/responses', methods=['POST'])
 @require_auth
@@ -140,9 +368,8 @@ def save_quiz_responses():
     result = quiz_manager.save_quiz_responses(request.current_user['id'], responses)
     
     if result['success']:
-        # Get personalized recommendations
-        recommendations = quiz_manager.get_personalized_recommendations(request.current_user['id'])
-        result['recommendations'] = recommendations
+        # Recommendations are rebuilt in the background; the list there is marked stale until then
+        result['recommendations_url'] = '/api/recommendations'
         return jsonify(result), 200
     else:
         return jsonify(result), 400
@@ -150,8 +377,15 @@ def save_quiz_responses():
 @app.route('/api/recommendations', methods=['GET'])
 @require_auth
 def get_recommendations():
-    recommendations = quiz_manager.get_personalized_recommendations(request.current_user['id'])
-    return jsonify({'recommendations': recommendations})
+    return jsonify(quiz_manager.get_recommendations(request.current_user['id']))
+
+@app.route('/api/analytics/quiz', methods=['GET'])
+@require_staff
+def get_quiz_analytics():
+    dimension = request.args.get('dimension', 'all')
+    if dimension not in ANSWER_DIMENSIONS:
+        return jsonify({'error': f"dimension must be one of {', '.join(ANSWER_DIMENSIONS)}"}), 400
+    return jsonify(quiz_manager.get_answer_distribution(dimension, request.args.get('value')))
 
 # Certificate endpoints
 @app.route('/api/certificates/generate', methods=['POST'])
@@ -166,47 +400,93 @@ def generate_certificate():
     result = certificate_generator.generate_certificate(request.current_user['id'], course_id)
     
     if result['success']:
-        return jsonify(result), 201
+        # Rendering continues in the background; poll the status URL or download with ?wait=
+        result['status_url'] = f"/api/certificates/{result['certificate_id']}/status"
+        return jsonify(result), 202
     else:
         return jsonify(result), 400
 
 @app.route('/api/certificates', methods=['GET'])
 @require_auth
 def get_user_certificates():
-    certificates = certificate_generator.get_user_certificates(request.current_user['id'])
-    return jsonify({'certificates': certificates})
+    certificates, next_cursor = certificate_generator.get_certificates_page(
+        request.current_user['id'],
+        parse_limit(request.args.get('limit')),
+        request.args.get('cursor')
+    )
+    return jsonify({'certificates': certificates, 'next_cursor': next_cursor})
 
 @app.route('/api/certificates/verify/<certificate_id>', methods=['GET'])
 def verify_certificate(certificate_id):
     result = certificate_generator.verify_certificate(certificate_id)
     return jsonify(result)
 
+@app.route('/api/certificates/<certificate_id>/status', methods=['GET'])
+def get_certificate_status(certificate_id):
+    status = certificate_generator.get_certificate_status(certificate_id)
+    
+    if not status:
+        return jsonify({'error': 'Certificate not found'}), 404
+    
+    return jsonify(public_status(status))
+
 @app.route('/api/certificates/download/<certificate_id>', methods=['GET'])
 def download_certificate(certificate_id):
-    # Verify certificate belongs to current user (if authenticated)
-    result = certificate_generator.verify_certificate(certificate_id)
+    # Status lookup is a cached, filter-guarded single-row read (no verification JOIN);
+    # optionally wait for a render that is still in progress
+    wait_seconds = min(max(request.args.get('wait', 0, type=float), 0), 30)
+    status = certificate_generator.wait_for_certificate(certificate_id, wait_seconds)
     
-    if not result['valid']:
+    if not status:
         return jsonify({'error': 'Certificate not found'}), 404
+    if status['status'] == 'pending':
+        response = jsonify(public_status(status))
+        response.headers['Retry-After'] = '2'
+        return response, 202
+    if status['status'] == 'failed':
+        # The cause is logged and kept on the record; it is not shown to anonymous callers
+        return jsonify({'error': 'Certificate rendering failed'}), 500
     
     # Find certificate file
-    cert_path = f"certificates/cert_{certificate_id}.png"
+    download_name = f"certificate_{certificate_id}.png"
+    cert_path = status['image_path'] or f"certificates/cert_{certificate_id}.png"
+    response = file_server.send(cert_path, download_name=download_name, as_attachment=True)
     
-    if os.path.exists(cert_path):
-        return send_file(cert_path, as_attachment=True, download_name=f"certificate_{certificate_id}.png")
-    else:
+    if response is None:
+        # A cached status may point at a file migrate-storage has since moved
+        status = certificate_generator.get_certificate_status(certificate_id, use_cache=False)
+        if status and status['image_path'] and status['image_path'] != cert_path:
+            response = file_server.send(status['image_path'], download_name=download_name, as_attachment=True)
+    
+    if response is None:
         return jsonify({'error': 'Certificate file not found'}), 404
+    return response
 
 # Static file serving for QR codes and certificates
-@app.route('/static/<filename>')
+@app.route('/static/<path:filename>')
 def serve_static(filename):
-    static_path = f"static/{filename}"
-    if os.path.exists(static_path):
-        return send_file(static_path)
-    else:
+    static_path = safe_join(certificate_generator.static_dir, filename)
+    response = file_server.send(static_path) if static_path else None
+    
+    if response is None:
         return jsonify({'error': 'File not found'}), 404
+    return response
 
 # Error handlers
+@app.errorhandler(HasherBusy)
+def hasher_busy(error):
+    response = jsonify({'success': False, 'error': str(error)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+@app.errorhandler(InvalidCursor)
+def invalid_cursor(error):
+    return jsonify({'error': str(error)}), 400
+
+@app.errorhandler(InvalidQuery)
+def invalid_query(error):
+    return jsonify({'error': str(error)}), 400
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint not found'}), 404
@@ -218,6 +498,7 @@ def internal_error(error):
 if __name__ == '__main__':
     # Create data directory if it doesn't exist
     os.makedirs('data', exist_ok=True)
+    create_app(init_db=True)
     
     # Run the application
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
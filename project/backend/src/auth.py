@@ -1,22 +1,122 @@
 import bcrypt
 import jwt
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify, current_app
 import sqlite3
+from cache import TTLCache
+
+# Roles allowed on cohort-wide reporting endpoints
+STAFF_ROLES = ('staff', 'admin')
+
+class HasherBusy(Exception):
+    """Raised when the password hashing pool cannot take more work"""
+    pass
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded worker pool with admission control.
+    
+    bcrypt releases the GIL, so a small thread pool keeps hashing off the
+    request threads. At most `workers + max_pending` operations are admitted;
+    anything beyond that fails fast with HasherBusy instead of queueing.
+    """
+    def __init__(self, rounds=None, workers=None, max_pending=None, timeout=10.0):
+        self.rounds = rounds or int(os.environ.get('SKILLBRIDGE_BCRYPT_ROUNDS', 12))
+        self.workers = workers or int(os.environ.get('SKILLBRIDGE_BCRYPT_WORKERS', os.cpu_count() or 2))
+        self.max_pending = max_pending if max_pending is not None else int(
+            os.environ.get('SKILLBRIDGE_BCRYPT_QUEUE', self.workers * 4)
+        )
+        self.timeout = timeout
+        
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        self._admission = threading.BoundedSemaphore(self.workers + self.max_pending)
+        self._lock = threading.Lock()
+        self._outstanding = 0
+        self.completed = 0
+        self.rejected = 0
+    
+    def _run(self, fn, *args):
+        """Submit bcrypt work and wait for it, rejecting immediately when saturated"""
+        if not self._admission.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusy('Password service is busy, please retry')
+        
+        with self._lock:
+            self._outstanding += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._outstanding -= 1
+            self._admission.release()
+            raise
+        future.add_done_callback(self._done)
+        
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HasherBusy('Password service timed out, please retry')
+    
+    def _done(self, future):
+        with self._lock:
+            self._outstanding -= 1
+            self.completed += 1
+        self._admission.release()
+    
+    def hash(self, password):
+        """Hash password with the configured cost factor"""
+        if not isinstance(password, str):
+            raise TypeError('Password must be a string')
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+    
+    def verify(self, password, hashed):
+        """Verify password against hash; bcrypt raises ValueError for a malformed hash"""
+        if not isinstance(password, str) or not isinstance(hashed, str):
+            raise TypeError('Password and hash must be strings')
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+    
+    def needs_rehash(self, hashed):
+        """True when a stored hash was made with a different cost factor"""
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+    
+    def stats(self):
+        """Snapshot of pool size and queue depth"""
+        with self._lock:
+            return {
+                'rounds': self.rounds,
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'outstanding': self._outstanding,
+                'queued': max(0, self._outstanding - self.workers),
+                'completed': self.completed,
+                'rejected': self.rejected
+            }
 
 class AuthManager:
-    def __init__(self, database):
+    def __init__(self, database, user_cache_size=10000, user_cache_ttl=60.0, hasher=None):
         self.db = database
         self.secret_key = "skillbridge_secret_key_2024"  # In production, use environment variable
+        self.hasher = hasher or PasswordHasher()
+        
+        # Authenticated user rows keyed by users.id; the TTL bounds staleness for
+        # writes made by other processes, local writes call invalidate_user()
+        self.user_cache = TTLCache(maxsize=user_cache_size, ttl=user_cache_ttl)
     
     def hash_password(self, password):
-        """Hash password using bcrypt"""
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        """Hash password using bcrypt on the hashing pool"""
+        return self.hasher.hash(password)
     
     def verify_password(self, password, hashed):
-        """Verify password against hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+        """Verify password against hash on the hashing pool"""
+        return self.hasher.verify(password, hashed)
     
     def generate_token(self, user_id):
         """Generate JWT token for user"""
@@ -38,18 +138,23 @@ class AuthManager:
     
     def register_user(self, user_data):
         """Register new user"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            # Check if user_id already exists
+        # Check if user_id already exists
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
             cursor.execute("SELECT id FROM users WHERE user_id = ?", (user_data['user_id'],))
             if cursor.fetchone():
                 return {'success': False, 'message': 'User ID already exists'}
-            
-            # Hash password
+        
+        # Hash password without holding a connection; only HasherBusy (saturated) propagates
+        try:
             password_hash = self.hash_password(user_data['password'])
-            
+        except (TypeError, ValueError) as e:
+            return {'success': False, 'message': str(e)}
+        
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
             # Insert user
             cursor.execute('''
                 INSERT INTO users (user_id, password_hash, name, email, location, language_preference)
@@ -65,6 +170,7 @@ class AuthManager:
             
             user_db_id = cursor.lastrowid
             conn.commit()
+            self.invalidate_user(user_db_id)
             
             # Generate token
             token = self.generate_token(user_db_id)
@@ -79,6 +185,10 @@ class AuthManager:
                 }
             }
             
+        except sqlite3.IntegrityError:
+            # Lost a race with a concurrent registration while hashing
+            conn.rollback()
+            return {'success': False, 'message': 'User ID already exists'}
         except Exception as e:
             conn.rollback()
             return {'success': False, 'message': str(e)}
@@ -87,29 +197,49 @@ class AuthManager:
     
     def login_user(self, user_id, password, course_name=None):
         """Authenticate user login"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        try:
-            # Get user data
+        # Get user data
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, user_id, password_hash, name, email, location
                 FROM users WHERE user_id = ?
             ''', (user_id,))
-            
             user = cursor.fetchone()
-            if not user:
-                return {'success': False, 'message': 'User not found'}
-            
-            # Verify password
-            if not self.verify_password(password, user[2]):
-                return {'success': False, 'message': 'Invalid password'}
-            
+        
+        if not user:
+            return {'success': False, 'message': 'User not found'}
+        
+        # Verify password without holding a connection; only HasherBusy (saturated) propagates.
+        # A malformed or legacy stored hash fails the login like a wrong password.
+        try:
+            valid = self.verify_password(password, user[2])
+        except (TypeError, ValueError):
+            valid = False
+        if not valid:
+            return {'success': False, 'message': 'Invalid password'}
+        
+        # Transparently upgrade hashes made with an old cost factor
+        new_hash = None
+        if self.hasher.needs_rehash(user[2]):
+            try:
+                new_hash = self.hash_password(password)
+            except HasherBusy:
+                pass  # try again on a later login rather than failing this one
+        
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
             # Update last login
             cursor.execute('''
                 UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE id = ?
             ''', (user[0],))
             
+            if new_hash:
+                cursor.execute('''
+                    UPDATE users SET password_hash = ? WHERE id = ?
+                ''', (new_hash, user[0]))
+            
             # If course specified, check/create enrollment
             if course_name:
                 cursor.execute("SELECT id FROM courses WHERE course_name = ?", (course_name,))
@@ -143,21 +273,30 @@ class AuthManager:
             }
             
         except Exception as e:
+            conn.rollback()
             return {'success': False, 'message': str(e)}
         finally:
             conn.close()
     
+    def invalidate_user(self, user_id):
+        """Drop a user from the authentication cache after their row changes"""
+        self.user_cache.invalidate(user_id)
+    
     def get_user_by_token(self, token):
         """Get user data by token"""
         user_id = self.verify_token(token)
         if not user_id:
             return None
         
+        cached = self.user_cache.get(user_id)
+        if cached is not None:
+            return dict(cached)
+        
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT id, user_id, name, email, location, language_preference
+            SELECT id, user_id, name, email, location, language_preference, role
             FROM users WHERE id = ?
         ''', (user_id,))
         
@@ -165,14 +304,17 @@ class AuthManager:
         conn.close()
         
         if user:
-            return {
+            user_data = {
                 'id': user[0],
                 'user_id': user[1],
                 'name': user[2],
                 'email': user[3],
                 'location': user[4],
-                'language_preference': user[5]
+                'language_preference': user[5],
+                'role': user[6]
             }
+            self.user_cache.set(user_id, user_data)
+            return dict(user_data)
         return None
 
 def require_auth(f):
@@ -194,4 +336,14 @@ def require_auth(f):
         request.current_user = user
         return f(*args, **kwargs)
     
-    return decorated_function
\ No newline at end of file
+    return decorated_function
+
+def require_staff(f):
+    """Decorator to require an authenticated staff or admin account"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if request.current_user.get('role') not in STAFF_ROLES:
+            return jsonify({'error': 'Staff access required'}), 403
+        return f(*args, **kwargs)
+    
+    return require_auth(decorated_function)
\ No newline at end of file
@@ -0,0 +1,183 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds"""
+    def __init__(self, maxsize=10000, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get(self, key, default=None):
+        """Get a cached value, or `default` if missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry when full"""
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, key):
+        """Drop a single entry"""
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+    
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def stats(self):
+        """Snapshot of cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+class VersionedCache:
+    """Values built once per data version.
+    
+    `load_version` returns the current version of the underlying data (for
+    example a counter bumped by triggers). It is polled at most every
+    `check_interval` seconds, so most lookups never touch the database and
+    writes from other processes are picked up within that interval.
+    """
+    def __init__(self, load_version, check_interval=1.0):
+        self.load_version = load_version
+        self.check_interval = check_interval
+        self._version = None
+        self._checked_at = 0.0
+        self._values = {}
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def current_version(self):
+        """Get the data version, re-reading it when the check interval has passed"""
+        now = time.monotonic()
+        with self._lock:
+            if self._version is not None and now - self._checked_at < self.check_interval:
+                return self._version
+        
+        version = self.load_version()
+        with self._lock:
+            if version != self._version:
+                if self._values:
+                    self.invalidations += 1
+                self._values.clear()
+                self._version = version
+            self._checked_at = now
+        return version
+    
+    def get(self, key, build):
+        """Get the value for key at the current version, calling build() on a miss"""
+        version = self.current_version()
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        
+        value = build(version)
+        with self._lock:
+            if self._version == version:
+                self._values[key] = (version, value)
+        return value
+    
+    def invalidate(self):
+        """Force the next lookup to re-read the version and rebuild"""
+        with self._lock:
+            self._values.clear()
+            self._version = None
+            self.invalidations += 1
+    
+    def stats(self):
+        """Snapshot of the cached version and hit/miss counters"""
+        with self._lock:
+            return {
+                'version': self._version,
+                'entries': len(self._values),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations
+            }
+
+class BloomFilter:
+    """Compact set-membership filter: no false negatives, tunable false-positive rate"""
+    def __init__(self, capacity=100000, error_rate=0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+    
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+    
+    @property
+    def is_full(self):
+        """True once more items were added than the filter was sized for"""
+        return self.count > self.capacity
+    
+    def stats(self):
+        return {
+            'items': self.count,
+            'capacity': self.capacity,
+            'bits': self.num_bits,
+            'hashes': self.num_hashes,
+            'bytes': len(self._bits)
+        }
@@ -1,11 +1,178 @@
-import qrcode
-from PIL import Image, ImageDraw, ImageFont
+import io
+import logging
 import os
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
 import uuid
+from cache import BloomFilter, TTLCache
+from storage import LocalStorage
+from pagination import fetch_page
+
+logger = logging.getLogger('skillbridge.certificates')
+
+# Render status fields the unauthenticated status and download endpoints may return
+PUBLIC_STATUS_FIELDS = ('certificate_id', 'status', 'ready', 'issued_at', 'rendered_at', 'qr_code_url')
+
+class CertificateTemplate:
+    """Certificate layout whose static layer is rendered once per process.
+    
+    Fonts are loaded and the borders, headings and labels drawn a single time;
+    each certificate is a copy of that background plus the name, course, date,
+    ID and an in-memory QR code. Pillow and qrcode are imported here rather
+    than at module level, so API processes that never render skip loading them.
+    """
+    WIDTH, HEIGHT = 800, 600
+    QR_SIZE = 80
+    QR_FILE_BOX_SIZE = 10  # pixels per module in the standalone QR PNG
+    
+    def __init__(self, font_name="arial.ttf"):
+        self.title_font, self.name_font, self.text_font, self.small_font = self._load_fonts(font_name)
+        self.background = self._render_background()
+    
+    def _load_fonts(self, font_name):
+        """Load the four font sizes, falling back to Pillow's default font"""
+        from PIL import ImageFont
+        
+        try:
+            return tuple(ImageFont.truetype(font_name, size) for size in (36, 28, 18, 14))
+        except OSError:
+            default = ImageFont.load_default()
+            return default, default, default, default
+    
+    def _draw_centered(self, draw, text, font, y, fill):
+        bbox = draw.textbbox((0, 0), text, font=font)
+        draw.text(((self.WIDTH - (bbox[2] - bbox[0])) // 2, y), text, fill=fill, font=font)
+    
+    def _render_background(self):
+        """Draw everything that is identical on every certificate"""
+        from PIL import Image, ImageDraw
+        
+        width, height = self.WIDTH, self.HEIGHT
+        image = Image.new('RGB', (width, height), 'white')
+        draw = ImageDraw.Draw(image)
+        
+        # Border
+        border_color = "#2563eb"  # Blue
+        draw.rectangle([20, 20, width-20, height-20], outline=border_color, width=3)
+        draw.rectangle([30, 30, width-30, height-30], outline=border_color, width=1)
+        
+        self._draw_centered(draw, "Certificate of Completion", self.title_font, 80, "#1f2937")
+        self._draw_centered(draw, "This certifies that", self.text_font, 150, "#6b7280")
+        self._draw_centered(draw, "has successfully completed", self.text_font, 240, "#6b7280")
+        
+        # SkillBridge logo/text and QR code label
+        draw.text((50, height - 60), "SkillBridge", fill="#2563eb", font=self.text_font)
+        draw.text((width - 130, height - 45), "Verify Online", fill="#6b7280", font=self.small_font)
+        
+        return image
+    
+    def qr_modules(self, data):
+        """Encode data as a QR code image with one pixel per module"""
+        import qrcode
+        from PIL import Image
+        
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_L,
+            box_size=1,
+            border=4,
+        )
+        qr.add_data(data)
+        qr.make(fit=True)
+        
+        matrix = qr.get_matrix()
+        size = len(matrix)
+        pixels = bytes(0 if cell else 255 for row in matrix for cell in row)
+        return Image.frombytes('L', (size, size), pixels)
+    
+    def qr_file_image(self, modules):
+        """Scale QR modules to the size used for the standalone QR PNG"""
+        from PIL import Image
+        
+        size = modules.width * self.QR_FILE_BOX_SIZE
+        return modules.resize((size, size), Image.NEAREST).convert('1', dither=Image.NONE)
+    
+    def render(self, user_name, course_name, certificate_id, completion_date, modules):
+        """Draw the per-certificate text and QR code onto a copy of the background"""
+        from PIL import Image, ImageDraw
+        
+        image = self.background.copy()
+        draw = ImageDraw.Draw(image)
+        
+        self._draw_centered(draw, user_name, self.name_font, 190, "#2563eb")
+        self._draw_centered(draw, course_name, self.name_font, 280, "#1f2937")
+        self._draw_centered(
+            draw, f"Completion Date: {completion_date.strftime('%B %d, %Y')}", self.text_font, 350, "#6b7280"
+        )
+        draw.text((50, self.HEIGHT - 80), f"Certificate ID: {certificate_id}", fill="#6b7280", font=self.small_font)
+        
+        qr_image = modules.resize((self.QR_SIZE, self.QR_SIZE), Image.NEAREST)
+        image.paste(qr_image, (self.WIDTH - 130, self.HEIGHT - 130))
+        
+        return image
+
+_template = None
+_template_lock = threading.Lock()
+
+def get_certificate_template():
+    """Get the process-wide certificate template, building it on first use"""
+    global _template
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                _template = CertificateTemplate()
+    return _template
+
+def _sqlite_now():
+    """Current UTC time in SQLite's CURRENT_TIMESTAMP format"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+def issue_date(issued_at):
+    """Local date and time a certificate was issued, from its stored issued_at (UTC)"""
+    return datetime.strptime(issued_at, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc).astimezone()
+
+def public_status(status):
+    """A render status without storage paths, hashes or the failure text"""
+    return {field: status[field] for field in PUBLIC_STATUS_FIELDS}
+
+def _png_bytes(image):
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+def render_to_storage(image_storage, qr_storage, user_name, course_name, certificate_id, verification_url,
+                      issued_at):
+    """Render the QR code and certificate into content-addressed storage.
+    
+    The completion date printed is the record's issued_at, so a render that is
+    resumed or retried later still shows the day the certificate was issued.
+    Returns (qr_key, qr_hash, image_key, image_hash).
+    """
+    template = get_certificate_template()
+    modules = template.qr_modules(verification_url)
+    qr_key, qr_hash = qr_storage.put(_png_bytes(template.qr_file_image(modules)), '.png')
+    
+    image = template.render(user_name, course_name, certificate_id, issue_date(issued_at), modules)
+    image_key, image_hash = image_storage.put(_png_bytes(image), '.png')
+    
+    return qr_key, qr_hash, image_key, image_hash
+
+def _render_batch_item(item):
+    """Process-pool worker for batch issuance; returns (certificate_id, stored, error)"""
+    certificate_id = item[4]
+    try:
+        return certificate_id, render_to_storage(*item), None
+    except Exception as e:
+        return certificate_id, None, str(e)
+
+# A pending render whose claim is older than this is presumed lost with its
+# worker and may be claimed again (re-rendering produces the same blobs)
+RENDER_CLAIM_SECONDS = 300
 
 class CertificateGenerator:
-    def __init__(self, database):
+    def __init__(self, database, render_workers=2):
         self.db = database
         self.certificates_dir = "certificates"
         self.static_dir = "static"
@@ -13,21 +180,49 @@ class CertificateGenerator:
         # Create directories if they don't exist
         os.makedirs(self.certificates_dir, exist_ok=True)
         os.makedirs(self.static_dir, exist_ok=True)
+        
+        # Hash-sharded, content-addressed blobs; image_path/qr_code_path hold storage keys
+        # for rows with a recorded hash, and legacy flat paths for rows without one
+        self.image_storage = LocalStorage(self.certificates_dir)
+        self.qr_storage = LocalStorage(self.static_dir)
+        
+        # Rendering runs off the request path; Pillow releases the GIL while encoding
+        self._executor = ThreadPoolExecutor(max_workers=render_workers, thread_name_prefix='certificate-render')
+        self._jobs = {}  # certificate_id -> Future for renders submitted by this process
+        self._jobs_lock = threading.Lock()
+        
+        # Public verification: valid results are cached, and a Bloom filter of every
+        # issued ID rejects made-up IDs without a query. The filter is built at startup
+        # (start_background_work) off the request path; until it is ready lookups go to
+        # the database. It is extended with new rows (by id) at most every
+        # `filter_sync_interval` seconds when it misses, so certificates issued by other
+        # processes become verifiable within that window.
+        self._verify_cache = TTLCache(maxsize=50000, ttl=300.0)
+        self._known_ids = None
+        self._known_ids_building = False
+        self._known_ids_syncing = False
+        self._known_ids_max_row = 0
+        self._known_ids_synced_at = 0.0
+        self._known_ids_lock = threading.Lock()
+        self.filter_sync_interval = 1.0
+        self.verify_stats = {'filter_rejections': 0, 'db_lookups': 0, 'false_positives': 0, 'unfiltered': 0}
+        # A rendered certificate never changes, so its status can be cached for downloads
+        self._ready_status_cache = TTLCache(maxsize=50000, ttl=3600.0)
     
     def generate_certificate(self, user_id, course_id):
-        """Generate certificate for user completing a course"""
+        """Record a certificate and queue its image for rendering"""
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
         try:
             # Check if certificate already exists
             cursor.execute('''
-                SELECT certificate_id FROM certificates 
+                SELECT certificate_id, status FROM certificates 
                 WHERE user_id = ? AND course_id = ?
             ''', (user_id, course_id))
             
             existing = cursor.fetchone()
-            if existing:
+            if existing and existing[1] != 'failed':
                 return {'success': False, 'message': 'Certificate already exists', 'certificate_id': existing[0]}
             
             # Get user and course data
@@ -43,144 +238,376 @@ class CertificateGenerator:
             
             user_name, course_name = user_course
             
-            # Generate unique certificate ID
-            certificate_id = f"SB-{datetime.now().year}-{str(uuid.uuid4())[:8].upper()}"
-            
-            # Create verification URL
-            verification_url = f"https://skillbridge.edu/verify/{certificate_id}"
-            
-            # Generate QR code
-            qr_code_path = self._generate_qr_code(verification_url, certificate_id)
-            
-            # Generate certificate image
-            cert_image_path = self._generate_certificate_image(
-                user_name, course_name, certificate_id, qr_code_path
-            )
-            
-            # Save certificate record
-            cursor.execute('''
-                INSERT INTO certificates (user_id, course_id, certificate_id, qr_code_path, verification_url)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, course_id, certificate_id, qr_code_path, verification_url))
+            if existing:
+                # Previous render failed: keep the issued ID and try again
+                certificate_id = existing[0]
+                cursor.execute('''
+                    SELECT verification_url, issued_at FROM certificates WHERE certificate_id = ?
+                ''', (certificate_id,))
+                verification_url, issued_at = cursor.fetchone()
+                cursor.execute('''
+                    UPDATE certificates SET status = 'pending', error = NULL, render_claimed_at = CURRENT_TIMESTAMP
+                    WHERE certificate_id = ?
+                ''', (certificate_id,))
+            else:
+                # Generate unique certificate ID
+                certificate_id = f"SB-{datetime.now().year}-{str(uuid.uuid4())[:8].upper()}"
+                
+                # Create verification URL
+                verification_url = f"https://skillbridge.edu/verify/{certificate_id}"
+                issued_at = _sqlite_now()
+                
+                # Save certificate record before rendering so status is visible immediately;
+                # storage keys are filled in once the content (and so its hash) exists
+                cursor.execute('''
+                    INSERT INTO certificates (user_id, course_id, certificate_id, verification_url, issued_at,
+                                              status, render_claimed_at)
+                    VALUES (?, ?, ?, ?, ?, 'pending', CURRENT_TIMESTAMP)
+                ''', (user_id, course_id, certificate_id, verification_url, issued_at))
             
             conn.commit()
             
-            return {
-                'success': True,
-                'certificate_id': certificate_id,
-                'verification_url': verification_url,
-                'qr_code_path': qr_code_path,
-                'certificate_image': cert_image_path
-            }
-            
         except Exception as e:
             conn.rollback()
             return {'success': False, 'message': str(e)}
         finally:
             conn.close()
+        
+        self._remember_issued([certificate_id])
+        self._submit_render(certificate_id, user_name, course_name, verification_url, issued_at)
+        
+        return {
+            'success': True,
+            'certificate_id': certificate_id,
+            'status': 'pending',
+            'verification_url': verification_url
+        }
     
-    def _generate_qr_code(self, verification_url, certificate_id):
-        """Generate QR code for certificate verification"""
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(verification_url)
-        qr.make(fit=True)
+    def _submit_render(self, certificate_id, user_name, course_name, verification_url, issued_at):
+        """Queue a render job unless this process already has one in flight"""
+        with self._jobs_lock:
+            job = self._jobs.get(certificate_id)
+            if job is not None and not job.done():
+                return job
+            job = self._executor.submit(
+                self._render_certificate, certificate_id, user_name, course_name, verification_url, issued_at
+            )
+            self._jobs[certificate_id] = job
+        job.add_done_callback(lambda _: self._forget_job(certificate_id, job))
+        return job
+    
+    def _forget_job(self, certificate_id, job):
+        with self._jobs_lock:
+            if self._jobs.get(certificate_id) is job:
+                del self._jobs[certificate_id]
+    
+    def _render_certificate(self, certificate_id, user_name, course_name, verification_url, issued_at):
+        """Background job: draw the QR code and certificate, then mark the record ready"""
+        try:
+            qr_key, qr_hash, image_key, image_hash = render_to_storage(
+                self.image_storage, self.qr_storage, user_name, course_name, certificate_id, verification_url,
+                issued_at
+            )
+        except Exception as e:
+            logger.exception("Rendering certificate %s failed", certificate_id)
+            with self.db.connection() as conn:
+                conn.execute('''
+                    UPDATE certificates SET status = 'failed', error = ? WHERE certificate_id = ?
+                ''', (str(e), certificate_id))
+                conn.commit()
+            return 'failed'
+        
+        with self.db.connection() as conn:
+            conn.execute('''
+                UPDATE certificates
+                SET status = 'ready', rendered_at = CURRENT_TIMESTAMP, error = NULL,
+                    qr_code_path = ?, qr_hash = ?, image_path = ?, image_hash = ?
+                WHERE certificate_id = ?
+            ''', (qr_key, qr_hash, image_key, image_hash, certificate_id))
+            conn.commit()
+        return 'ready'
+    
+    def resume_pending_renders(self, claim_seconds=RENDER_CLAIM_SECONDS):
+        """Requeue pending certificates that no live process is rendering.
         
-        qr_image = qr.make_image(fill_color="black", back_color="white")
-        qr_path = f"{self.static_dir}/qr_{certificate_id}.png"
-        qr_image.save(qr_path)
+        Every worker process calls this at startup. Each pending row is claimed
+        with a single UPDATE, so concurrent callers split the rows between them;
+        rows claimed more than `claim_seconds` ago (their worker died or was
+        recycled) are claimed again.
+        """
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE certificates SET render_claimed_at = CURRENT_TIMESTAMP
+                WHERE status = 'pending'
+                  AND (render_claimed_at IS NULL OR render_claimed_at <= datetime('now', ?))
+                RETURNING certificate_id
+            ''', (f'-{int(claim_seconds)} seconds',))
+            claimed = [row[0] for row in cursor.fetchall()]
+            conn.commit()
+            
+            pending = []
+            for start in range(0, len(claimed), 500):
+                batch = claimed[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                cursor.execute(f'''
+                    SELECT c.certificate_id, u.name, co.course_name, c.verification_url, c.issued_at
+                    FROM certificates c
+                    JOIN users u ON c.user_id = u.id
+                    JOIN courses co ON c.course_id = co.id
+                    WHERE c.certificate_id IN ({placeholders})
+                ''', batch)
+                pending.extend(cursor.fetchall())
         
-        return qr_path
+        for row in pending:
+            self._submit_render(*row)
+        return len(pending)
     
-    def _generate_certificate_image(self, user_name, course_name, certificate_id, qr_code_path):
-        """Generate certificate image"""
-        # Create certificate image (800x600)
-        width, height = 800, 600
-        image = Image.new('RGB', (width, height), 'white')
-        draw = ImageDraw.Draw(image)
+    def get_certificate_status(self, certificate_id, use_cache=True):
+        """Get the render status of a certificate.
         
-        # Try to use a nice font, fallback to default
-        try:
-            title_font = ImageFont.truetype("arial.ttf", 36)
-            name_font = ImageFont.truetype("arial.ttf", 28)
-            text_font = ImageFont.truetype("arial.ttf", 18)
-            small_font = ImageFont.truetype("arial.ttf", 14)
-        except:
-            title_font = ImageFont.load_default()
-            name_font = ImageFont.load_default()
-            text_font = ImageFont.load_default()
-            small_font = ImageFont.load_default()
-        
-        # Draw border
-        border_color = "#2563eb"  # Blue
-        draw.rectangle([20, 20, width-20, height-20], outline=border_color, width=3)
-        draw.rectangle([30, 30, width-30, height-30], outline=border_color, width=1)
+        Pass use_cache=False when a cached status turned out to be stale (its
+        file was moved by migrate_storage in another process).
+        """
+        cached = self._ready_status_cache.get(certificate_id) if use_cache else None
+        if cached is not None:
+            return dict(cached)
+        if self._may_exist(certificate_id) is False:
+            return None
         
-        # Title
-        title = "Certificate of Completion"
-        title_bbox = draw.textbbox((0, 0), title, font=title_font)
-        title_width = title_bbox[2] - title_bbox[0]
-        draw.text(((width - title_width) // 2, 80), title, fill="#1f2937", font=title_font)
-        
-        # "This certifies that"
-        certifies_text = "This certifies that"
-        certifies_bbox = draw.textbbox((0, 0), certifies_text, font=text_font)
-        certifies_width = certifies_bbox[2] - certifies_bbox[0]
-        draw.text(((width - certifies_width) // 2, 150), certifies_text, fill="#6b7280", font=text_font)
-        
-        # User name
-        name_bbox = draw.textbbox((0, 0), user_name, font=name_font)
-        name_width = name_bbox[2] - name_bbox[0]
-        draw.text(((width - name_width) // 2, 190), user_name, fill="#2563eb", font=name_font)
-        
-        # "has successfully completed"
-        completed_text = "has successfully completed"
-        completed_bbox = draw.textbbox((0, 0), completed_text, font=text_font)
-        completed_width = completed_bbox[2] - completed_bbox[0]
-        draw.text(((width - completed_width) // 2, 240), completed_text, fill="#6b7280", font=text_font)
-        
-        # Course name
-        course_bbox = draw.textbbox((0, 0), course_name, font=name_font)
-        course_width = course_bbox[2] - course_bbox[0]
-        draw.text(((width - course_width) // 2, 280), course_name, fill="#1f2937", font=name_font)
-        
-        # Date
-        date_text = f"Completion Date: {datetime.now().strftime('%B %d, %Y')}"
-        date_bbox = draw.textbbox((0, 0), date_text, font=text_font)
-        date_width = date_bbox[2] - date_bbox[0]
-        draw.text(((width - date_width) // 2, 350), date_text, fill="#6b7280", font=text_font)
-        
-        # Certificate ID
-        id_text = f"Certificate ID: {certificate_id}"
-        draw.text((50, height - 80), id_text, fill="#6b7280", font=small_font)
-        
-        # SkillBridge logo/text
-        logo_text = "SkillBridge"
-        draw.text((50, height - 60), logo_text, fill="#2563eb", font=text_font)
-        
-        # Add QR code
-        try:
-            qr_image = Image.open(qr_code_path)
-            qr_image = qr_image.resize((80, 80))
-            image.paste(qr_image, (width - 130, height - 130))
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT certificate_id, status, image_path, image_hash, qr_code_path, qr_hash,
+                       issued_at, rendered_at, error
+                FROM certificates WHERE certificate_id = ?
+            ''', (certificate_id,))
+            row = cursor.fetchone()
+        
+        if not row:
+            return None
+        
+        image_path, qr_code_path = row[2], row[4]
+        if row[3]:
+            image_path = self.image_storage.local_path(image_path)
+        if row[5]:
+            qr_code_path = self.qr_storage.local_path(qr_code_path)
+        
+        status = {
+            'certificate_id': row[0],
+            'status': row[1],
+            'ready': row[1] == 'ready',
+            'image_path': image_path,
+            'image_hash': row[3],
+            'qr_code_url': f"/static/{row[4]}" if row[5] else None,
+            'issued_at': row[6],
+            'rendered_at': row[7],
+            'error': row[8]
+        }
+        if status['ready']:
+            self._ready_status_cache.set(certificate_id, status)
+        return dict(status)
+    
+    def wait_for_certificate(self, certificate_id, timeout):
+        """Wait up to `timeout` seconds for a pending render, then return its status"""
+        with self._jobs_lock:
+            job = self._jobs.get(certificate_id)
+        if job is not None and timeout > 0:
+            wait([job], timeout=timeout)
+        return self.get_certificate_status(certificate_id)
+    
+    def issue_cohort_certificates(self, course_id, workers=None, chunksize=8):
+        """Issue certificates to every learner who completed a course but has none yet.
+        
+        Images are rendered across a process pool and the records written with a
+        single executemany in one transaction.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        
+        started = time.perf_counter()
+        
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT course_name FROM courses WHERE id = ?', (course_id,))
+            course = cursor.fetchone()
+            if not course:
+                return {'success': False, 'message': 'Course not found'}
+            course_name = course[0]
+            
+            cursor.execute('''
+                SELECT u.id, u.name
+                FROM enrollments e
+                JOIN users u ON e.user_id = u.id
+                LEFT JOIN certificates c ON c.user_id = e.user_id AND c.course_id = e.course_id
+                WHERE e.course_id = ? AND e.completed_at IS NOT NULL AND c.id IS NULL
+            ''', (course_id,))
+            learners = cursor.fetchall()
+        
+        items = []
+        records = {}
+        for learner_id, user_name in learners:
+            certificate_id = f"SB-{datetime.now().year}-{str(uuid.uuid4())[:8].upper()}"
+            verification_url = f"https://skillbridge.edu/verify/{certificate_id}"
+            issued_at = _sqlite_now()
+            items.append((self.image_storage, self.qr_storage, user_name, course_name,
+                          certificate_id, verification_url, issued_at))
+            records[certificate_id] = (learner_id, course_id, certificate_id, verification_url, issued_at)
+        
+        failures = []
+        rendered = []
+        if items:
+            # Build the template before forking so workers inherit it
+            get_certificate_template()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for certificate_id, stored, error in pool.map(_render_batch_item, items, chunksize=chunksize):
+                    if error:
+                        failures.append({'user_id': records[certificate_id][0], 'error': error})
+                    else:
+                        learner_id, course_id, certificate_id, verification_url, issued_at = records[certificate_id]
+                        rendered.append((learner_id, course_id, certificate_id, verification_url, issued_at)
+                                        + stored + (learner_id, course_id))
+        render_seconds = time.perf_counter() - started
+        
+        issued = 0
+        if rendered:
+            conn = self.db.get_connection()
+            try:
+                cursor = conn.cursor()
+                # NOT EXISTS skips learners who were issued one through the API meanwhile
+                cursor.executemany('''
+                    INSERT INTO certificates (user_id, course_id, certificate_id, verification_url, issued_at,
+                                              qr_code_path, qr_hash, image_path, image_hash,
+                                              status, rendered_at)
+                    SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, 'ready', CURRENT_TIMESTAMP
+                    WHERE NOT EXISTS (SELECT 1 FROM certificates WHERE user_id = ? AND course_id = ?)
+                ''', rendered)
+                issued = cursor.rowcount
+                conn.commit()
+                self._remember_issued([record[2] for record in rendered])
+            except Exception as e:
+                conn.rollback()
+                return {'success': False, 'message': str(e)}
+            finally:
+                conn.close()
+        
+        elapsed = time.perf_counter() - started
+        return {
+            'success': True,
+            'course_id': course_id,
+            'course_name': course_name,
+            'candidates': len(learners),
+            'issued': issued,
+            'skipped': len(rendered) - issued,
+            'failed': failures,
+            'render_seconds': round(render_seconds, 3),
+            'elapsed_seconds': round(elapsed, 3),
+            'certificates_per_second': round(len(rendered) / render_seconds, 1) if rendered else 0.0
+        }
+    
+    def migrate_storage(self, dry_run=False, batch_size=500):
+        """Copy certificates from the flat directories into sharded storage.
+        
+        Rows without a recorded hash are read from their legacy path, stored by
+        content hash and updated in batches. The originals stay in place, since
+        running servers may still have their paths cached; remove them later
+        with prune_legacy_files().
+        """
+        migrated = 0
+        missing = []
+        last_row = 0
+        
+        while True:
+            with self.db.connection() as conn:
+                rows = conn.execute('''
+                    SELECT id, certificate_id, image_path, qr_code_path
+                    FROM certificates
+                    WHERE id > ? AND status = 'ready' AND (image_hash IS NULL OR qr_hash IS NULL)
+                    ORDER BY id LIMIT ?
+                ''', (last_row, batch_size)).fetchall()
+            if not rows:
+                break
+            last_row = rows[-1][0]
+            
+            updates = []
+            for row_id, certificate_id, image_path, qr_code_path in rows:
+                image_path = image_path or f"{self.certificates_dir}/cert_{certificate_id}.png"
+                qr_code_path = qr_code_path or f"{self.static_dir}/qr_{certificate_id}.png"
+                if not (os.path.exists(image_path) and os.path.exists(qr_code_path)):
+                    missing.append(certificate_id)
+                    continue
+                if dry_run:
+                    migrated += 1
+                    continue
+                
+                with open(image_path, 'rb') as f:
+                    image_key, image_hash = self.image_storage.put(f.read(), '.png')
+                with open(qr_code_path, 'rb') as f:
+                    qr_key, qr_hash = self.qr_storage.put(f.read(), '.png')
+                updates.append((image_key, image_hash, qr_key, qr_hash, row_id))
             
-            # QR code label
-            draw.text((width - 130, height - 45), "Verify Online", fill="#6b7280", font=small_font)
-        except:
-            pass  # Skip QR code if file not found
+            if updates:
+                with self.db.connection() as conn:
+                    conn.executemany('''
+                        UPDATE certificates SET image_path = ?, image_hash = ?, qr_code_path = ?, qr_hash = ?
+                        WHERE id = ?
+                    ''', updates)
+                    conn.commit()
+                migrated += len(updates)
         
-        # Save certificate image
-        cert_path = f"{self.certificates_dir}/cert_{certificate_id}.png"
-        image.save(cert_path)
+        self._ready_status_cache.clear()
+        return {'success': True, 'dry_run': dry_run, 'migrated': migrated, 'missing_files': missing}
+    
+    def prune_legacy_files(self, dry_run=False, batch_size=500):
+        """Delete flat cert_<id>.png / qr_<id>.png files whose certificate is in sharded storage.
+        
+        Run once every server has been restarted (or its status cache has
+        expired) after migrate_storage; files of unmigrated rows are kept.
+        """
+        legacy = {}
+        for directory, prefix in ((self.certificates_dir, 'cert_'), (self.static_dir, 'qr_')):
+            for entry in os.scandir(directory):
+                if entry.is_file() and entry.name.startswith(prefix) and entry.name.endswith('.png'):
+                    legacy.setdefault(entry.name[len(prefix):-len('.png')], []).append(entry.path)
         
-        return cert_path
+        certificate_ids = sorted(legacy)
+        removed = 0
+        kept = 0
+        for start in range(0, len(certificate_ids), batch_size):
+            batch = certificate_ids[start:start + batch_size]
+            placeholders = ','.join('?' * len(batch))
+            with self.db.connection() as conn:
+                migrated = {row[0] for row in conn.execute(f'''
+                    SELECT certificate_id FROM certificates
+                    WHERE certificate_id IN ({placeholders}) AND image_hash IS NOT NULL AND qr_hash IS NOT NULL
+                ''', batch)}
+            for certificate_id in batch:
+                if certificate_id not in migrated:
+                    kept += len(legacy[certificate_id])
+                    continue
+                for path in legacy[certificate_id]:
+                    if not dry_run:
+                        os.remove(path)
+                    removed += 1
+        
+        return {'success': True, 'dry_run': dry_run, 'removed': removed, 'kept': kept}
+    
+    def render_queue_depth(self):
+        """Number of renders submitted by this process that have not finished"""
+        with self._jobs_lock:
+            return len(self._jobs)
     
     def verify_certificate(self, certificate_id):
         """Verify certificate by ID"""
+        cached = self._verify_cache.get(certificate_id)
+        if cached is not None:
+            return dict(cached)
+        
+        may_exist = self._may_exist(certificate_id)
+        if may_exist is False:
+            with self._known_ids_lock:
+                self.verify_stats['filter_rejections'] += 1
+            return {'valid': False, 'message': 'Certificate not found'}
+        
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
@@ -195,8 +622,15 @@ class CertificateGenerator:
         result = cursor.fetchone()
         conn.close()
         
+        with self._known_ids_lock:
+            self.verify_stats['db_lookups'] += 1
+            if may_exist is None:
+                self.verify_stats['unfiltered'] += 1
+            elif not result:
+                self.verify_stats['false_positives'] += 1
+        
         if result:
-            return {
+            verification = {
                 'valid': True,
                 'certificate_id': result[0],
                 'issued_at': result[1],
@@ -204,16 +638,142 @@ class CertificateGenerator:
                 'course_name': result[3],
                 'verification_url': result[4]
             }
+            self._verify_cache.set(certificate_id, verification)
+            return dict(verification)
         else:
             return {'valid': False, 'message': 'Certificate not found'}
     
+    def warm_verification_filter(self):
+        """Build the certificate ID filter from the certificates table.
+        
+        The scan runs without holding the filter lock, so concurrent lookups
+        keep going to the database (or the previous filter) until it is swapped in.
+        """
+        with self._known_ids_lock:
+            if self._known_ids_building:
+                return False
+            self._known_ids_building = True
+        
+        try:
+            with self.db.connection() as conn:
+                count, max_row = conn.execute('SELECT COUNT(*), COALESCE(MAX(id), 0) FROM certificates').fetchone()
+                known_ids = BloomFilter(capacity=max(100000, count * 2))
+                for (certificate_id,) in conn.execute('SELECT certificate_id FROM certificates WHERE id <= ?', (max_row,)):
+                    known_ids.add(certificate_id)
+        except Exception:
+            with self._known_ids_lock:
+                self._known_ids_building = False
+            raise
+        
+        with self._known_ids_lock:
+            self._known_ids = known_ids
+            self._known_ids_max_row = max_row
+            # Rows past max_row (issued during the scan) are added by the next sync
+            self._known_ids_synced_at = 0.0
+            self._known_ids_building = False
+        return True
+    
+    def start_filter_build(self):
+        """Build the verification filter on a background thread (no-op if one is running)"""
+        thread = threading.Thread(target=self.warm_verification_filter, name='certificate-filter', daemon=True)
+        thread.start()
+        return thread
+    
+    def _sync_known_ids(self, known_ids, after):
+        """Add rows issued after row id `after` to known_ids.
+        
+        The query runs without the filter lock; the rows are applied only if
+        known_ids is still the live filter (a rebuild may have replaced it).
+        """
+        try:
+            with self.db.connection() as conn:
+                rows = conn.execute('''
+                    SELECT id, certificate_id FROM certificates WHERE id > ? ORDER BY id
+                ''', (after,)).fetchall()
+        finally:
+            with self._known_ids_lock:
+                self._known_ids_syncing = False
+        
+        with self._known_ids_lock:
+            if self._known_ids is not known_ids:
+                return
+            for row_id, certificate_id in rows:
+                known_ids.add(certificate_id)
+                self._known_ids_max_row = row_id
+            self._known_ids_synced_at = time.monotonic()
+            rebuild = known_ids.is_full and not self._known_ids_building
+        if rebuild:
+            # Still exact on misses, but its false-positive rate climbs; resize in the background
+            self.start_filter_build()
+    
+    def _may_exist(self, certificate_id):
+        """Bloom filter check: False means the ID was definitely never issued,
+        None that the filter is not built yet and the database must be asked
+        """
+        with self._known_ids_lock:
+            known_ids = self._known_ids
+            if known_ids is None:
+                return None
+            if certificate_id in known_ids:
+                return True
+            if time.monotonic() - self._known_ids_synced_at < self.filter_sync_interval:
+                return False
+            if self._known_ids_syncing:
+                # Another lookup is catching the filter up; ask the database meanwhile
+                return None
+            self._known_ids_syncing = True
+            after = self._known_ids_max_row
+        
+        self._sync_known_ids(known_ids, after)
+        with self._known_ids_lock:
+            return certificate_id in known_ids
+    
+    def _remember_issued(self, certificate_ids):
+        """Add certificate IDs issued by this process to the filter immediately"""
+        with self._known_ids_lock:
+            if self._known_ids is not None:
+                for certificate_id in certificate_ids:
+                    self._known_ids.add(certificate_id)
+    
+    def verification_stats(self):
+        """Verification cache and filter counters"""
+        with self._known_ids_lock:
+            stats = dict(self.verify_stats)
+            stats['filter'] = self._known_ids.stats() if self._known_ids is not None else None
+        stats['cache'] = self._verify_cache.stats()
+        return stats
+    
+    def get_certificates_page(self, user_id, limit, after=None):
+        """Newest-first page of a user's certificates; returns (certificates, next_cursor)"""
+        with self.db.connection() as conn:
+            rows, next_cursor = fetch_page(conn.cursor(), '''
+                SELECT c.certificate_id, co.course_name, c.issued_at, c.verification_url, c.status,
+                       c.issued_at, c.id
+                FROM certificates c
+                JOIN courses co ON c.course_id = co.id
+                WHERE c.user_id = ? {keyset}
+                ORDER BY c.issued_at DESC, c.id DESC
+                LIMIT ?
+            ''', (user_id,), 'c.issued_at', 'c.id', limit, after)
+        
+        certificates = []
+        for row in rows:
+            certificates.append({
+                'certificate_id': row[0],
+                'course_name': row[1],
+                'issued_at': row[2],
+                'verification_url': row[3],
+                'status': row[4]
+            })
+        return certificates, next_cursor
+    
     def get_user_certificates(self, user_id):
         """Get all certificates for a user"""
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT c.certificate_id, co.course_name, c.issued_at, c.verification_url
+            SELECT c.certificate_id, co.course_name, c.issued_at, c.verification_url, c.status
             FROM certificates c
             JOIN courses co ON c.course_id = co.id
             WHERE c.user_id = ?
@@ -226,7 +786,8 @@ class CertificateGenerator:
                 'certificate_id': row[0],
                 'course_name': row[1],
                 'issued_at': row[2],
-                'verification_url': row[3]
+                'verification_url': row[3],
+                'status': row[4]
             })
         
         conn.close()
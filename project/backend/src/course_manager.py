@@ -1,5 +1,8 @@
-from datetime import datetime
+from datetime import datetime, timezone
+import json
 import sqlite3
+from pagination import fetch_page
+from search import BM25_WEIGHTS, DEFAULT_RESULTS, match_expression
 
 class CourseManager:
     def __init__(self, database):
@@ -29,6 +32,65 @@ class CourseManager:
         conn.close()
         return courses
     
+    def search_catalog(self, query, limit=DEFAULT_RESULTS, prefix=True, kinds=('courses', 'skillsnaps')):
+        """Full-text search over active courses and their skillsnaps, best bm25 match first.
+        
+        Every match is ranked; FTS5 keeps only the best `limit` while sorting.
+        """
+        expression = match_expression(query, prefix)
+        results = {kind: [] for kind in kinds}
+        if expression is None:
+            return results
+        
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            
+            if 'courses' in kinds:
+                cursor.execute(f'''
+                    SELECT c.id, c.course_name, c.description, c.difficulty_level, c.estimated_duration
+                    FROM courses_fts
+                    JOIN courses c ON c.id = courses_fts.rowid
+                    WHERE courses_fts MATCH ? AND c.is_active = 1
+                    ORDER BY bm25(courses_fts, {BM25_WEIGHTS['courses_fts']})
+                    LIMIT ?
+                ''', (expression, limit))
+                results['courses'] = [{
+                    'id': row[0],
+                    'name': row[1],
+                    'description': row[2],
+                    'difficulty': row[3],
+                    'duration': row[4]
+                } for row in cursor.fetchall()]
+            
+            if 'skillsnaps' in kinds:
+                cursor.execute(f'''
+                    SELECT s.id, s.course_id, c.course_name, s.title, s.category, s.duration_minutes,
+                           snippet(skillsnaps_fts, -1, '', '', '…', 12)
+                    FROM skillsnaps_fts
+                    JOIN skillsnaps s ON s.id = skillsnaps_fts.rowid
+                    JOIN courses c ON c.id = s.course_id
+                    WHERE skillsnaps_fts MATCH ? AND c.is_active = 1
+                    ORDER BY bm25(skillsnaps_fts, {BM25_WEIGHTS['skillsnaps_fts']})
+                    LIMIT ?
+                ''', (expression, limit))
+                results['skillsnaps'] = [{
+                    'id': row[0],
+                    'course_id': row[1],
+                    'course_name': row[2],
+                    'title': row[3],
+                    'category': row[4],
+                    'duration': row[5],
+                    'snippet': row[6]
+                } for row in cursor.fetchall()]
+        
+        return results
+    
+    def get_catalog_version(self):
+        """Get (version, updated_at) of the course catalog"""
+        with self.db.connection() as conn:
+            row = conn.execute('SELECT version, updated_at FROM catalog_version WHERE id = 1').fetchone()
+        return (row[0], row[1]) if row else (0, None)
+    
     def get_course_skillsnaps(self, course_id, user_id=None):
         """Get all skillsnaps for a course with user progress"""
         conn = self.db.get_connection()
@@ -68,13 +130,74 @@ class CourseManager:
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
+        enrollments = self._fetch_enrollments(cursor, user_id)
+        
+        conn.close()
+        return enrollments
+    
+    def get_enrollments_page(self, user_id, limit, after=None):
+        """Newest-first page of enrollments; returns (enrollments, next_cursor)"""
+        with self.db.connection() as conn:
+            rows, next_cursor = fetch_page(conn.cursor(), '''
+                SELECT c.id, c.course_name, c.description, c.difficulty_level,
+                       e.enrolled_at, e.progress_percentage, e.completed_at,
+                       e.enrolled_at, e.id
+                FROM enrollments e
+                JOIN courses c ON e.course_id = c.id
+                WHERE e.user_id = ? {keyset}
+                ORDER BY e.enrolled_at DESC, e.id DESC
+                LIMIT ?
+            ''', (user_id,), 'e.enrolled_at', 'e.id', limit, after)
+        
+        enrollments = []
+        for row in rows:
+            enrollments.append({
+                'course_id': row[0],
+                'course_name': row[1],
+                'description': row[2],
+                'difficulty': row[3],
+                'enrolled_at': row[4],
+                'progress': row[5],
+                'completed_at': row[6]
+            })
+        return enrollments, next_cursor
+    
+    def get_activity_page(self, user_id, limit, after=None):
+        """Newest-first page of completed skillsnaps; returns (activity, next_cursor)"""
+        with self.db.connection() as conn:
+            rows, next_cursor = fetch_page(conn.cursor(), '''
+                SELECT s.id, s.title, s.category, s.course_id, up.completed_at,
+                       up.time_spent_minutes, up.score,
+                       up.completed_at, up.id
+                FROM user_progress up
+                JOIN skillsnaps s ON up.skillsnap_id = s.id
+                WHERE up.user_id = ? {keyset}
+                ORDER BY up.completed_at DESC, up.id DESC
+                LIMIT ?
+            ''', (user_id,), 'up.completed_at', 'up.id', limit, after)
+        
+        activity = []
+        for row in rows:
+            activity.append({
+                'skillsnap_id': row[0],
+                'title': row[1],
+                'category': row[2],
+                'course_id': row[3],
+                'completed_at': row[4],
+                'time_spent': row[5],
+                'score': row[6]
+            })
+        return activity, next_cursor
+    
+    def _fetch_enrollments(self, cursor, user_id):
+        """Run the enrollments query on an already checked-out cursor"""
         cursor.execute('''
             SELECT c.id, c.course_name, c.description, c.difficulty_level,
                    e.enrolled_at, e.progress_percentage, e.completed_at
             FROM enrollments e
             JOIN courses c ON e.course_id = c.id
             WHERE e.user_id = ?
-            ORDER BY e.enrolled_at DESC
+            ORDER BY e.enrolled_at DESC, e.id DESC
         ''', (user_id,))
         
         enrollments = []
@@ -88,8 +211,6 @@ class CourseManager:
                 'progress': row[5],
                 'completed_at': row[6]
             })
-        
-        conn.close()
         return enrollments
     
     def enroll_user(self, user_id, course_id):
@@ -113,7 +234,7 @@ class CourseManager:
             
             conn.commit()
             return {'success': True, 'message': 'Successfully enrolled'}
-            
+        
         except Exception as e:
             conn.rollback()
             return {'success': False, 'message': str(e)}
@@ -126,68 +247,259 @@ class CourseManager:
         cursor = conn.cursor()
         
         try:
-            # Check if already completed
+            # Mark as completed; the unique (user_id, skillsnap_id) index rejects repeats and
+            # the user_progress trigger updates the enrollment's progress in the same statement
             cursor.execute('''
-                SELECT id FROM user_progress WHERE user_id = ? AND skillsnap_id = ?
-            ''', (user_id, skillsnap_id))
+                INSERT OR IGNORE INTO user_progress (user_id, skillsnap_id, completed_at, time_spent_minutes, score)
+                SELECT ?, id, CURRENT_TIMESTAMP, ?, ? FROM skillsnaps WHERE id = ?
+            ''', (user_id, time_spent, score, skillsnap_id))
             
-            if cursor.fetchone():
+            if cursor.rowcount == 0:
+                cursor.execute('SELECT 1 FROM skillsnaps WHERE id = ?', (skillsnap_id,))
+                if not cursor.fetchone():
+                    return {'success': False, 'message': 'SkillSnap not found'}
                 return {'success': False, 'message': 'SkillSnap already completed'}
             
-            # Mark as completed
-            cursor.execute('''
-                INSERT INTO user_progress (user_id, skillsnap_id, completed_at, time_spent_minutes, score)
-                VALUES (?, ?, CURRENT_TIMESTAMP, ?, ?)
-            ''', (user_id, skillsnap_id, time_spent, score))
-            
-            # Update course progress
-            self._update_course_progress(cursor, user_id, skillsnap_id)
-            
             conn.commit()
             return {'success': True, 'message': 'SkillSnap marked as completed'}
+        
+        except Exception as e:
+            conn.rollback()
+            return {'success': False, 'message': str(e)}
+        finally:
+            conn.close()
+    
+    def sync_offline_progress(self, user_id, completions, max_items=500):
+        """Apply a batch of offline completions in one transaction.
+        
+        Each item is {'skillsnap_id', 'completed_at', 'time_spent', 'score'}, where
+        completed_at is the client's ISO-8601 timestamp. Items already completed
+        (in the database or earlier in the batch) are reported as duplicates;
+        enrollment progress is kept current by the user_progress trigger.
+        """
+        if not isinstance(completions, list):
+            return {'success': False, 'message': 'completions must be a list'}
+        if len(completions) > max_items:
+            return {'success': False, 'message': f'At most {max_items} completions per sync'}
+        
+        results = []
+        rows = []
+        for index, item in enumerate(completions):
+            result, row = self._parse_sync_item(index, item)
+            results.append(result)
+            if row:
+                rows.append((index, row))
+        
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            # Take the write lock before reading what is already completed, so a concurrent
+            # /complete or sync cannot insert the same row between the read and the insert
+            cursor.execute('BEGIN IMMEDIATE')
+            skillsnap_ids = sorted({row[0] for _, row in rows})
+            existing = set()
+            done = set()
+            if skillsnap_ids:
+                placeholders = ','.join('?' * len(skillsnap_ids))
+                cursor.execute(f'SELECT id FROM skillsnaps WHERE id IN ({placeholders})', skillsnap_ids)
+                existing = {row[0] for row in cursor.fetchall()}
+                cursor.execute(f'''
+                    SELECT skillsnap_id FROM user_progress
+                    WHERE user_id = ? AND skillsnap_id IN ({placeholders})
+                ''', [user_id] + skillsnap_ids)
+                done = {row[0] for row in cursor.fetchall()}
+            
+            inserts = []
+            for index, (skillsnap_id, completed_at, time_spent, score) in rows:
+                if skillsnap_id not in existing:
+                    results[index]['status'] = 'not_found'
+                elif skillsnap_id in done:
+                    results[index]['status'] = 'duplicate'
+                else:
+                    done.add(skillsnap_id)
+                    results[index]['status'] = 'completed'
+                    inserts.append((user_id, skillsnap_id, completed_at, time_spent, score))
             
+            cursor.executemany('''
+                INSERT INTO user_progress (user_id, skillsnap_id, completed_at, time_spent_minutes, score)
+                VALUES (?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?)
+            ''', inserts)
+            
+            conn.commit()
+        
         except Exception as e:
             conn.rollback()
             return {'success': False, 'message': str(e)}
         finally:
             conn.close()
+        
+        summary = {}
+        for result in results:
+            summary[result['status']] = summary.get(result['status'], 0) + 1
+        
+        return {'success': True, 'results': results, 'summary': summary}
     
-    def _update_course_progress(self, cursor, user_id, skillsnap_id):
-        """Update overall course progress percentage"""
-        # Get course_id from skillsnap
-        cursor.execute('SELECT course_id FROM skillsnaps WHERE id = ?', (skillsnap_id,))
-        course_id = cursor.fetchone()[0]
+    def _parse_sync_item(self, index, item):
+        """Validate one sync item; returns (result, row or None)"""
+        result = {'index': index, 'skillsnap_id': None, 'status': 'invalid'}
+        if not isinstance(item, dict):
+            result['message'] = 'Item must be an object'
+            return result, None
         
-        # Count total skillsnaps in course
-        cursor.execute('SELECT COUNT(*) FROM skillsnaps WHERE course_id = ?', (course_id,))
-        total_skillsnaps = cursor.fetchone()[0]
+        try:
+            skillsnap_id = int(item.get('skillsnap_id'))
+            result['skillsnap_id'] = skillsnap_id
+            time_spent = item.get('time_spent')
+            time_spent = int(time_spent) if time_spent is not None else None
+            score = item.get('score')
+            score = float(score) if score is not None else None
+        except (TypeError, ValueError):
+            result['message'] = 'Invalid skillsnap_id, time_spent or score'
+            return result, None
         
-        # Count completed skillsnaps by user
-        cursor.execute('''
-            SELECT COUNT(*) FROM user_progress up
-            JOIN skillsnaps s ON up.skillsnap_id = s.id
-            WHERE up.user_id = ? AND s.course_id = ?
-        ''', (user_id, course_id))
-        completed_skillsnaps = cursor.fetchone()[0]
+        completed_at = item.get('completed_at')
+        if completed_at is not None:
+            try:
+                parsed = datetime.fromisoformat(str(completed_at).replace('Z', '+00:00'))
+            except ValueError:
+                result['message'] = 'completed_at must be an ISO-8601 timestamp'
+                return result, None
+            if parsed.tzinfo is not None:
+                parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+            if parsed > datetime.utcnow():
+                parsed = datetime.utcnow()  # clamp clock-skewed devices
+            # Same format as SQLite's CURRENT_TIMESTAMP (UTC)
+            completed_at = parsed.strftime('%Y-%m-%d %H:%M:%S')
         
-        # Calculate progress percentage
-        progress = (completed_skillsnaps / total_skillsnaps) * 100 if total_skillsnaps > 0 else 0
+        return result, (skillsnap_id, completed_at, time_spent, score)
+    
+    def reconcile_progress(self, dry_run=False):
+        """Recompute lesson counts and enrollment progress from scratch.
         
-        # Update enrollment progress
-        cursor.execute('''
-            UPDATE enrollments 
-            SET progress_percentage = ?, 
-                completed_at = CASE WHEN ? >= 100 THEN CURRENT_TIMESTAMP ELSE NULL END
-            WHERE user_id = ? AND course_id = ?
-        ''', (progress, progress, user_id, course_id))
+        The counters are maintained incrementally by triggers; this audits them
+        against user_progress and repairs any rows that drifted.
+        """
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                SELECT c.id, c.skillsnap_count,
+                       (SELECT COUNT(*) FROM skillsnaps s WHERE s.course_id = c.id)
+                FROM courses c
+            ''')
+            courses = cursor.fetchall()
+            course_fixes = [(actual, course_id) for course_id, stored, actual in courses if stored != actual]
+            if course_fixes and not dry_run:
+                cursor.executemany('UPDATE courses SET skillsnap_count = ? WHERE id = ?', course_fixes)
+            
+            # Compare against the recomputed totals (after any course fixes above)
+            cursor.execute('''
+                WITH actual AS (
+                    SELECT up.user_id, s.course_id, COUNT(*) AS completed
+                    FROM user_progress up
+                    JOIN skillsnaps s ON up.skillsnap_id = s.id
+                    GROUP BY up.user_id, s.course_id
+                )
+                SELECT e.id, e.completed_count, COALESCE(a.completed, 0), e.progress_percentage,
+                       (SELECT COUNT(*) FROM skillsnaps s WHERE s.course_id = e.course_id)
+                FROM enrollments e
+                LEFT JOIN actual a ON a.user_id = e.user_id AND a.course_id = e.course_id
+            ''')
+            enrollments = cursor.fetchall()
+            
+            enrollment_fixes = []
+            for enrollment_id, stored, completed, progress, total in enrollments:
+                expected = min(100.0, completed * 100.0 / total) if total > 0 else 0
+                if stored != completed or abs((progress or 0) - expected) > 1e-9:
+                    enrollment_fixes.append((completed, expected, expected, enrollment_id))
+            
+            if enrollment_fixes and not dry_run:
+                cursor.executemany('''
+                    UPDATE enrollments
+                    SET completed_count = ?,
+                        progress_percentage = ?,
+                        completed_at = CASE WHEN ? >= 100 THEN COALESCE(completed_at, CURRENT_TIMESTAMP) ELSE NULL END
+                    WHERE id = ?
+                ''', enrollment_fixes)
+            
+            conn.commit()
+            return {
+                'success': True,
+                'dry_run': dry_run,
+                'courses_checked': len(courses),
+                'courses_fixed': len(course_fixes),
+                'enrollments_checked': len(enrollments),
+                'enrollments_fixed': len(enrollment_fixes)
+            }
+        
+        except Exception as e:
+            conn.rollback()
+            return {'success': False, 'message': str(e)}
+        finally:
+            conn.close()
     
-    def get_user_dashboard(self, user_id):
-        """Get user dashboard data"""
+    def get_dashboard_snapshot(self, user_id, known_version=None):
+        """Get the materialized dashboard as (version, JSON payload).
+        
+        Writes to enrollments, user_progress and certificates bump the user's
+        version through triggers; the payload is rebuilt on the first read after
+        that and stored until the next write. When `known_version` is still
+        current the payload is not loaded and (version, None) is returned.
+        """
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
+        try:
+            cursor.execute('''
+                SELECT version, built_version FROM user_dashboards WHERE user_id = ?
+            ''', (user_id,))
+            row = cursor.fetchone()
+            version, built_version = row if row else (0, None)
+            
+            if known_version is not None and known_version == version:
+                return version, None
+            
+            if built_version == version:
+                cursor.execute('SELECT payload FROM user_dashboards WHERE user_id = ?', (user_id,))
+                return version, cursor.fetchone()[0]
+            
+            payload = json.dumps(self._build_dashboard(cursor, user_id), separators=(',', ':'), sort_keys=True)
+            
+            # Store only if no write landed meanwhile; otherwise the next read rebuilds
+            if row:
+                cursor.execute('''
+                    UPDATE user_dashboards
+                    SET payload = ?, built_version = version, built_at = CURRENT_TIMESTAMP
+                    WHERE user_id = ? AND version = ?
+                ''', (payload, user_id, version))
+            else:
+                cursor.execute('''
+                    INSERT OR IGNORE INTO user_dashboards (user_id, version, built_version, payload, built_at)
+                    VALUES (?, 0, 0, ?, CURRENT_TIMESTAMP)
+                ''', (user_id, payload))
+            conn.commit()
+            return version, payload
+        
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def get_user_dashboard(self, user_id):
+        """Get user dashboard data"""
+        conn = self.db.get_connection()
+        try:
+            return self._build_dashboard(conn.cursor(), user_id)
+        finally:
+            conn.close()
+    
+    def _build_dashboard(self, cursor, user_id):
+        """Run the dashboard queries on an already checked-out cursor"""
         # Get enrollments with progress
-        enrollments = self.get_user_enrollments(user_id)
+        enrollments = self._fetch_enrollments(cursor, user_id)
         
         # Get recent activity
         cursor.execute('''
@@ -195,7 +507,7 @@ class CourseManager:
             FROM user_progress up
             JOIN skillsnaps s ON up.skillsnap_id = s.id
             WHERE up.user_id = ?
-            ORDER BY up.completed_at DESC
+            ORDER BY up.completed_at DESC, up.id DESC
             LIMIT 5
         ''', (user_id,))
         
@@ -224,8 +536,6 @@ class CourseManager:
                 'issued_at': row[2]
             })
         
-        conn.close()
-        
         return {
             'enrollments': enrollments,
             'recent_activity': recent_activity,
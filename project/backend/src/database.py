@@ -1,132 +1,348 @@
 import sqlite3
 import os
+import itertools
+import queue
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
 import bcrypt
+from migrations import MIGRATIONS, run_migrations
+
+# Applied to every new connection. journal_mode is persistent in the file and is
+# set once by the pool; these are per-connection and must be re-applied.
+DEFAULT_PRAGMAS = {
+    'busy_timeout': 5000,        # wait up to 5s on a locked database instead of failing
+    'synchronous': 'NORMAL',     # safe with WAL, avoids an fsync per commit
+    'cache_size': -16000,        # 16 MB page cache per connection
+    'mmap_size': 268435456,      # 256 MB memory-mapped reads
+    'temp_store': 'MEMORY',
+}
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes available in time"""
+    pass
+
+class QueryStats:
+    """Statement counters shared by every connection of a pool"""
+    def __init__(self, tracer=None):
+        self._lock = threading.Lock()
+        self.statements = 0
+        self.seconds = 0.0
+        self.tracer = tracer  # sql_trace.QueryTracer when tracing is enabled
+    
+    def record(self, sql, elapsed):
+        """Count one statement (sql is None for time spent fetching its rows)"""
+        with self._lock:
+            if sql is not None:
+                self.statements += 1
+            self.seconds += elapsed
+    
+    def snapshot(self):
+        with self._lock:
+            return self.statements, self.seconds
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement and the time spent executing and fetching it"""
+    _traced = None
+    
+    def _timed(self, sql, parameters, call, *args):
+        started = time.perf_counter()
+        try:
+            return call(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            stats = getattr(self.connection, 'query_stats', None)
+            if stats is not None:
+                stats.record(sql, elapsed)
+                if stats.tracer is not None:
+                    if sql is not None:
+                        self._traced = stats.tracer.statement(self.connection, sql, parameters)
+                    if self._traced is not None:
+                        self._traced.add(elapsed)
+    
+    def execute(self, sql, parameters=()):
+        return self._timed(sql, parameters, super().execute, sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        # The tracer explains the statement with the batch's first row
+        rows = iter(seq_of_parameters)
+        first = next(rows, None)
+        if first is not None:
+            rows = itertools.chain((first,), rows)
+        return self._timed(sql, first, super().executemany, sql, rows)
+    
+    def executescript(self, sql_script):
+        return self._timed(sql_script, None, super().executescript, sql_script)
+    
+    def fetchone(self):
+        return self._timed(None, None, super().fetchone)
+    
+    def fetchmany(self, size=None):
+        return self._timed(None, None, super().fetchmany, self.arraysize if size is None else size)
+    
+    def fetchall(self):
+        return self._timed(None, None, super().fetchall)
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors, including the execute() shortcuts, are InstrumentedCursors"""
+    query_stats = None
+    
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+    
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+class PooledConnection:
+    """sqlite3 connection proxy whose close() hands the connection back to the pool"""
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+    
+    def __getattr__(self, name):
+        if self.__dict__.get('_conn') is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a connection returned to the pool")
+        return getattr(self._conn, name)
+    
+    def close(self):
+        """Return the connection to the pool (safe to call more than once)"""
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        self._pool.release(conn)
+    
+    def __del__(self):
+        # Guard against callers that forget to close on an error path
+        if getattr(self, '_conn', None) is not None:
+            self.close()
+
+_pools = weakref.WeakSet()
+
+def _reset_pools_after_fork():
+    for pool in list(_pools):
+        pool._reset_after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections in WAL mode with tuned pragmas.
+    
+    SQLite connections must not cross a fork, so a pool used in a forked
+    child (a preloading server's worker) drops the connections it inherited
+    and starts empty.
+    """
+    def __init__(self, db_path, max_size=8, timeout=30.0, pragmas=None):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        
+        self._idle = queue.LifoQueue()  # LIFO keeps the warmest connections in use
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._wal_checked = False
+        self._pid = os.getpid()
+        self._inherited = []  # parent's connections; kept referenced so they are never closed here
+        self.query_stats = QueryStats()
+        _pools.add(self)
+        
+        self._created = 0
+        self._discarded = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+    
+    def _connect(self):
+        """Open and configure a new connection"""
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.pragmas.get('busy_timeout', 5000) / 1000.0,
+            check_same_thread=False,
+            factory=InstrumentedConnection
+        )
+        conn.query_stats = self.query_stats
+        
+        with self._lock:
+            set_wal = not self._wal_checked
+            self._wal_checked = True
+        if set_wal:
+            conn.execute("PRAGMA journal_mode=WAL")
+        
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        
+        with self._lock:
+            self._created += 1
+        return conn
+    
+    def _reset_after_fork(self):
+        """Start over with an empty pool in a freshly forked child (runs single-threaded)"""
+        while True:
+            try:
+                self._inherited.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        self._created = self._discarded = self._in_use = 0
+        self._checkouts = self._timeouts = 0
+        self._wait_total = self._wait_max = 0.0
+        self.query_stats = QueryStats(self.query_stats.tracer)
+        self._pid = os.getpid()
+    
+    def acquire(self):
+        """Check out a connection, waiting up to `timeout` seconds for a free slot"""
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._timeouts += 1
+            raise PoolTimeout(f"No database connection available after {self.timeout}s")
+        
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+        
+        waited = time.perf_counter() - started
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        
+        return PooledConnection(self, conn)
+    
+    def release(self, conn):
+        """Return a connection, discarding it if it can no longer be reset"""
+        if self._pid != os.getpid():
+            self._inherited.append(conn)  # checked out before a fork; the parent still owns it
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()  # never leak half-finished work to the next borrower
+            self._idle.put(conn)
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._discarded += 1
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+    
+    def close_all(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._discarded += 1
+    
+    def stats(self):
+        """Snapshot of pool usage and checkout wait times"""
+        statements, query_seconds = self.query_stats.snapshot()
+        with self._lock:
+            checkouts = self._checkouts
+            return {
+                'max_size': self.max_size,
+                'open': self._created - self._discarded,
+                'in_use': self._in_use,
+                'idle': self._idle.qsize(),
+                'created': self._created,
+                'checkouts': checkouts,
+                'timeouts': self._timeouts,
+                'wait_avg_ms': round(self._wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+                'wait_max_ms': round(self._wait_max * 1000, 3),
+                'queries': statements,
+                'query_time_ms': round(query_seconds * 1000, 3)
+            }
 
 class Database:
-    def __init__(self, db_path="data/skillbridge.db"):
+    def __init__(self, db_path="data/skillbridge.db", pool_size=8, pool_timeout=30.0, initialize=True):
         self.db_path = db_path
-        self.init_database()
+        self.pool = ConnectionPool(db_path, max_size=pool_size, timeout=pool_timeout)
+        if initialize:
+            self.init_database()
     
     def get_connection(self):
-        """Get database connection"""
-        return sqlite3.connect(self.db_path)
+        """Check a connection out of the pool; close() returns it"""
+        return self.pool.acquire()
+    
+    @contextmanager
+    def connection(self):
+        """Context manager that checks out a connection and always returns it"""
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+    
+    def pool_stats(self):
+        """Get connection pool statistics"""
+        return self.pool.stats()
     
     def init_database(self):
-        """Initialize database with all required tables"""
+        """Bring the schema up to date and load sample data"""
         conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                name TEXT NOT NULL,
-                email TEXT,
-                location TEXT,
-                language_preference TEXT DEFAULT 'English',
-                aptitude_level TEXT,
-                interests TEXT,
-                time_commitment TEXT,
-                goals TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_login TIMESTAMP
-            )
-        ''')
-        
-        # Courses table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS courses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                course_name TEXT UNIQUE NOT NULL,
-                description TEXT,
-                difficulty_level TEXT,
-                estimated_duration INTEGER,
-                is_active BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # SkillSnaps (lessons) table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS skillsnaps (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                course_id INTEGER,
-                title TEXT NOT NULL,
-                description TEXT,
-                content TEXT,
-                duration_minutes INTEGER,
-                difficulty_level TEXT,
-                category TEXT,
-                order_index INTEGER,
-                is_offline_available BOOLEAN DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (course_id) REFERENCES courses (id)
-            )
-        ''')
-        
-        # User enrollments
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS enrollments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                course_id INTEGER,
-                enrolled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                completed_at TIMESTAMP,
-                progress_percentage REAL DEFAULT 0,
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                FOREIGN KEY (course_id) REFERENCES courses (id)
-            )
-        ''')
-        
-        # User progress tracking
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_progress (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                skillsnap_id INTEGER,
-                completed_at TIMESTAMP,
-                time_spent_minutes INTEGER,
-                score REAL,
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                FOREIGN KEY (skillsnap_id) REFERENCES skillsnaps (id)
-            )
-        ''')
-        
-        # Certificates table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS certificates (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                course_id INTEGER,
-                certificate_id TEXT UNIQUE NOT NULL,
-                issued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                qr_code_path TEXT,
-                verification_url TEXT,
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                FOREIGN KEY (course_id) REFERENCES courses (id)
-            )
-        ''')
-        
-        # Quiz responses for onboarding
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS quiz_responses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                question_id INTEGER,
-                response TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        try:
+            applied = run_migrations(conn)
+        finally:
+            conn.close()
         
         # Insert sample data
         self.insert_sample_data()
+        return applied
+    
+    def enable_tracing(self, slow_ms=100.0, repeat_threshold=5):
+        """Trace every statement from now on; returns the QueryTracer (see sql_trace)"""
+        from sql_trace import QueryTracer
+        
+        tracer = QueryTracer(slow_ms=slow_ms, repeat_threshold=repeat_threshold)
+        self.pool.query_stats.tracer = tracer
+        return tracer
+    
+    @property
+    def tracer(self):
+        return self.pool.query_stats.tracer
+    
+    def ping(self):
+        """Round-trip a trivial query; returns latency in milliseconds or raises sqlite3.Error"""
+        started = time.perf_counter()
+        with self.connection() as conn:
+            conn.execute("SELECT 1").fetchone()
+        return round((time.perf_counter() - started) * 1000, 3)
+    
+    def schema_version(self):
+        """Get the schema version recorded in PRAGMA user_version"""
+        with self.connection() as conn:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+    
+    def pending_migrations(self):
+        """Number of migrations not yet applied to the database file"""
+        return max(0, len(MIGRATIONS) - self.schema_version())
     
     def insert_sample_data(self):
         """Insert sample courses and skillsnaps"""
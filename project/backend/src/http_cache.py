@@ -0,0 +1,170 @@
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from flask import current_app, request, send_file
+
+def etag_matches(etag):
+    """True when the request's If-None-Match already names this ETag"""
+    return request.if_none_match.contains(etag)
+
+def not_modified(etag, cache_control='no-cache'):
+    """Empty 304 response for a client that already holds the current representation"""
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+def cached_json_response(body, etag, cache_control='no-cache', last_modified=None):
+    """Response for pre-serialized JSON with validators, answering conditional GETs with 304"""
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response.make_conditional(request)
+
+class SerializedResponse:
+    """JSON body serialized once, with its validators"""
+    def __init__(self, data, last_modified=None):
+        self.body = json.dumps(data, separators=(',', ':'), sort_keys=True).encode('utf-8')
+        self.etag = hashlib.sha1(self.body).hexdigest()[:20]
+        self.last_modified = last_modified
+
+def parse_sqlite_timestamp(value):
+    """Parse SQLite's CURRENT_TIMESTAMP format (UTC) into an aware datetime"""
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+class FileServer:
+    """Serves generated files that never change once written (certificates, QR codes).
+    
+    Responses carry a strong ETag, Last-Modified and a year-long immutable
+    Cache-Control, and honour If-None-Match and Range. Small files are kept
+    in a byte-bounded LRU so hot downloads skip the filesystem. With
+    `offload` set to 'x-sendfile' or 'x-accel' the body is left to the
+    front proxy (Apache mod_xsendfile / nginx internal location).
+    """
+    def __init__(self, max_cache_bytes=32 * 1024 * 1024, max_file_bytes=1024 * 1024,
+                 offload=None, accel_prefix='/protected/', accel_root=None):
+        self.max_cache_bytes = max_cache_bytes
+        self.max_file_bytes = max_file_bytes
+        self.offload = offload or os.environ.get('SKILLBRIDGE_FILE_OFFLOAD') or None
+        self.accel_prefix = os.environ.get('SKILLBRIDGE_X_ACCEL_PREFIX', accel_prefix)
+        self.accel_root = os.path.abspath(accel_root or os.environ.get('SKILLBRIDGE_X_ACCEL_ROOT', '.'))
+        
+        self._cache = OrderedDict()  # absolute path -> (data, etag, mtime)
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def _stat(self, path):
+        """Return (size, mtime, etag) or None if the file is missing"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        etag = hashlib.sha1(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8')).hexdigest()[:20]
+        return stat.st_size, stat.st_mtime, etag
+    
+    def _load(self, path):
+        """Get (data, etag, mtime) from the LRU, reading small files on a miss"""
+        with self._lock:
+            entry = self._cache.get(path)
+            if entry is not None:
+                self._cache.move_to_end(path)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        
+        info = self._stat(path)
+        if info is None:
+            return None
+        size, mtime, etag = info
+        if size > self.max_file_bytes:
+            return None, etag, mtime
+        
+        with open(path, 'rb') as f:
+            data = f.read()
+        entry = (data, etag, mtime)
+        
+        with self._lock:
+            if path not in self._cache:
+                self._cache[path] = entry
+                self._cache_bytes += len(data)
+                while self._cache_bytes > self.max_cache_bytes and self._cache:
+                    _, (evicted, _, _) = self._cache.popitem(last=False)
+                    self._cache_bytes -= len(evicted)
+        return entry
+    
+    def send(self, path, download_name=None, as_attachment=False):
+        """Build the response for a file, or None if it does not exist"""
+        path = os.path.abspath(path)
+        
+        if self.offload:
+            info = self._stat(path)
+            if info is None:
+                return None
+            return self._offloaded(path, info, download_name, as_attachment)
+        
+        entry = self._load(path)
+        if entry is None:
+            return None
+        data, etag, mtime = entry
+        last_modified = datetime.fromtimestamp(mtime, timezone.utc)
+        
+        if data is None:
+            # Too big for the memory cache; let Flask stream it with the same validators
+            response = send_file(path, as_attachment=as_attachment, download_name=download_name,
+                                 conditional=True, etag=etag, last_modified=last_modified)
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+            return response
+        
+        mimetype = mimetypes.guess_type(download_name or path)[0] or 'application/octet-stream'
+        response = current_app.response_class(data, mimetype=mimetype)
+        self._decorate(response, etag, last_modified, download_name, as_attachment)
+        return response.make_conditional(request, accept_ranges=True, complete_length=len(data))
+    
+    def _offloaded(self, path, info, download_name, as_attachment):
+        size, mtime, etag = info
+        last_modified = datetime.fromtimestamp(mtime, timezone.utc)
+        
+        if etag_matches(etag):
+            return not_modified(etag, IMMUTABLE_CACHE_CONTROL)
+        
+        mimetype = mimetypes.guess_type(download_name or path)[0] or 'application/octet-stream'
+        response = current_app.response_class(mimetype=mimetype)
+        if self.offload == 'x-accel':
+            relative = os.path.relpath(path, self.accel_root).replace(os.sep, '/')
+            response.headers['X-Accel-Redirect'] = self.accel_prefix.rstrip('/') + '/' + relative
+        else:
+            response.headers['X-Sendfile'] = path
+        self._decorate(response, etag, last_modified, download_name, as_attachment)
+        return response
+    
+    def _decorate(self, response, etag, last_modified, download_name, as_attachment):
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response.headers['Accept-Ranges'] = 'bytes'
+        if as_attachment:
+            response.headers.set('Content-Disposition', 'attachment', filename=download_name or 'download')
+    
+    def stats(self):
+        """Snapshot of the hot-file cache"""
+        with self._lock:
+            return {
+                'offload': self.offload,
+                'files': len(self._cache),
+                'bytes': self._cache_bytes,
+                'max_bytes': self.max_cache_bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -0,0 +1,176 @@
+import bisect
+import threading
+import time
+from flask import g, request
+
+# Request latency buckets (seconds) and response size buckets (bytes)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class Metric:
+    """A named family of samples keyed by label values"""
+    kind = 'untyped'
+    
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+    
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self.header()
+        for label_values, value in items:
+            lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}')
+        return lines
+
+class Counter(Metric):
+    kind = 'counter'
+    
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+class Gauge(Metric):
+    kind = 'gauge'
+    
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+    
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+    
+    def set(self, *label_values, value):
+        with self._lock:
+            self._values[label_values] = value
+
+class Histogram(Metric):
+    kind = 'histogram'
+    
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, *label_values, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+    
+    def render(self):
+        with self._lock:
+            items = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._values.items())
+        lines = self.header()
+        for label_values, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels + ('le',), label_values + (_format_value(bound),))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+class MetricsRegistry:
+    """Metrics for one process, rendered in the Prometheus text format.
+    
+    Values other components already track (pool counters, queue depths) are
+    read at scrape time by collectors: callables returning
+    (name, kind, documentation, value) tuples.
+    """
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+    
+    def counter(self, name, documentation, labels=()):
+        return self._add(Counter(name, documentation, labels))
+    
+    def gauge(self, name, documentation, labels=()):
+        return self._add(Gauge(name, documentation, labels))
+    
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, documentation, labels, buckets))
+    
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+    
+    def register_collector(self, collect):
+        """Add a scrape-time collector; registering the same one again is a no-op"""
+        if collect not in self._collectors:
+            self._collectors.append(collect)
+    
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            for name, kind, documentation, value in collect():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                lines.append(f'{name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+class RequestMetrics:
+    """Flask hooks recording per-route latency, status codes, response sizes and in-flight requests"""
+    def __init__(self, registry, prefix='skillbridge'):
+        self.requests = registry.counter(
+            f'{prefix}_http_requests_total', 'HTTP requests by route and status', ('method', 'route', 'status')
+        )
+        self.latency = registry.histogram(
+            f'{prefix}_http_request_duration_seconds', 'HTTP request latency', ('method', 'route')
+        )
+        self.response_size = registry.histogram(
+            f'{prefix}_http_response_size_bytes', 'HTTP response body size', ('method', 'route'), SIZE_BUCKETS
+        )
+        self.in_flight = registry.gauge(f'{prefix}_http_requests_in_flight', 'HTTP requests being served')
+    
+    def init_app(self, app):
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.teardown_request(self._teardown)
+    
+    def _before(self):
+        g._metrics_started = time.perf_counter()
+        self.in_flight.inc()
+    
+    def _after(self, response):
+        started = g.get('_metrics_started')
+        if started is not None:
+            # The URL rule keeps label cardinality bounded (/api/certificates/<certificate_id>/status)
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            method = request.method
+            self.latency.observe(method, route, value=time.perf_counter() - started)
+            self.requests.inc(method, route, str(response.status_code))
+            if response.content_length is not None:
+                self.response_size.observe(method, route, value=response.content_length)
+        return response
+    
+    def _teardown(self, error=None):
+        if g.pop('_metrics_started', None) is not None:
+            self.in_flight.dec()
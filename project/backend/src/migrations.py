@@ -0,0 +1,492 @@
+"""
+Versioned schema migrations
+
+Each migration runs once, in order, inside its own transaction; the number of
+migrations applied is stored in PRAGMA user_version. Add new schema changes by
+appending a function to MIGRATIONS - never edit one that has shipped.
+"""
+
+def _add_missing_columns(cursor, table, columns):
+    """Add columns that an older copy of a table does not have yet"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, definition in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+def _dedupe(cursor, table, columns, keep='MIN'):
+    """Delete duplicate rows so a UNIQUE index can be built, keeping one id per key"""
+    cursor.execute(f'''
+        DELETE FROM {table} WHERE id NOT IN (
+            SELECT {keep}(id) FROM {table} GROUP BY {columns}
+        )
+    ''')
+
+def initial_schema(cursor):
+    """Base tables (idempotent, so databases created before migrations adopt it)"""
+    # Users table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            name TEXT NOT NULL,
+            email TEXT,
+            location TEXT,
+            language_preference TEXT DEFAULT 'English',
+            aptitude_level TEXT,
+            interests TEXT,
+            time_commitment TEXT,
+            goals TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_login TIMESTAMP
+        )
+    ''')
+    
+    # Courses table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS courses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            course_name TEXT UNIQUE NOT NULL,
+            description TEXT,
+            difficulty_level TEXT,
+            estimated_duration INTEGER,
+            is_active BOOLEAN DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # SkillSnaps (lessons) table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS skillsnaps (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            course_id INTEGER,
+            title TEXT NOT NULL,
+            description TEXT,
+            content TEXT,
+            duration_minutes INTEGER,
+            difficulty_level TEXT,
+            category TEXT,
+            order_index INTEGER,
+            is_offline_available BOOLEAN DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (course_id) REFERENCES courses (id)
+        )
+    ''')
+    
+    # User enrollments
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS enrollments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            course_id INTEGER,
+            enrolled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP,
+            progress_percentage REAL DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (course_id) REFERENCES courses (id)
+        )
+    ''')
+    
+    # User progress tracking
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_progress (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            skillsnap_id INTEGER,
+            completed_at TIMESTAMP,
+            time_spent_minutes INTEGER,
+            score REAL,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (skillsnap_id) REFERENCES skillsnaps (id)
+        )
+    ''')
+    
+    # Certificates table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS certificates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            course_id INTEGER,
+            certificate_id TEXT UNIQUE NOT NULL,
+            issued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            qr_code_path TEXT,
+            verification_url TEXT,
+            image_path TEXT,
+            status TEXT DEFAULT 'ready',
+            rendered_at TIMESTAMP,
+            error TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (course_id) REFERENCES courses (id)
+        )
+    ''')
+    
+    # Render-job columns for certificate tables created before async rendering
+    _add_missing_columns(cursor, 'certificates', {
+        'image_path': 'TEXT',
+        'status': "TEXT DEFAULT 'ready'",
+        'rendered_at': 'TIMESTAMP',
+        'error': 'TEXT'
+    })
+    
+    # Quiz responses for onboarding
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS quiz_responses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            question_id INTEGER,
+            response TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+
+def indexes_and_constraints(cursor):
+    """Secondary indexes for the hot lookups plus uniqueness the code relied on checking by hand"""
+    # One enrollment per user and course
+    _dedupe(cursor, 'enrollments', 'user_id, course_id')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_enrollments_user_course
+        ON enrollments (user_id, course_id)
+    ''')
+    # Cohort lookups for batch certificate issuance
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_enrollments_course_completed
+        ON enrollments (course_id, completed_at)
+    ''')
+    
+    # A skillsnap is completed once; keep the first completion
+    _dedupe(cursor, 'user_progress', 'user_id, skillsnap_id')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_user_progress_user_skillsnap
+        ON user_progress (user_id, skillsnap_id)
+    ''')
+    # Recent activity for the dashboard
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_progress_user_completed
+        ON user_progress (user_id, completed_at)
+    ''')
+    
+    # Certificates are looked up per user and per (user, course). Not UNIQUE:
+    # deleting an issued certificate to dedupe would break its verification link.
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_certificates_user_course
+        ON certificates (user_id, course_id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_certificates_pending
+        ON certificates (status) WHERE status = 'pending'
+    ''')
+    
+    # One answer per question; keep the latest
+    _dedupe(cursor, 'quiz_responses', 'user_id, question_id', keep='MAX')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_quiz_responses_user_question
+        ON quiz_responses (user_id, question_id)
+    ''')
+    
+    # Ordered lesson lists per course
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_skillsnaps_course_order
+        ON skillsnaps (course_id, order_index)
+    ''')
+
+# Progress percentage for an enrollment row given its completed count; used by
+# the progress triggers and by CourseManager.reconcile_progress
+PROGRESS_SQL = '''
+    CASE WHEN {total} > 0 THEN MIN(100.0, {completed} * 100.0 / {total}) ELSE 0 END
+'''
+COMPLETED_AT_SQL = '''
+    CASE WHEN {total} > 0 AND {completed} >= {total}
+         THEN COALESCE(completed_at, CURRENT_TIMESTAMP) ELSE NULL END
+'''
+
+def incremental_progress(cursor):
+    """Denormalized lesson counts per course and completion counters per enrollment"""
+    _add_missing_columns(cursor, 'courses', {'skillsnap_count': 'INTEGER NOT NULL DEFAULT 0'})
+    _add_missing_columns(cursor, 'enrollments', {'completed_count': 'INTEGER NOT NULL DEFAULT 0'})
+    
+    # Backfill from the existing rows
+    cursor.execute('''
+        UPDATE courses SET skillsnap_count = (
+            SELECT COUNT(*) FROM skillsnaps s WHERE s.course_id = courses.id
+        )
+    ''')
+    cursor.execute('''
+        UPDATE enrollments SET completed_count = (
+            SELECT COUNT(*) FROM user_progress up
+            JOIN skillsnaps s ON up.skillsnap_id = s.id
+            WHERE up.user_id = enrollments.user_id AND s.course_id = enrollments.course_id
+        )
+    ''')
+    
+    # Keep courses.skillsnap_count in step with the skillsnaps table
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_skillsnaps_insert_count AFTER INSERT ON skillsnaps
+        BEGIN
+            UPDATE courses SET skillsnap_count = skillsnap_count + 1 WHERE id = NEW.course_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_skillsnaps_delete_count AFTER DELETE ON skillsnaps
+        BEGIN
+            UPDATE courses SET skillsnap_count = skillsnap_count - 1 WHERE id = OLD.course_id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_skillsnaps_move_count AFTER UPDATE OF course_id ON skillsnaps
+        WHEN OLD.course_id IS NOT NEW.course_id
+        BEGIN
+            UPDATE courses SET skillsnap_count = skillsnap_count - 1 WHERE id = OLD.course_id;
+            UPDATE courses SET skillsnap_count = skillsnap_count + 1 WHERE id = NEW.course_id;
+        END
+    ''')
+    
+    # A completion bumps the matching enrollment in the same statement as the insert
+    total = '(SELECT skillsnap_count FROM courses WHERE id = enrollments.course_id)'
+    for name, event, row, delta in (
+        ('trg_user_progress_insert', 'AFTER INSERT', 'NEW', '+ 1'),
+        ('trg_user_progress_delete', 'AFTER DELETE', 'OLD', '- 1'),
+    ):
+        completed = f'(completed_count {delta})'
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {name} {event} ON user_progress
+            BEGIN
+                UPDATE enrollments
+                SET completed_count = {completed},
+                    progress_percentage = {PROGRESS_SQL.format(total=total, completed=completed)},
+                    completed_at = {COMPLETED_AT_SQL.format(total=total, completed=completed)}
+                WHERE user_id = {row}.user_id
+                  AND course_id = (SELECT course_id FROM skillsnaps WHERE id = {row}.skillsnap_id);
+            END
+        ''')
+    
+    # Lessons finished before enrolling count towards the new enrollment
+    completed = '''(
+        SELECT COUNT(*) FROM user_progress up
+        JOIN skillsnaps s ON up.skillsnap_id = s.id
+        WHERE up.user_id = NEW.user_id AND s.course_id = NEW.course_id
+    )'''
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_enrollments_insert_progress AFTER INSERT ON enrollments
+        WHEN EXISTS (SELECT 1 FROM user_progress WHERE user_id = NEW.user_id)
+        BEGIN
+            UPDATE enrollments
+            SET completed_count = {completed},
+                progress_percentage = {PROGRESS_SQL.format(total=total, completed=completed)},
+                completed_at = {COMPLETED_AT_SQL.format(total=total, completed=completed)}
+            WHERE id = NEW.id;
+        END
+    ''')
+
+def dashboard_read_model(cursor):
+    """Materialized per-user dashboard, versioned by triggers on the tables it reads"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_dashboards (
+            user_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            built_version INTEGER,
+            payload TEXT,
+            built_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    
+    for table in ('enrollments', 'user_progress', 'certificates'):
+        for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_dashboard AFTER {event} ON {table}
+                BEGIN
+                    INSERT INTO user_dashboards (user_id, version) VALUES ({row}.user_id, 1)
+                    ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+                END
+            ''')
+
+def catalog_version(cursor):
+    """Single-row version counter bumped by any change to courses or skillsnaps"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS catalog_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 1,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO catalog_version (id) VALUES (1)")
+    
+    for table in ('courses', 'skillsnaps'):
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_catalog AFTER {event} ON {table}
+                BEGIN
+                    UPDATE catalog_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = 1;
+                END
+            ''')
+
+def certificate_content_hashes(cursor):
+    """SHA-256 of the stored certificate and QR images (their content-addressed storage keys)"""
+    _add_missing_columns(cursor, 'certificates', {
+        'image_hash': 'TEXT',
+        'qr_hash': 'TEXT'
+    })
+
+def keyset_pagination_indexes(cursor):
+    """(user_id, timestamp) indexes for newest-first keyset pages; the rowid tiebreak is implicit"""
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_enrollments_user_enrolled
+        ON enrollments (user_id, enrolled_at)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_certificates_user_issued
+        ON certificates (user_id, issued_at)
+    ''')
+    # user_progress already has idx_user_progress_user_completed
+
+def recommendation_read_model(cursor):
+    """Materialized per-user recommendations, versioned by a trigger on the quiz profile columns"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_recommendations (
+            user_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            built_version INTEGER,
+            catalog_version INTEGER,
+            payload TEXT,
+            built_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_users_profile_recommendations
+        AFTER UPDATE OF aptitude_level, interests, time_commitment, goals ON users
+        BEGIN
+            INSERT INTO user_recommendations (user_id, version) VALUES (NEW.id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END
+    ''')
+
+def full_text_search(cursor):
+    """FTS5 indexes over the catalog, kept in sync with courses and skillsnaps by triggers"""
+    # External-content tables: the text lives only in courses/skillsnaps; prefix
+    # indexes on 2-4 characters keep type-ahead prefixes from scanning the term list
+    indexed = {
+        'courses': ('course_name', 'description'),
+        'skillsnaps': ('title', 'description', 'content', 'category'),
+    }
+    # bm25 column weights: names and titles count most, long lesson bodies least
+    weights = {
+        'courses': 'bm25(10.0, 2.0)',
+        'skillsnaps': 'bm25(10.0, 4.0, 1.0, 3.0)',
+    }
+    for table, columns in indexed.items():
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'NEW.{column}' for column in columns)
+        old_values = ', '.join(f'OLD.{column}' for column in columns)
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+                {column_list},
+                content='{table}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+            )
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_insert_search AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO {table}_fts (rowid, {column_list}) VALUES (NEW.id, {new_values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_delete_search AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO {table}_fts ({table}_fts, rowid, {column_list}) VALUES ('delete', OLD.id, {old_values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_update_search AFTER UPDATE OF {column_list} ON {table}
+            BEGIN
+                INSERT INTO {table}_fts ({table}_fts, rowid, {column_list}) VALUES ('delete', OLD.id, {old_values});
+                INSERT INTO {table}_fts (rowid, {column_list}) VALUES (NEW.id, {new_values});
+            END
+        ''')
+        cursor.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')")
+        cursor.execute(f"INSERT INTO {table}_fts ({table}_fts, rank) VALUES ('rank', '{weights[table]}')")
+
+def quiz_answer_rollups(cursor):
+    """Answer counts per question overall, per location and per language, maintained on quiz save"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS quiz_answer_counts (
+            dimension TEXT NOT NULL,
+            dimension_value TEXT NOT NULL,
+            question_id INTEGER NOT NULL,
+            response TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, dimension_value, question_id, response)
+        ) WITHOUT ROWID
+    ''')
+    
+    # Backfill from the answers saved so far
+    cursor.execute('''
+        INSERT INTO quiz_answer_counts (dimension, dimension_value, question_id, response, count)
+        SELECT dimension, dimension_value, question_id, response, COUNT(*)
+        FROM (
+            SELECT 'all' AS dimension, '' AS dimension_value, q.question_id, q.response
+            FROM quiz_responses q
+            UNION ALL
+            SELECT 'location', COALESCE(u.location, ''), q.question_id, q.response
+            FROM quiz_responses q JOIN users u ON u.id = q.user_id
+            UNION ALL
+            SELECT 'language', COALESCE(u.language_preference, ''), q.question_id, q.response
+            FROM quiz_responses q JOIN users u ON u.id = q.user_id
+        )
+        WHERE response IS NOT NULL AND question_id IS NOT NULL
+        GROUP BY dimension, dimension_value, question_id, response
+    ''')
+
+def render_claims(cursor):
+    """Lease on a pending certificate render, so only one worker process resumes it"""
+    _add_missing_columns(cursor, 'certificates', {'render_claimed_at': 'TIMESTAMP'})
+
+def user_roles(cursor):
+    """Account role: 'learner' for everyone registering, 'staff' or 'admin' granted with manage.py set-role"""
+    _add_missing_columns(cursor, 'users', {'role': "TEXT NOT NULL DEFAULT 'learner'"})
+
+MIGRATIONS = [
+    initial_schema,
+    indexes_and_constraints,
+    incremental_progress,
+    dashboard_read_model,
+    catalog_version,
+    certificate_content_hashes,
+    keyset_pagination_indexes,
+    recommendation_read_model,
+    full_text_search,
+    quiz_answer_rollups,
+    render_claims,
+    user_roles,
+]
+
+def run_migrations(conn):
+    """Apply pending migrations and return how many ran"""
+    applied = 0
+    while True:
+        # IMMEDIATE takes the write lock up front so concurrent starters serialize here
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= len(MIGRATIONS):
+                conn.rollback()
+                break
+            
+            cursor = conn.cursor()
+            MIGRATIONS[version](cursor)
+            cursor.execute(f"PRAGMA user_version = {version + 1}")
+            conn.commit()
+            applied += 1
+        except Exception:
+            conn.rollback()
+            raise
+    
+    if applied:
+        # Refresh planner statistics for the new indexes
+        conn.execute("ANALYZE")
+        conn.commit()
+    return applied
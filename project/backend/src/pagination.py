@@ -0,0 +1,57 @@
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor that was not produced by encode_cursor"""
+    pass
+
+def encode_cursor(sort_value, row_id):
+    """Opaque cursor for the position just after (sort_value, row_id)"""
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+    if not isinstance(row_id, int) or not isinstance(sort_value, (str, int, float)):
+        raise InvalidCursor('Invalid cursor')
+    return sort_value, row_id
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Clamp a requested page size"""
+    try:
+        limit = int(value) if value is not None else default
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, maximum))
+
+def fetch_page(cursor, query, params, sort_column, id_column, limit, after=None):
+    """Run a newest-first keyset query and return (rows, next_cursor).
+    
+    `query` must contain a {keyset} placeholder inside its WHERE clause, order
+    by `sort_column DESC, id_column DESC`, end with LIMIT ? and select the sort
+    value and row id as its last two columns (they are stripped from the rows).
+    Seeking with a row-value comparison keeps every page an index range scan.
+    """
+    keyset = ''
+    params = list(params)
+    if after:
+        sort_value, row_id = decode_cursor(after)
+        keyset = f'AND ({sort_column}, {id_column}) < (?, ?)'
+        params += [sort_value, row_id]
+    
+    cursor.execute(query.format(keyset=keyset), params + [limit + 1])
+    rows = cursor.fetchall()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][-2], rows[-1][-1])
+    return [row[:-2] for row in rows], next_cursor
@@ -1,6 +1,40 @@
+import json
+import threading
+from collections import Counter
+
+ANSWER_DIMENSIONS = ('all', 'location', 'language')
+
+# Groups with fewer respondents are withheld from the answer distribution, so
+# a small location or language cohort cannot be traced back to individuals
+MIN_GROUP_RESPONDENTS = 5
+
+ANSWER_COUNT_UPSERT = '''
+    INSERT INTO quiz_answer_counts (dimension, dimension_value, question_id, response, count)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (dimension, dimension_value, question_id, response) DO UPDATE SET count = count + excluded.count
+'''
+
+def answer_count_keys(location, language, question_id, response):
+    """quiz_answer_counts keys one saved answer contributes to"""
+    if response is None or question_id is None:
+        return ()
+    # Stored question ids have INTEGER affinity; request payloads use string keys
+    if isinstance(question_id, str) and question_id.isdigit():
+        question_id = int(question_id)
+    response = str(response)  # TEXT affinity stores numbers as text too
+    return (
+        ('all', '', question_id, response),
+        ('location', location or '', question_id, response),
+        ('language', language or '', question_id, response),
+    )
+
 class QuizManager:
-    def __init__(self, database):
+    def __init__(self, database, auth_manager=None):
         self.db = database
+        self.auth_manager = auth_manager  # used to invalidate cached user rows
+        self._recommender = None
+        self._refresher = None
+        self._recommender_lock = threading.Lock()
     
     def get_onboarding_questions(self):
         """Get onboarding quiz questions"""
@@ -53,33 +87,118 @@ class QuizManager:
         return questions
     
     def save_quiz_responses(self, user_id, responses):
-        """Save user's quiz responses"""
+        """Save user's quiz responses and move the answer counts from their previous answers to these"""
         conn = self.db.get_connection()
         cursor = conn.cursor()
         
         try:
-            # Clear existing responses
+            # Take the write lock before reading the previous answers so concurrent
+            # saves for the same user cannot both subtract them
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('SELECT location, language_preference FROM users WHERE id = ?', (user_id,))
+            user = cursor.fetchone()
+            if not user:
+                conn.rollback()
+                return {'success': False, 'message': 'User not found'}
+            location, language = user
+            
+            cursor.execute('SELECT question_id, response FROM quiz_responses WHERE user_id = ?', (user_id,))
+            previous = cursor.fetchall()
+            
+            # Replace the saved responses
             cursor.execute('DELETE FROM quiz_responses WHERE user_id = ?', (user_id,))
+            cursor.executemany('''
+                INSERT INTO quiz_responses (user_id, question_id, response)
+                VALUES (?, ?, ?)
+            ''', [(user_id, question_id, response) for question_id, response in responses.items()])
             
-            # Save new responses
+            # Unchanged answers cancel out, so a retake only touches the counters that moved
+            deltas = Counter()
+            for question_id, response in previous:
+                for key in answer_count_keys(location, language, question_id, response):
+                    deltas[key] -= 1
             for question_id, response in responses.items():
-                cursor.execute('''
-                    INSERT INTO quiz_responses (user_id, question_id, response)
-                    VALUES (?, ?, ?)
-                ''', (user_id, question_id, response))
+                for key in answer_count_keys(location, language, question_id, response):
+                    deltas[key] += 1
+            cursor.executemany(ANSWER_COUNT_UPSERT, [(*key, delta) for key, delta in deltas.items() if delta])
             
             # Update user profile with quiz results
             self._update_user_profile(cursor, user_id, responses)
             
             conn.commit()
+            if self.auth_manager:
+                self.auth_manager.invalidate_user(user_id)
+            # The profile trigger marked the stored recommendations stale; rebuild them off the request path
+            self.refresher.queue_users([user_id])
             return {'success': True, 'message': 'Quiz responses saved'}
-            
+        
         except Exception as e:
             conn.rollback()
             return {'success': False, 'message': str(e)}
         finally:
             conn.close()
     
+    def get_answer_distribution(self, dimension='all', value=None, min_respondents=MIN_GROUP_RESPONDENTS):
+        """Answer counts per question from the rollup table.
+        
+        `dimension` is 'all', 'location' or 'language'; `value` narrows it to
+        one location or language, otherwise every value is returned. Groups
+        where no question has `min_respondents` answers are left out and
+        counted in `suppressed_groups`. The read is a primary-key range over a
+        few rows per answer option, however many users have answered.
+        """
+        if dimension not in ANSWER_DIMENSIONS:
+            raise ValueError(f"dimension must be one of {', '.join(ANSWER_DIMENSIONS)}")
+        if dimension == 'all':
+            value = ''
+        
+        with self.db.connection() as conn:
+            if value is None:
+                rows = conn.execute('''
+                    SELECT dimension_value, question_id, response, count
+                    FROM quiz_answer_counts
+                    WHERE dimension = ? AND count > 0
+                ''', (dimension,)).fetchall()
+            else:
+                rows = conn.execute('''
+                    SELECT dimension_value, question_id, response, count
+                    FROM quiz_answer_counts
+                    WHERE dimension = ? AND dimension_value = ? AND count > 0
+                ''', (dimension, value)).fetchall()
+        
+        counts = {}
+        for group, question_id, response, count in rows:
+            counts.setdefault(group, {}).setdefault(question_id, {})[response] = count
+        if value is not None:
+            counts.setdefault(value, {})
+        
+        questions = self.get_onboarding_questions()
+        groups = []
+        suppressed = 0
+        for group in sorted(counts):
+            group_questions = []
+            for question in questions:
+                answers = counts[group].pop(question['id'], {})
+                # Every option is listed, including ones nobody picked; answers outside the options follow
+                options = {option: answers.pop(option, 0) for option in question['options']}
+                options.update(sorted(answers.items()))
+                group_questions.append({
+                    'question_id': question['id'],
+                    'question': question['question'],
+                    'respondents': sum(options.values()),
+                    'answers': options
+                })
+            if max(question['respondents'] for question in group_questions) < min_respondents:
+                suppressed += 1
+                continue
+            groups.append({'value': group, 'questions': group_questions})
+        return {
+            'dimension': dimension,
+            'groups': groups,
+            'suppressed_groups': suppressed,
+            'min_respondents': min_respondents
+        }
+    
     def _update_user_profile(self, cursor, user_id, responses):
         """Update user profile based on quiz responses"""
         # Determine aptitude level
@@ -105,61 +224,72 @@ class QuizManager:
             WHERE id = ?
         ''', (aptitude_level, interests, time_commitment, goals, user_id))
     
-    def get_personalized_recommendations(self, user_id):
-        """Get personalized course recommendations based on quiz responses"""
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        
-        # Get user profile
-        cursor.execute('''
-            SELECT aptitude_level, interests, time_commitment, goals
-            FROM users WHERE id = ?
-        ''', (user_id,))
-        
-        user_profile = cursor.fetchone()
-        if not user_profile:
-            conn.close()
-            return []
+    @property
+    def recommender(self):
+        """Vectorized scoring engine, created on first use (NumPy is only imported then)"""
+        self._build_recommender()
+        return self._recommender
+    
+    @property
+    def refresher(self):
+        """Background refresher for the materialized recommendations"""
+        self._build_recommender()
+        return self._refresher
+    
+    def _build_recommender(self):
+        if self._recommender is None:
+            with self._recommender_lock:
+                if self._recommender is None:
+                    from recommender import RecommendationEngine, RecommendationRefresher
+                    engine = RecommendationEngine(self.db, reason=self._get_recommendation_reason)
+                    self._refresher = RecommendationRefresher(engine)
+                    self._recommender = engine
+    
+    def get_recommendations(self, user_id):
+        """Get the user's materialized recommendations.
         
-        aptitude_level, interests, time_commitment, goals = user_profile
+        One lookup reads the stored list and the current catalog version. A
+        row built from an older profile or catalog is still served, marked
+        stale, and a refresh is queued; a user without a stored list yet has
+        it computed and stored on this call.
+        """
+        with self.db.connection() as conn:
+            row = conn.execute('''
+                SELECT r.payload, r.version, r.built_version, r.catalog_version, r.built_at, cv.version
+                FROM catalog_version cv
+                LEFT JOIN user_recommendations r ON r.user_id = ?
+                WHERE cv.id = 1
+            ''', (user_id,)).fetchone()
+        payload, version, built_version, built_catalog, built_at, catalog = row or (None,) * 6
         
-        # Get recommended courses based on profile
-        recommendations = []
+        if payload is None:
+            recommendations = self.recommender.refresh_users([user_id]).get(user_id, [])
+            return {'recommendations': recommendations, 'stale': False, 'built_at': None}
         
-        # Basic recommendations for beginners
-        if aptitude_level in ['beginner', 'basic']:
-            cursor.execute('''
-                SELECT id, course_name, description, difficulty_level
-                FROM courses 
-                WHERE difficulty_level IN ('Beginner') AND is_active = 1
-                ORDER BY course_name
-            ''')
-        else:
+        stale = built_version != version or built_catalog != catalog
+        if built_catalog != catalog:
+            self.refresher.queue_catalog_sweep(catalog)
+        if stale:
+            self.refresher.queue_users([user_id])
+        return {'recommendations': json.loads(payload), 'stale': stale, 'built_at': built_at}
+    
+    def recommendation_stats(self):
+        """Refresher counters, or None before anything needed recommendations"""
+        return self._refresher.stats() if self._refresher is not None else None
+    
+    def get_personalized_recommendations(self, user_id, limit=3):
+        """Get personalized course recommendations based on quiz responses"""
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
             cursor.execute('''
-                SELECT id, course_name, description, difficulty_level
-                FROM courses 
-                WHERE is_active = 1
-                ORDER BY 
-                    CASE 
-                        WHEN difficulty_level = 'Beginner' THEN 1
-                        WHEN difficulty_level = 'Intermediate' THEN 2
-                        WHEN difficulty_level = 'Advanced' THEN 3
-                    END
-            ''')
-        
-        for row in cursor.fetchall():
-            recommendations.append({
-                'course_id': row[0],
-                'course_name': row[1],
-                'description': row[2],
-                'difficulty': row[3],
-                'recommended_reason': self._get_recommendation_reason(
-                    row[1], interests, goals, aptitude_level
-                )
-            })
-        
-        conn.close()
-        return recommendations[:3]  # Return top 3 recommendations
+                SELECT aptitude_level, interests, time_commitment, goals
+                FROM users WHERE id = ?
+            ''', (user_id,))
+            user_profile = cursor.fetchone()
+        
+        if not user_profile:
+            return []
+        return self.recommender.recommend(user_profile, limit)
     
     def _get_recommendation_reason(self, course_name, interests, goals, aptitude_level):
         """Generate recommendation reason based on user profile"""
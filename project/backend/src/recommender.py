@@ -0,0 +1,406 @@
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+logger = logging.getLogger('skillbridge.recommendations')
+
+DIFFICULTIES = ('Beginner', 'Intermediate', 'Advanced')
+
+# How well each difficulty suits an aptitude level (rows follow DIFFICULTIES)
+DIFFICULTY_FIT = {
+    'beginner': (1.0, 0.2, 0.0),
+    'basic': (1.0, 0.3, 0.0),
+    'intermediate': (0.5, 1.0, 0.4),
+    'advanced': (0.2, 0.7, 1.0),
+}
+DEFAULT_FIT = (0.6, 0.6, 0.4)
+
+# Aptitude levels that are only offered Beginner courses
+BEGINNER_ONLY = frozenset(('beginner', 'basic'))
+
+# Preference for short courses by daily time commitment
+SHORT_COURSE_PREFERENCE = {
+    '10-15 minutes': 0.3,
+    '30 minutes': 0.15,
+    '1 hour': 0.05,
+}
+
+# Quiz answers expanded into the words courses are described with
+ANSWER_KEYWORDS = {
+    'basic computer literacy': 'computer literacy digital basics fundamentals',
+    'digital marketing': 'digital marketing social media business',
+    'data entry & analysis': 'data entry analysis spreadsheet skills',
+    'online business skills': 'online business commerce entrepreneurship marketing payment',
+    'find employment': 'job career applications literacy employment',
+    'start a business': 'business marketing online entrepreneurship payment',
+    'improve current job': 'data spreadsheet email computer skills',
+    'personal development': 'digital internet literacy computer',
+}
+
+STOPWORDS = frozenset('and the for with your from into this that basic basics skills'.split())
+
+WEIGHT_DIFFICULTY = 1.0
+WEIGHT_INTERESTS = 0.8
+WEIGHT_GOALS = 0.5
+
+# Courses stored per user in user_recommendations
+RECOMMENDATION_COUNT = 3
+
+def tokenize(text):
+    return [word for word in re.findall(r'[a-z]+', (text or '').lower()) if len(word) > 2 and word not in STOPWORDS]
+
+class CourseMatrix:
+    """Feature vectors for every active course: [difficulty one-hot | shortness | keywords (L2-normalized)]"""
+    def __init__(self, courses, categories):
+        self.courses = courses  # (id, name, description, difficulty, duration) in catalog order
+        self.vocabulary = {}
+        documents = []
+        for course_id, name, description, _, _ in courses:
+            words = tokenize(name) * 2 + tokenize(description) + tokenize(' '.join(categories.get(course_id, ())))
+            for word in words:
+                self.vocabulary.setdefault(word, len(self.vocabulary))
+            documents.append(words)
+        
+        offset = len(DIFFICULTIES) + 1
+        self.keyword_offset = offset
+        self.matrix = np.zeros((len(courses), offset + len(self.vocabulary)), dtype=np.float32)
+        
+        durations = np.array([duration or 0 for *_, duration in courses], dtype=np.float32)
+        span = float(durations.max() - durations.min()) if len(courses) else 0.0
+        for row, (course, words) in enumerate(zip(courses, documents)):
+            difficulty = course[3]
+            if difficulty in DIFFICULTIES:
+                self.matrix[row, DIFFICULTIES.index(difficulty)] = 1.0
+            self.matrix[row, len(DIFFICULTIES)] = 1.0 - (durations[row] - durations.min()) / span if span else 0.5
+            for word in words:
+                self.matrix[row, offset + self.vocabulary[word]] += 1.0
+        
+        keywords = self.matrix[:, offset:]
+        norms = np.linalg.norm(keywords, axis=1, keepdims=True)
+        np.divide(keywords, norms, out=keywords, where=norms > 0)
+        
+        self.beginner = np.array([course[3] == 'Beginner' for course in courses], dtype=bool)
+    
+    def eligible(self, aptitude_level):
+        """Courses a profile may be recommended: beginners only see Beginner courses"""
+        if aptitude_level in BEGINNER_ONLY:
+            return self.beginner
+        return np.ones(len(self.courses), dtype=bool)
+    
+    def _keyword_vector(self, text):
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for word in tokenize(ANSWER_KEYWORDS.get((text or '').lower(), '') + ' ' + (text or '')):
+            index = self.vocabulary.get(word)
+            if index is not None:
+                vector[index] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def profile_vector(self, aptitude_level, interests, time_commitment, goals):
+        """Turn a quiz profile into a vector in the course feature space"""
+        vector = np.zeros(self.matrix.shape[1], dtype=np.float32)
+        vector[:len(DIFFICULTIES)] = np.array(DIFFICULTY_FIT.get(aptitude_level, DEFAULT_FIT)) * WEIGHT_DIFFICULTY
+        vector[len(DIFFICULTIES)] = SHORT_COURSE_PREFERENCE.get(time_commitment, 0.0)
+        vector[self.keyword_offset:] = (
+            self._keyword_vector(interests) * WEIGHT_INTERESTS + self._keyword_vector(goals) * WEIGHT_GOALS
+        )
+        return vector
+    
+    def top_k(self, profiles, k, eligible=None):
+        """Indices of the k best courses per profile row, best first (one matrix product for all rows).
+        
+        Equal scores are ranked in catalog order. Courses outside the optional
+        `eligible` mask score -inf and are returned only when fewer than k are
+        eligible; callers drop them.
+        """
+        scores = profiles @ self.matrix.T
+        if eligible is not None:
+            scores = np.where(eligible, scores, np.float32(-np.inf))
+        rows, count = scores.shape
+        k = min(k, count)
+        if k <= 0:
+            return np.zeros((rows, 0), dtype=np.int64), scores
+        
+        # Select exactly k per row: everything above the k-th best score, then the
+        # lowest-index courses tied with it, instead of argpartition's arbitrary pick
+        kth = np.partition(scores, count - k, axis=1)[:, count - k, None]
+        above = scores > kth
+        tied = scores == kth
+        room = k - above.sum(axis=1, keepdims=True)
+        chosen = above | (tied & (np.cumsum(tied, axis=1) <= room))
+        candidates = np.nonzero(chosen)[1].reshape(rows, k)  # ascending index within each row
+        
+        # Stable sort keeps catalog order among equal scores
+        order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1, kind='stable')
+        return np.take_along_axis(candidates, order, axis=1), scores
+
+class RecommendationEngine:
+    """Vectorized course scoring.
+    
+    Course vectors are built once per catalog version (checked at most every
+    `check_interval` seconds). A request scores one profile against every
+    course with a single matrix-vector product and a partial sort
+    (np.partition, ties kept in catalog order); the batch API does the same
+    for thousands of users with one matrix product.
+    """
+    def __init__(self, database, reason=None, check_interval=5.0):
+        self.db = database
+        self.reason = reason or (lambda course_name, interests, goals, aptitude_level: None)
+        self.check_interval = check_interval
+        self._courses = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+    
+    def _catalog_version(self, conn):
+        row = conn.execute('SELECT version FROM catalog_version WHERE id = 1').fetchone()
+        return row[0] if row else None
+    
+    def courses(self, check=False):
+        """Current (CourseMatrix, catalog version) pair, rebuilt when the version moves.
+        
+        `check` skips the check interval. Use the version returned with the
+        matrix: the attributes may already belong to a newer catalog.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._courses is not None and not check and now - self._checked_at < self.check_interval:
+                return self._courses, self._version
+            
+            with self.db.connection() as conn:
+                version = self._catalog_version(conn)
+                if self._courses is None or version != self._version:
+                    rows = conn.execute('''
+                        SELECT id, course_name, description, difficulty_level, estimated_duration
+                        FROM courses
+                        WHERE is_active = 1
+                        ORDER BY
+                            CASE difficulty_level
+                                WHEN 'Beginner' THEN 1
+                                WHEN 'Intermediate' THEN 2
+                                WHEN 'Advanced' THEN 3
+                                ELSE 4
+                            END,
+                            course_name
+                    ''').fetchall()
+                    categories = {}
+                    for course_id, category in conn.execute('SELECT DISTINCT course_id, category FROM skillsnaps'):
+                        categories.setdefault(course_id, []).append(category or '')
+                    self._courses = CourseMatrix(rows, categories)
+                    self._version = version
+            self._checked_at = now
+            return self._courses, self._version
+    
+    def _recommendation(self, course, profile, score):
+        course_id, name, description, difficulty, _ = course
+        aptitude_level, interests, _, goals = profile
+        return {
+            'course_id': course_id,
+            'course_name': name,
+            'description': description,
+            'difficulty': difficulty,
+            'score': round(float(score), 4),
+            'recommended_reason': self.reason(name, interests, goals, aptitude_level)
+        }
+    
+    def recommend(self, profile, k=3):
+        """Top-k courses for one (aptitude_level, interests, time_commitment, goals) profile"""
+        return self.recommend_profiles([profile], k)[0]
+    
+    def recommend_profiles(self, profiles, k=3):
+        """Top-k courses for each profile; reasons are only built for the courses returned"""
+        catalog, _ = self.courses()
+        return self._score_profiles(catalog, profiles, k)
+    
+    def _score_profiles(self, catalog, profiles, k):
+        if not profiles:
+            return []
+        # Quiz answers come from a handful of choices, so most profiles repeat: score each distinct one once
+        distinct = {}
+        for profile in profiles:
+            distinct.setdefault(tuple(profile), len(distinct))
+        vectors = np.stack([catalog.profile_vector(*profile) for profile in distinct])
+        eligible = np.stack([catalog.eligible(profile[0]) for profile in distinct])
+        indices, scores = catalog.top_k(vectors, k, eligible)
+        results = [
+            [
+                self._recommendation(catalog.courses[index], profile, scores[row, index])
+                for index in indices[row] if eligible[row, index]
+            ]
+            for row, profile in enumerate(distinct)
+        ]
+        return [[dict(item) for item in results[distinct[tuple(profile)]]] for profile in profiles]
+    
+    def recommend_users(self, user_ids, k=3):
+        """Top-k courses for many users at once; returns {user_id: recommendations}"""
+        rows = []
+        user_ids = list(user_ids)
+        with self.db.connection() as conn:
+            for start in range(0, len(user_ids), 500):
+                chunk = user_ids[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows.extend(conn.execute(f'''
+                    SELECT id, aptitude_level, interests, time_commitment, goals
+                    FROM users WHERE id IN ({placeholders})
+                ''', chunk).fetchall())
+        
+        # Score after returning the connection: loading the catalog may check out one of its own
+        recommendations = self.recommend_profiles([row[1:] for row in rows], k)
+        return {row[0]: items for row, items in zip(rows, recommendations)}
+    
+    def iter_all_users(self, k=3, batch_size=5000):
+        """Yield (user_id, recommendations) for every user, scoring `batch_size` users per matrix product"""
+        last_id = 0
+        while True:
+            with self.db.connection() as conn:
+                rows = conn.execute('''
+                    SELECT id, aptitude_level, interests, time_commitment, goals
+                    FROM users WHERE id > ? ORDER BY id LIMIT ?
+                ''', (last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            for row, recommendations in zip(rows, self.recommend_profiles([row[1:] for row in rows], k)):
+                yield row[0], recommendations
+            last_id = rows[-1][0]
+    
+    def refresh_users(self, user_ids, k=RECOMMENDATION_COUNT):
+        """Recompute and store user_recommendations rows; returns {user_id: recommendations}.
+        
+        A row is only written if the profile version read here is still the
+        current one, so a quiz retake that lands meanwhile keeps it stale.
+        """
+        catalog, catalog_version = self.courses(check=True)
+        results = {}
+        user_ids = list(user_ids)
+        with self.db.connection() as conn:
+            for start in range(0, len(user_ids), 500):
+                chunk = user_ids[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(f'''
+                    SELECT u.id, u.aptitude_level, u.interests, u.time_commitment, u.goals, COALESCE(r.version, 0)
+                    FROM users u
+                    LEFT JOIN user_recommendations r ON r.user_id = u.id
+                    WHERE u.id IN ({placeholders})
+                ''', chunk).fetchall()
+                if not rows:
+                    continue
+                
+                recommendations = self._score_profiles(catalog, [row[1:5] for row in rows], k)
+                conn.executemany('''
+                    INSERT INTO user_recommendations (user_id, version, built_version, catalog_version, payload, built_at)
+                    VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT (user_id) DO UPDATE SET
+                        built_version = excluded.built_version,
+                        catalog_version = excluded.catalog_version,
+                        payload = excluded.payload,
+                        built_at = excluded.built_at
+                    WHERE user_recommendations.version = excluded.built_version
+                ''', [
+                    (row[0], row[5], row[5], catalog_version, json.dumps(items, separators=(',', ':')))
+                    for row, items in zip(rows, recommendations)
+                ])
+                conn.commit()
+                results.update((row[0], items) for row, items in zip(rows, recommendations))
+        return results
+    
+    def refresh_all(self, k=RECOMMENDATION_COUNT, batch_size=5000, stale_only=True):
+        """Rebuild user_recommendations for every user (or only stale and missing rows); returns the count"""
+        _, catalog_version = self.courses(check=True)
+        condition, parameters = '', ()
+        if stale_only:
+            condition = 'AND (r.built_version IS NULL OR r.built_version != r.version OR r.catalog_version IS NOT ?)'
+            parameters = (catalog_version,)
+        
+        refreshed = 0
+        last_id = 0
+        while True:
+            with self.db.connection() as conn:
+                user_ids = [row[0] for row in conn.execute(f'''
+                    SELECT u.id
+                    FROM users u
+                    LEFT JOIN user_recommendations r ON r.user_id = u.id
+                    WHERE u.id > ? {condition}
+                    ORDER BY u.id
+                    LIMIT ?
+                ''', (last_id, *parameters, batch_size))]
+            if not user_ids:
+                return refreshed
+            refreshed += len(self.refresh_users(user_ids, k))
+            last_id = user_ids[-1]
+
+class RecommendationRefresher:
+    """Background refresh of user_recommendations.
+    
+    Users queued after a profile change are collected into a set and
+    refreshed in batches by one worker; a catalog change schedules a single
+    sweep over every stale row (once per catalog version in this process).
+    """
+    def __init__(self, engine):
+        self.engine = engine
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='recommendation-refresh')
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._draining = False
+        self._swept_version = None
+        self._sweeping = False
+        self.refreshed = 0
+    
+    def queue_users(self, user_ids):
+        with self._lock:
+            self._pending.update(user_ids)
+            if self._draining or not self._pending:
+                return
+            self._draining = True
+        self._executor.submit(self._drain)
+    
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._draining = False
+                    return
+                user_ids = list(self._pending)
+                self._pending.clear()
+            try:
+                refreshed = len(self.engine.refresh_users(user_ids))
+            except Exception:
+                logger.exception("Refreshing recommendations for %d users failed", len(user_ids))
+                continue
+            with self._lock:
+                self.refreshed += refreshed
+    
+    def queue_catalog_sweep(self, catalog_version):
+        with self._lock:
+            if self._sweeping or catalog_version == self._swept_version:
+                return
+            self._sweeping = True
+            self._swept_version = catalog_version
+        self._executor.submit(self._sweep)
+    
+    def _sweep(self):
+        try:
+            refreshed = self.engine.refresh_all()
+        except Exception:
+            logger.exception("Recommendation sweep after a catalog change failed")
+            refreshed = 0
+        with self._lock:
+            self._sweeping = False
+            self.refreshed += refreshed
+    
+    def queue_depth(self):
+        """Users waiting for a refresh"""
+        with self._lock:
+            return len(self._pending)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'queued': len(self._pending),
+                'sweeping': self._sweeping,
+                'swept_catalog_version': self._swept_version,
+                'refreshed': self.refreshed
+            }
@@ -0,0 +1,301 @@
+import itertools
+import random
+import sqlite3
+import sys
+import time
+from collections import Counter
+import bcrypt
+from database import Database
+from quiz_manager import ANSWER_COUNT_UPSERT, QuizManager, answer_count_keys
+
+# Bulk-load settings for the seeding connection only. The journal is kept in
+# memory and nothing is fsynced, so an interrupted run can leave the file
+# unusable: seed scratch databases, never production.
+BULK_PRAGMAS = {
+    'journal_mode': 'MEMORY',
+    'synchronous': 'OFF',
+    'locking_mode': 'EXCLUSIVE',
+    'cache_size': -262144,       # 256 MB
+    'temp_store': 'MEMORY',
+}
+
+# High-volume tables whose secondary indexes and triggers are dropped during the
+# load and restored afterwards; the seeder writes their derived columns (and the
+# quiz answer counts) itself
+BULK_TABLES = ('users', 'enrollments', 'user_progress', 'certificates', 'quiz_responses')
+
+# Tables with a full-text index (<table>_fts), rebuilt after the catalog load
+SEARCH_TABLES = ('courses', 'skillsnaps')
+
+SEED_PASSWORD = 'skillbridge'
+
+LOCATIONS = [
+    ('Uttar Pradesh', 18), ('Bihar', 12), ('Maharashtra', 10), ('West Bengal', 9), ('Madhya Pradesh', 7),
+    ('Rajasthan', 7), ('Tamil Nadu', 6), ('Karnataka', 5), ('Odisha', 5), ('Telangana', 4),
+    ('Assam', 4), ('Jharkhand', 4), ('Gujarat', 3), ('Kerala', 3), ('Punjab', 3)
+]
+LANGUAGES = [
+    ('Hindi', 45), ('English', 15), ('Bengali', 9), ('Marathi', 7), ('Telugu', 6),
+    ('Tamil', 6), ('Odia', 4), ('Kannada', 3), ('Gujarati', 3), ('Assamese', 2)
+]
+# Learners per user: most take one or two courses, a few take many
+ENROLLMENT_COUNTS = [(1, 38), (2, 28), (3, 16), (4, 9), (5, 5), (6, 4)]
+TOPICS = ['Digital Literacy', 'Computer Skills', 'Internet Skills', 'Communication', 'Digital Marketing',
+          'Financial Literacy', 'Data Skills', 'Career Skills']
+DIFFICULTIES = ['Beginner', 'Intermediate', 'Advanced']
+# Lesson text is drawn from this vocabulary with Zipf weights, so full-text search
+# sees common and rare terms the way it would on real lesson content
+LESSON_WORDS = '''
+    computer internet email phone mobile account password browser website search online digital
+    payment bank upi wallet money budget savings loan interest receipt invoice customer business
+    market marketing social media post page photo video share message whatsapp facebook youtube
+    spreadsheet excel table column row formula chart data entry report document file folder
+    keyboard mouse typing screen window menu button click download upload install update app
+    security privacy scam fraud safe secure link attachment virus backup cloud storage drive
+    resume interview job career application letter skill certificate training practice exercise
+    communication writing speaking meeting call schedule calendar task team project plan goal
+    price product order delivery stock sale profit cost tax record inventory supplier catalog
+    government service form aadhaar scheme portal registration identity verification otp login
+    farming crop weather subsidy insurance health clinic appointment pharmacy
+    translate language hindi english voice assistant map location address route travel ticket
+'''.split()
+
+def _weighted(pairs):
+    values, weights = zip(*pairs)
+    return list(values), list(weights)
+
+def _aptitude_level(technical_response):
+    # Mirrors QuizManager._update_user_profile
+    response = technical_response.lower()
+    for level in ('beginner', 'basic', 'intermediate'):
+        if level in response:
+            return level
+    return 'advanced'
+
+class DataSeeder:
+    """Fills a database with large, skewed synthetic data for scale testing.
+    
+    Users are generated in batches; each batch's users, quiz responses,
+    enrollments, progress rows and certificates go in with executemany inside
+    one transaction. Course popularity follows a Zipf curve, learner activity
+    is heavy-tailed and lessons are completed in order, so indexes and
+    per-user queries see realistic distributions.
+    """
+    def __init__(self, db_path, seed=None, log=None):
+        self.db_path = db_path
+        self.rng = random.Random(seed)
+        self._word_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(LESSON_WORDS) + 1)))
+        self.log = log or (lambda message: print(message, file=sys.stderr))
+    
+    def run(self, users=10000, lessons_per_course=40, extra_courses=0, days=365, batch_size=10000):
+        started = time.perf_counter()
+        
+        # Schema and sample catalog through the normal path, then a dedicated bulk connection
+        database = Database(self.db_path)
+        database.pool.close_all()
+        
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            for name, value in BULK_PRAGMAS.items():
+                conn.execute(f"PRAGMA {name}={value}")
+            
+            lessons = self._seed_catalog(conn, lessons_per_course, extra_courses)
+            saved = self._drop_bulk_objects(conn)
+            try:
+                counts = self._seed_users(conn, lessons, users, days, batch_size)
+            finally:
+                self._restore_bulk_objects(conn, saved)
+            
+            conn.execute('UPDATE user_dashboards SET version = version + 1')
+            conn.execute('ANALYZE')
+            conn.execute('PRAGMA locking_mode=NORMAL')
+            conn.execute('PRAGMA journal_mode=WAL')
+        finally:
+            conn.close()
+        
+        elapsed = time.perf_counter() - started
+        rows = sum(counts.values())
+        return {
+            'success': True,
+            'rows': counts,
+            'seconds': round(elapsed, 1),
+            'rows_per_second': round(rows / elapsed) if elapsed else rows,
+            'password': SEED_PASSWORD
+        }
+    
+    def _seed_catalog(self, conn, lessons_per_course, extra_courses):
+        """Add courses and lessons (their counter triggers stay on). Returns {course_id: [lesson ids]}"""
+        conn.execute('BEGIN')
+        # Row-at-a-time search index inserts from triggers slow down as the index grows;
+        # new lessons are indexed with one rebuild at the end instead
+        search_triggers = conn.execute('''
+            SELECT name, sql FROM sqlite_master
+            WHERE type = 'trigger' AND tbl_name IN (?, ?) AND name LIKE '%_insert_search'
+        ''', SEARCH_TABLES).fetchall()
+        for name, _ in search_triggers:
+            conn.execute(f'DROP TRIGGER "{name}"')
+        
+        existing = conn.execute('SELECT COUNT(*) FROM courses').fetchone()[0]
+        conn.executemany('''
+            INSERT INTO courses (course_name, description, difficulty_level, estimated_duration)
+            VALUES (?, ?, ?, ?)
+        ''', [(f'Skill Track {existing + i + 1}', 'Synthetic course for scale testing',
+               DIFFICULTIES[i % len(DIFFICULTIES)], 60 + 30 * (i % 5)) for i in range(extra_courses)])
+        
+        for course_id, difficulty, have in conn.execute('''
+            SELECT c.id, c.difficulty_level, COUNT(s.id) FROM courses c
+            LEFT JOIN skillsnaps s ON s.course_id = c.id
+            GROUP BY c.id
+        ''').fetchall():
+            missing = lessons_per_course - have
+            if missing > 0:
+                conn.executemany('''
+                    INSERT INTO skillsnaps (course_id, title, description, content, duration_minutes,
+                                            difficulty_level, category, order_index)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [(course_id, f'Lesson {have + i + 1}: {self.rng.choice(TOPICS)} {self._words(3)}',
+                       self._words(12).capitalize(), self._words(80).capitalize(), self.rng.randint(8, 25),
+                       difficulty, self.rng.choice(TOPICS), have + i + 1) for i in range(missing)])
+        
+        for _, sql in search_triggers:
+            conn.execute(sql)
+        for table in SEARCH_TABLES:
+            conn.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')")
+        conn.execute('COMMIT')
+        
+        lessons = {}
+        for course_id, skillsnap_id in conn.execute('SELECT course_id, id FROM skillsnaps ORDER BY course_id, order_index, id'):
+            lessons.setdefault(course_id, []).append(skillsnap_id)
+        return lessons
+    
+    def _words(self, count):
+        return ' '.join(self.rng.choices(LESSON_WORDS, cum_weights=self._word_weights, k=count))
+    
+    def _drop_bulk_objects(self, conn):
+        """Drop triggers and explicit indexes on the bulk tables; returns their SQL for restoring"""
+        placeholders = ','.join('?' * len(BULK_TABLES))
+        saved = conn.execute(f'''
+            SELECT type, name, sql FROM sqlite_master
+            WHERE type IN ('index', 'trigger') AND sql IS NOT NULL AND tbl_name IN ({placeholders})
+        ''', BULK_TABLES).fetchall()
+        for object_type, name, _ in saved:
+            conn.execute(f'DROP {object_type.upper()} IF EXISTS "{name}"')
+        return saved
+    
+    def _restore_bulk_objects(self, conn, saved):
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        started = time.perf_counter()
+        for _, _, sql in saved:
+            conn.execute(sql)
+        self.log(f"restored {len(saved)} indexes and triggers in {time.perf_counter() - started:.1f}s")
+    
+    def _seed_users(self, conn, lessons, users, days, batch_size):
+        rng = self.rng
+        password_hash = bcrypt.hashpw(SEED_PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds=4)).decode('utf-8')
+        questions = QuizManager(None).get_onboarding_questions()
+        locations, location_weights = _weighted(LOCATIONS)
+        languages, language_weights = _weighted(LANGUAGES)
+        
+        course_ids = sorted(lessons)
+        course_weights = [1.0 / (rank + 1) ** 1.1 for rank in range(len(course_ids))]
+        max_courses = len(course_ids)
+        enrollment_counts, enrollment_weights = _weighted(
+            [(count, weight) for count, weight in ENROLLMENT_COUNTS if count <= max_courses]
+        )
+        
+        now = int(time.time())
+        span = days * 86400
+        first_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM users').fetchone()[0] + 1
+        counts = {'users': 0, 'quiz_responses': 0, 'enrollments': 0, 'user_progress': 0, 'certificates': 0}
+        
+        for batch_start in range(0, users, batch_size):
+            batch_started = time.perf_counter()
+            user_rows, quiz_rows, enrollment_rows, progress_rows, certificate_rows = [], [], [], [], []
+            answer_counts = Counter()
+            
+            for user_id in range(first_id + batch_start, first_id + min(users, batch_start + batch_size)):
+                joined = now - rng.randrange(span)
+                # Heavy-tailed engagement: most learners dabble, a few finish everything
+                engagement = rng.betavariate(0.6, 1.6)
+                
+                location = rng.choices(locations, location_weights)[0]
+                language = rng.choices(languages, language_weights)[0]
+                profile = (None, None, None, None)
+                if rng.random() < 0.8:
+                    answers = [rng.choice(question['options']) for question in questions]
+                    quiz_rows.extend((user_id, question['id'], answer, joined) for question, answer in zip(questions, answers))
+                    for question, answer in zip(questions, answers):
+                        answer_counts.update(answer_count_keys(location, language, question['id'], answer))
+                    profile = (_aptitude_level(answers[0]), answers[1], answers[2], answers[3])
+                
+                user_rows.append((
+                    user_id, f'learner{user_id}', password_hash, f'Learner {user_id}', f'learner{user_id}@example.org',
+                    location, language, *profile, joined
+                ))
+                
+                enrolled_courses = set()
+                for _ in range(rng.choices(enrollment_counts, enrollment_weights)[0]):
+                    enrolled_courses.add(rng.choices(course_ids, course_weights)[0])
+                
+                for course_id in enrolled_courses:
+                    course_lessons = lessons[course_id]
+                    enrolled_at = joined + rng.randrange(max(1, now - joined))
+                    fraction = min(1.0, engagement * rng.uniform(0.5, 2.5))
+                    completed = len(course_lessons) if fraction >= 1.0 else int(len(course_lessons) * fraction)
+                    
+                    # Lessons are taken in order, minutes to days apart, paced to finish before now
+                    pace = max(60, min(259200, (now - enrolled_at) // (len(course_lessons) + 1)))
+                    finished_at = enrolled_at
+                    for skillsnap_id in course_lessons[:completed]:
+                        finished_at = min(now, finished_at + rng.randint(pace // 4, pace))
+                        progress_rows.append((user_id, skillsnap_id, finished_at, rng.randint(5, 30), rng.randint(50, 100)))
+                    
+                    total = len(course_lessons)
+                    done = total > 0 and completed >= total
+                    enrollment_rows.append((
+                        user_id, course_id, enrolled_at, finished_at if done else None,
+                        min(100.0, completed * 100.0 / total) if total else 0, completed
+                    ))
+                    if done and rng.random() < 0.7:
+                        certificate_id = f"SB-SEED-{user_id:08X}{course_id:03X}"
+                        certificate_rows.append((
+                            user_id, course_id, certificate_id, min(now, finished_at + rng.randint(60, 86400)),
+                            f"https://skillbridge.edu/verify/{certificate_id}"
+                        ))
+            
+            conn.execute('BEGIN')
+            conn.executemany('''
+                INSERT INTO users (id, user_id, password_hash, name, email, location, language_preference,
+                                   aptitude_level, interests, time_commitment, goals, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime(?, 'unixepoch'))
+            ''', user_rows)
+            conn.executemany('''
+                INSERT INTO quiz_responses (user_id, question_id, response, created_at)
+                VALUES (?, ?, ?, datetime(?, 'unixepoch'))
+            ''', quiz_rows)
+            conn.executemany(ANSWER_COUNT_UPSERT, [(*key, count) for key, count in answer_counts.items()])
+            conn.executemany('''
+                INSERT INTO enrollments (user_id, course_id, enrolled_at, completed_at, progress_percentage, completed_count)
+                VALUES (?, ?, datetime(?, 'unixepoch'), datetime(?, 'unixepoch'), ?, ?)
+            ''', enrollment_rows)
+            conn.executemany('''
+                INSERT INTO user_progress (user_id, skillsnap_id, completed_at, time_spent_minutes, score)
+                VALUES (?, ?, datetime(?, 'unixepoch'), ?, ?)
+            ''', progress_rows)
+            conn.executemany('''
+                INSERT OR IGNORE INTO certificates (user_id, course_id, certificate_id, issued_at, verification_url,
+                                                    status, rendered_at)
+                VALUES (?, ?, ?, datetime(?, 'unixepoch'), ?, 'ready', datetime(?4, 'unixepoch'))
+            ''', certificate_rows)
+            conn.execute('COMMIT')
+            
+            counts['users'] += len(user_rows)
+            counts['quiz_responses'] += len(quiz_rows)
+            counts['enrollments'] += len(enrollment_rows)
+            counts['user_progress'] += len(progress_rows)
+            counts['certificates'] += len(certificate_rows)
+            self.log(f"{counts['users']}/{users} users, {counts['user_progress']} progress rows "
+                     f"({time.perf_counter() - batch_started:.1f}s for this batch)")
+        
+        return counts
@@ -0,0 +1,142 @@
+import logging
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+logger = logging.getLogger('skillbridge.sql')
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*\?\s*,)*\s*\?\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+def statement_shape(sql):
+    """Normalize a statement so executions differing only in literals compare equal"""
+    shape = _STRING_LITERAL.sub('?', sql)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _IN_LIST.sub('IN (?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+class TracedStatement:
+    """One execution; time spent fetching its rows is added as it happens"""
+    __slots__ = ('tracer', 'conn', 'sql', 'parameters', 'elapsed', 'logged')
+    
+    def __init__(self, tracer, conn, sql, parameters):
+        self.tracer = tracer
+        self.conn = conn
+        self.sql = sql
+        self.parameters = parameters
+        self.elapsed = 0.0
+        self.logged = False
+    
+    def add(self, elapsed):
+        self.elapsed += elapsed
+        if not self.logged and self.elapsed * 1000 >= self.tracer.slow_ms:
+            self.logged = True
+            self.tracer.log_slow(self)
+
+class RequestTrace:
+    """Statements issued while serving one request"""
+    def __init__(self, label):
+        self.label = label
+        self.statements = []
+    
+    @property
+    def query_count(self):
+        return len(self.statements)
+    
+    @property
+    def total_ms(self):
+        return sum(statement.elapsed for statement in self.statements) * 1000
+    
+    def repeated_shapes(self, threshold):
+        """Statement shapes executed at least `threshold` times, most frequent first"""
+        counts = Counter(statement_shape(statement.sql) for statement in self.statements)
+        return [(shape, count) for shape, count in counts.most_common() if count >= threshold]
+
+class QueryTracer:
+    """Opt-in SQL tracing for a connection pool.
+    
+    Statements executed between begin() and end() on the same thread are
+    collected into a RequestTrace. Any statement slower than `slow_ms`
+    (execution plus fetching) is logged with its EXPLAIN QUERY PLAN, and
+    end() warns about statement shapes repeated `repeat_threshold` or more
+    times in one request, the usual sign of an N+1 loop.
+    """
+    def __init__(self, slow_ms=100.0, repeat_threshold=5):
+        self.slow_ms = slow_ms
+        self.repeat_threshold = repeat_threshold
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.slow_queries = 0
+        self.repeat_warnings = 0
+    
+    def begin(self, label):
+        self._local.trace = RequestTrace(label)
+    
+    def end(self):
+        """Finish the current thread's trace, log its findings and return it (or None)"""
+        trace = getattr(self._local, 'trace', None)
+        self._local.trace = None
+        if trace is None:
+            return None
+        
+        repeated = trace.repeated_shapes(self.repeat_threshold)
+        if repeated:
+            with self._lock:
+                self.repeat_warnings += 1
+            for shape, count in repeated:
+                logger.warning("Possible N+1 in %s: %d executions of %s", trace.label, count, shape)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            for statement in trace.statements:
+                logger.debug("%s %.3f ms %s", trace.label, statement.elapsed * 1000, _WHITESPACE.sub(' ', statement.sql).strip())
+        return trace
+    
+    def statement(self, conn, sql, parameters):
+        """Register an execution; called by the instrumented cursor"""
+        statement = TracedStatement(self, conn, sql, parameters)
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None:
+            trace.statements.append(statement)
+        return statement
+    
+    def log_slow(self, statement):
+        with self._lock:
+            self.slow_queries += 1
+        trace = getattr(self._local, 'trace', None)
+        logger.warning(
+            "Slow query (%.1f ms)%s: %s\n%s",
+            statement.elapsed * 1000,
+            f" in {trace.label}" if trace is not None else '',
+            _WHITESPACE.sub(' ', statement.sql).strip(),
+            self.explain(statement)
+        )
+    
+    def explain(self, statement):
+        """EXPLAIN QUERY PLAN as indented text, or a note when it cannot be produced"""
+        if not statement.sql.lstrip().upper().startswith(('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLACE')):
+            return '  (no plan for this statement type)'
+        try:
+            # A plain sqlite3.Cursor, so the EXPLAIN is not traced itself
+            cursor = sqlite3.Cursor(statement.conn)
+            rows = cursor.execute('EXPLAIN QUERY PLAN ' + statement.sql, statement.parameters or ()).fetchall()
+        except sqlite3.Error as e:
+            return f'  (plan unavailable: {e})'
+        
+        depth = {0: 0}
+        lines = []
+        for node_id, parent_id, _, detail in rows:
+            depth[node_id] = depth.get(parent_id, 0) + 1
+            lines.append('  ' * depth[node_id] + detail)
+        return '\n'.join(lines)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'slow_ms': self.slow_ms,
+                'repeat_threshold': self.repeat_threshold,
+                'slow_queries': self.slow_queries,
+                'repeat_warnings': self.repeat_warnings
+            }
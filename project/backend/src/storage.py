@@ -0,0 +1,83 @@
+import hashlib
+import os
+import uuid
+from abc import ABC, abstractmethod
+
+class StorageBackend(ABC):
+    """Content-addressed blob storage for generated files.
+    
+    Blobs are stored under a key derived from the SHA-256 of their content;
+    put() returns (key, digest) and writing the same bytes twice is a no-op.
+    """
+    @abstractmethod
+    def put(self, data, suffix=''):
+        """Store bytes; returns (key, hex digest)"""
+    
+    @abstractmethod
+    def get(self, key):
+        """Bytes of a stored blob"""
+    
+    @abstractmethod
+    def exists(self, key):
+        """Whether a blob is stored under key"""
+    
+    @abstractmethod
+    def delete(self, key):
+        """Remove a blob; deleting a missing key is not an error"""
+    
+    def local_path(self, key):
+        """Filesystem path for serving the blob directly, or None if it has none"""
+        return None
+
+class LocalStorage(StorageBackend):
+    """Blobs on the local filesystem, sharded by hash prefix (ab/cd/abcd...png)"""
+    def __init__(self, root, levels=2, width=2):
+        self.root = root
+        self.levels = levels
+        self.width = width
+        os.makedirs(self.root, exist_ok=True)
+    
+    def key_for(self, digest, suffix=''):
+        """Storage key for a hex digest"""
+        shards = [digest[i * self.width:(i + 1) * self.width] for i in range(self.levels)]
+        return '/'.join(shards + [digest + suffix])
+    
+    def local_path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+    
+    def put(self, data, suffix=''):
+        digest = hashlib.sha256(data).hexdigest()
+        key = self.key_for(digest, suffix)
+        path = self.local_path(key)
+        
+        if not os.path.exists(path):
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            # Write then rename so readers never see a partial file. The temp file is
+            # created 0666 less the umask, like open() (mkstemp would make it 0600),
+            # so a front proxy running as another user can serve it (X-Sendfile / X-Accel)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        
+        return key, digest
+    
+    def get(self, key):
+        with open(self.local_path(key), 'rb') as f:
+            return f.read()
+    
+    def exists(self, key):
+        return os.path.exists(self.local_path(key))
+    
+    def delete(self, key):
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,72 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+os.environ.setdefault('SKILLBRIDGE_BCRYPT_ROUNDS', '4')
+
+from database import Database
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Run every test in its own directory; generated files use relative paths"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def database(tmp_path):
+    """Migrated database with the sample catalog"""
+    db = Database(str(tmp_path / 'skillbridge.db'), pool_size=4)
+    yield db
+    db.pool.close_all()
+
+@pytest.fixture
+def make_user(database):
+    """Insert a user row directly (no password hashing) and return its id"""
+    created = []
+    
+    def make(user_id=None, location='Pune', language='English', **profile):
+        user_id = user_id or f'learner{len(created) + 1}'
+        with database.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO users (user_id, password_hash, name, location, language_preference,
+                                   aptitude_level, interests, time_commitment, goals)
+                VALUES (?, 'x', ?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, user_id.title(), location, language, profile.get('aptitude_level'),
+                  profile.get('interests'), profile.get('time_commitment'), profile.get('goals')))
+            conn.commit()
+            created.append(cursor.lastrowid)
+            return cursor.lastrowid
+    
+    return make
+
+@pytest.fixture
+def server(tmp_path):
+    """The Flask app wired to a fresh database, without background work"""
+    import app as server
+    
+    server.db = None
+    server.create_app(str(tmp_path / 'app.db'), init_db=True, start_background=False)
+    server.app.config['TESTING'] = True
+    yield server
+    server.db.pool.close_all()
+    server.db = None
+
+@pytest.fixture
+def client(server):
+    return server.app.test_client()
+
+@pytest.fixture
+def register(client):
+    """Register a learner through the API and return (user, auth headers)"""
+    def register(user_id='asha', **fields):
+        response = client.post('/api/auth/register', json={
+            'user_id': user_id, 'password': 'secret-pass', 'name': user_id.title(), **fields
+        })
+        assert response.status_code == 201, response.get_json()
+        body = response.get_json()
+        return body['user'], {'Authorization': f"Bearer {body['token']}"}
+    
+    return register
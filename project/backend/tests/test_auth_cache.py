@@ -0,0 +1,55 @@
+from auth import AuthManager
+from quiz_manager import QuizManager
+
+def rename(database, user_id, name):
+    with database.connection() as conn:
+        conn.execute('UPDATE users SET name = ? WHERE id = ?', (name, user_id))
+        conn.commit()
+
+def test_token_lookups_are_served_from_the_cache(database, make_user):
+    user_id = make_user()
+    auth = AuthManager(database)
+    token = auth.generate_token(user_id)
+    
+    first = auth.get_user_by_token(token)
+    assert first['name'] == 'Learner1'
+    first['name'] = 'mutated by a caller'
+    
+    checkouts = database.pool_stats()['checkouts']
+    assert auth.get_user_by_token(token)['name'] == 'Learner1'
+    assert database.pool_stats()['checkouts'] == checkouts
+    assert auth.user_cache.stats()['hits'] == 1
+
+def test_invalidate_user_picks_up_profile_changes(database, make_user):
+    user_id = make_user()
+    auth = AuthManager(database)
+    token = auth.generate_token(user_id)
+    auth.get_user_by_token(token)
+    
+    rename(database, user_id, 'Asha')
+    assert auth.get_user_by_token(token)['name'] == 'Learner1'
+    auth.invalidate_user(user_id)
+    assert auth.get_user_by_token(token)['name'] == 'Asha'
+
+def test_cached_entries_expire(database, make_user):
+    user_id = make_user()
+    auth = AuthManager(database, user_cache_ttl=0)
+    token = auth.generate_token(user_id)
+    auth.get_user_by_token(token)
+    
+    rename(database, user_id, 'Asha')
+    assert auth.get_user_by_token(token)['name'] == 'Asha'
+
+def test_quiz_submission_invalidates_the_cached_user(database, make_user):
+    user_id = make_user()
+    auth = AuthManager(database)
+    quizzes = QuizManager(database, auth_manager=auth)
+    auth.get_user_by_token(auth.generate_token(user_id))
+    
+    assert quizzes.save_quiz_responses(user_id, {'1': 'Complete beginner'})['success']
+    assert user_id not in auth.user_cache._data
+
+def test_unknown_and_invalid_tokens(database):
+    auth = AuthManager(database)
+    assert auth.get_user_by_token('not-a-token') is None
+    assert auth.get_user_by_token(auth.generate_token(424242)) is None
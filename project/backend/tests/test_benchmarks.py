@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+
+BENCHMARKS = os.path.join(os.path.dirname(__file__), '..', 'benchmarks')
+sys.path.insert(0, BENCHMARKS)
+
+from bench_endpoints import SCENARIOS, compare
+
+def run_suite(tmp_path, *args):
+    result = subprocess.run(
+        [sys.executable, os.path.join(BENCHMARKS, 'bench_endpoints.py'), '--users', '20', '--lessons', '5',
+         '--completions', '3', '--requests', '10', '--concurrency', '2', *args],
+        capture_output=True, text=True, timeout=300, cwd=str(tmp_path), env={**os.environ, 'TMPDIR': str(tmp_path)}
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout)
+
+def test_compare_reports_percentage_change_per_scenario():
+    baseline = {'scenarios': {'dashboard': {'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 40.0, 'rps': 100.0}}}
+    results = {'scenarios': {
+        'dashboard': {'p50_ms': 5.0, 'p95_ms': 20.0, 'p99_ms': 50.0, 'rps': 0.0},
+        'verify': {'p50_ms': 1.0, 'p95_ms': 1.0, 'p99_ms': 1.0, 'rps': 1.0}
+    }}
+    assert compare(results, baseline) == {'dashboard': {'p50_ms': -50.0, 'p95_ms': 0.0, 'p99_ms': 25.0, 'rps': -100.0}}
+
+def test_small_run_covers_every_scenario_and_compares_to_a_baseline(tmp_path):
+    first = run_suite(tmp_path, '--output', 'baseline.json')
+    assert list(first['scenarios']) == list(SCENARIOS)
+    for name, scenario in first['scenarios'].items():
+        assert scenario['requests'] > 0
+        # Logins beyond the hasher's queue are answered 503 by design
+        assert scenario['errors'] == scenario['status_codes'].get('503', 0) * (name == 'login'), (name, scenario)
+        assert scenario['p50_ms'] <= scenario['p95_ms'] <= scenario['p99_ms']
+    with open(tmp_path / 'baseline.json') as f:
+        assert json.load(f) == first
+    # The suite's scratch directory (TMPDIR is tmp_path) is removed when it finishes
+    assert not list(tmp_path.glob('bench_endpoints_*'))
+    
+    second = run_suite(tmp_path, '--scenarios', 'verify,dashboard', '--baseline', 'baseline.json')
+    assert list(second['scenarios']) == ['dashboard', 'verify']
+    assert set(second['baseline_change_pct']) == {'dashboard', 'verify'}
+    assert second['config']['progress_rows'] == first['config']['progress_rows']
@@ -0,0 +1,57 @@
+from cache import VersionedCache
+
+def test_values_are_built_once_per_version():
+    versions, builds = [1], []
+    cache = VersionedCache(lambda: versions[0], check_interval=0)
+    
+    def build(version):
+        builds.append(version)
+        return f'catalog v{version}'
+    
+    assert cache.get('courses', build) == 'catalog v1'
+    assert cache.get('courses', build) == 'catalog v1'
+    assert builds == [1]
+    
+    versions[0] = 2
+    assert cache.get('courses', build) == 'catalog v2'
+    assert builds == [1, 2]
+    assert cache.stats()['invalidations'] == 1
+
+def test_version_is_polled_at_most_once_per_interval():
+    polls = []
+    cache = VersionedCache(lambda: polls.append(1) or 1, check_interval=60)
+    for _ in range(5):
+        cache.get('courses', lambda version: 'catalog')
+    assert len(polls) == 1
+    
+    cache.invalidate()
+    cache.get('courses', lambda version: 'catalog')
+    assert len(polls) == 2
+
+def test_catalog_responses_carry_validators(client):
+    first = client.get('/api/courses')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'public, max-age=60'
+    assert first.headers['Last-Modified']
+    etag = first.headers['ETag']
+    
+    repeat = client.get('/api/courses', headers={'If-None-Match': etag})
+    assert repeat.status_code == 304
+    assert repeat.data == b''
+    
+    questions = client.get('/api/quiz/questions')
+    assert questions.status_code == 200
+    assert questions.headers['ETag'] != etag
+    assert client.get('/api/quiz/questions', headers={'If-None-Match': questions.headers['ETag']}).status_code == 304
+
+def test_catalog_changes_produce_a_new_etag(server, client):
+    first = client.get('/api/courses')
+    with server.db.connection() as conn:
+        conn.execute("UPDATE courses SET course_name = 'Digital Literacy 101' WHERE id = 1")
+        conn.commit()
+    server.catalog_cache.invalidate()  # skip the one-second version poll
+    
+    changed = client.get('/api/courses', headers={'If-None-Match': first.headers['ETag']})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != first.headers['ETag']
+    assert 'Digital Literacy 101' in [course['name'] for course in changed.get_json()['courses']]
@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+import certificate_generator as certificates
+from certificate_generator import PUBLIC_STATUS_FIELDS
+
+@pytest.fixture
+def held_render(monkeypatch):
+    """Keep background renders pending until the returned event is set"""
+    release = threading.Event()
+    render = certificates.render_to_storage
+    
+    def held(*args):
+        release.wait(10)
+        return render(*args)
+    
+    monkeypatch.setattr(certificates, 'render_to_storage', held)
+    yield release
+    release.set()
+
+def test_generate_returns_202_and_download_waits_for_the_render(client, register, held_render):
+    _, headers = register()
+    response = client.post('/api/certificates/generate', json={'course_id': 1}, headers=headers)
+    assert response.status_code == 202
+    body = response.get_json()
+    certificate_id = body['certificate_id']
+    assert body['status_url'] == f'/api/certificates/{certificate_id}/status'
+    
+    status = client.get(body['status_url']).get_json()
+    assert status['status'] == 'pending'
+    assert set(status) == set(PUBLIC_STATUS_FIELDS)  # no storage paths or hashes
+    pending = client.get(f'/api/certificates/download/{certificate_id}')
+    assert pending.status_code == 202
+    assert pending.headers['Retry-After'] == '2'
+    assert set(pending.get_json()) == set(PUBLIC_STATUS_FIELDS)
+    
+    held_render.set()
+    ready = client.get(f'/api/certificates/download/{certificate_id}?wait=10')
+    assert ready.status_code == 200
+    assert ready.mimetype == 'image/png'
+    assert ready.data[:8] == b'\x89PNG\r\n\x1a\n'
+    assert client.get(body['status_url']).get_json()['ready']
+
+def test_failed_render_is_reported_and_can_be_retried(server, client, register, monkeypatch, caplog):
+    _, headers = register()
+    render = certificates.render_to_storage
+    
+    def broken(*args):
+        raise OSError('disk full')
+    
+    monkeypatch.setattr(certificates, 'render_to_storage', broken)
+    certificate_id = client.post(
+        '/api/certificates/generate', json={'course_id': 1}, headers=headers
+    ).get_json()['certificate_id']
+    
+    failed = client.get(f'/api/certificates/download/{certificate_id}?wait=10')
+    assert failed.status_code == 500
+    assert failed.get_json() == {'error': 'Certificate rendering failed'}
+    assert 'disk full' not in client.get(f'/api/certificates/{certificate_id}/status').get_data(as_text=True)
+    assert any(record.exc_info and 'disk full' in str(record.exc_info[1]) for record in caplog.records)
+    
+    monkeypatch.setattr(certificates, 'render_to_storage', render)
+    retry = client.post('/api/certificates/generate', json={'course_id': 1}, headers=headers)
+    assert retry.status_code == 202
+    assert retry.get_json()['certificate_id'] == certificate_id
+    assert client.get(f'/api/certificates/download/{certificate_id}?wait=10').status_code == 200
+
+def test_unknown_certificates_are_404(client):
+    assert client.get('/api/certificates/SB-2024-MISSING1/status').status_code == 404
+    assert client.get('/api/certificates/download/SB-2024-MISSING1').status_code == 404
@@ -0,0 +1,89 @@
+from datetime import datetime
+
+import certificate_generator as certificates
+from certificate_generator import CertificateGenerator, issue_date
+
+def record_render_dates(monkeypatch):
+    dates = []
+    render = certificates.CertificateTemplate.render
+    
+    def spy(self, user_name, course_name, certificate_id, completion_date, modules):
+        dates.append(completion_date)
+        return render(self, user_name, course_name, certificate_id, completion_date, modules)
+    
+    monkeypatch.setattr(certificates.CertificateTemplate, 'render', spy)
+    return dates
+
+def test_generate_renders_in_the_background(database, make_user):
+    user_id = make_user()
+    generator = CertificateGenerator(database)
+    
+    result = generator.generate_certificate(user_id, 1)
+    assert result['success'] and result['status'] == 'pending'
+    assert generator.generate_certificate(user_id, 1)['message'] == 'Certificate already exists'
+    
+    status = generator.wait_for_certificate(result['certificate_id'], timeout=30)
+    assert status['ready'] and status['image_hash']
+    with open(status['image_path'], 'rb') as f:
+        assert f.read(8) == b'\x89PNG\r\n\x1a\n'
+    assert generator.verify_certificate(result['certificate_id'])['valid']
+
+def test_resumed_render_prints_the_issue_date(database, make_user, monkeypatch):
+    dates = record_render_dates(monkeypatch)
+    user_id = make_user()
+    with database.connection() as conn:
+        conn.execute('''
+            INSERT INTO certificates (user_id, course_id, certificate_id, verification_url, issued_at, status)
+            VALUES (?, 1, 'SB-2023-PENDING1', 'https://skillbridge.edu/verify/SB-2023-PENDING1',
+                    '2023-05-04 10:00:00', 'pending')
+        ''', (user_id,))
+        conn.commit()
+    generator = CertificateGenerator(database)
+    
+    assert generator.resume_pending_renders() == 1
+    assert generator.wait_for_certificate('SB-2023-PENDING1', timeout=30)['ready']
+    assert dates == [issue_date('2023-05-04 10:00:00')]
+
+def test_cohort_issuance_records_the_issue_date(database, make_user):
+    user_id = make_user()
+    with database.connection() as conn:
+        conn.execute('''
+            INSERT INTO enrollments (user_id, course_id, completed_at) VALUES (?, 3, CURRENT_TIMESTAMP)
+        ''', (user_id,))
+        conn.commit()
+    generator = CertificateGenerator(database)
+    
+    result = generator.issue_cohort_certificates(3, workers=1)
+    
+    assert result['issued'] == 1 and result['failed'] == []
+    with database.connection() as conn:
+        issued_at, status, image_hash = conn.execute('''
+            SELECT issued_at, status, image_hash FROM certificates WHERE user_id = ?
+        ''', (user_id,)).fetchone()
+    assert status == 'ready' and image_hash
+    assert abs((datetime.now().astimezone() - issue_date(issued_at)).total_seconds()) < 60
+
+def test_cohort_issuance_covers_each_completed_learner_once(database, make_user):
+    completed = [make_user() for _ in range(3)]
+    in_progress = make_user()
+    with database.connection() as conn:
+        conn.executemany('''
+            INSERT INTO enrollments (user_id, course_id, completed_at) VALUES (?, 3, CURRENT_TIMESTAMP)
+        ''', [(user_id,) for user_id in completed])
+        conn.execute('INSERT INTO enrollments (user_id, course_id) VALUES (?, 3)', (in_progress,))
+        conn.commit()
+    generator = CertificateGenerator(database)
+    already = generator.generate_certificate(completed[0], 3)['certificate_id']
+    generator.wait_for_certificate(already, timeout=30)
+    
+    result = generator.issue_cohort_certificates(3, workers=2, chunksize=1)
+    assert (result['candidates'], result['issued'], result['skipped']) == (2, 2, 0)
+    assert generator.issue_cohort_certificates(3, workers=1)['candidates'] == 0
+    
+    with database.connection() as conn:
+        issued = dict(conn.execute('SELECT user_id, certificate_id FROM certificates WHERE course_id = 3'))
+    assert sorted(issued) == sorted(completed)
+    assert issued[completed[0]] == already
+    assert all(generator.verify_certificate(certificate_id)['valid'] for certificate_id in issued.values())
+    
+    assert not generator.issue_cohort_certificates(9999)['success']
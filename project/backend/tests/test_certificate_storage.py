@@ -0,0 +1,69 @@
+import os
+
+from certificate_generator import CertificateGenerator
+from http_cache import FileServer
+
+def legacy_certificate(database, certificate_id, image=b'legacy certificate', qr=b'legacy qr'):
+    """A certificate rendered before sharded storage: flat files and no content hashes"""
+    os.makedirs('certificates', exist_ok=True)
+    os.makedirs('static', exist_ok=True)
+    image_path = f'certificates/cert_{certificate_id}.png'
+    qr_path = f'static/qr_{certificate_id}.png'
+    with open(image_path, 'wb') as f:
+        f.write(image)
+    with open(qr_path, 'wb') as f:
+        f.write(qr)
+    with database.connection() as conn:
+        conn.execute('''
+            INSERT INTO users (user_id, password_hash, name) VALUES (?, 'x', 'Legacy Learner')
+        ''', (f'user-{certificate_id}',))
+        conn.execute('''
+            INSERT INTO certificates (user_id, course_id, certificate_id, verification_url, status,
+                                      image_path, qr_code_path)
+            VALUES (last_insert_rowid(), 1, ?, ?, 'ready', ?, ?)
+        ''', (certificate_id, f'https://skillbridge.edu/verify/{certificate_id}', image_path, qr_path))
+        conn.commit()
+    return image_path, qr_path
+
+def test_migrate_copies_into_sharded_storage_and_keeps_originals(database):
+    image_path, qr_path = legacy_certificate(database, 'SB-2023-OLD00001')
+    generator = CertificateGenerator(database)
+    
+    assert generator.migrate_storage(dry_run=True)['migrated'] == 1
+    result = generator.migrate_storage()
+    
+    assert result['migrated'] == 1 and result['missing_files'] == []
+    assert os.path.exists(image_path) and os.path.exists(qr_path)
+    status = generator.get_certificate_status('SB-2023-OLD00001')
+    assert status['image_path'] != image_path
+    with open(status['image_path'], 'rb') as f:
+        assert f.read() == b'legacy certificate'
+    assert generator.migrate_storage()['migrated'] == 0
+
+def test_prune_only_deletes_migrated_originals(database):
+    migrated = legacy_certificate(database, 'SB-2023-OLD00001')
+    generator = CertificateGenerator(database)
+    generator.migrate_storage()
+    unmigrated = legacy_certificate(database, 'SB-2023-OLD00002')
+    
+    assert generator.prune_legacy_files(dry_run=True) == {'success': True, 'dry_run': True, 'removed': 2, 'kept': 2}
+    generator.prune_legacy_files()
+    
+    assert not any(os.path.exists(path) for path in migrated)
+    assert all(os.path.exists(path) for path in unmigrated)
+
+def test_download_survives_migration_by_another_process(server, client, monkeypatch):
+    legacy_certificate(server.db, 'SB-2023-OLD00001')
+    
+    first = client.get('/api/certificates/download/SB-2023-OLD00001')
+    assert first.status_code == 200 and first.data == b'legacy certificate'
+    
+    # manage.py migrate-storage and prune-legacy-files run in their own process
+    other_process = CertificateGenerator(server.db)
+    other_process.migrate_storage()
+    other_process.prune_legacy_files()
+    
+    # This server still has the legacy path cached; start with a cold file cache
+    monkeypatch.setattr(server, 'file_server', FileServer())
+    second = client.get('/api/certificates/download/SB-2023-OLD00001')
+    assert second.status_code == 200 and second.data == b'legacy certificate'
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from PIL import Image
+
+from certificate_generator import CertificateTemplate, get_certificate_template, render_to_storage
+from storage import LocalStorage
+
+URL = 'https://skillbridge.edu/verify/SB-2024-AAAA0001'
+
+def render(template, name='Asha Patil', modules=None):
+    return template.render(name, 'Digital Marketing', 'SB-2024-AAAA0001', datetime(2024, 3, 1),
+                           modules or template.qr_modules(URL))
+
+def test_template_is_built_once_per_process():
+    assert get_certificate_template() is get_certificate_template()
+
+def test_render_draws_on_a_copy_of_the_background():
+    template = CertificateTemplate()
+    background = template.background.tobytes()
+    
+    image = render(template)
+    assert image.size == (CertificateTemplate.WIDTH, CertificateTemplate.HEIGHT)
+    assert image.tobytes() != background
+    assert template.background.tobytes() == background
+    assert render(template, name='Ravi Kumar').tobytes() != image.tobytes()
+
+def test_qr_code_is_composited_from_its_modules():
+    template = CertificateTemplate()
+    modules = template.qr_modules(URL)
+    assert modules.mode == 'L' and modules.width == modules.height
+    
+    image = render(template, modules=modules)
+    left, top = template.WIDTH - 130, template.HEIGHT - 130
+    pasted = image.crop((left, top, left + template.QR_SIZE, top + template.QR_SIZE)).convert('L')
+    expected = modules.resize((template.QR_SIZE, template.QR_SIZE), Image.NEAREST)
+    assert pasted.tobytes() == expected.tobytes()
+    
+    qr_file = template.qr_file_image(modules)
+    assert qr_file.size == (modules.width * template.QR_FILE_BOX_SIZE,) * 2
+    assert qr_file.mode == '1'
+
+def test_rendering_is_deterministic(tmp_path):
+    images, qrs = LocalStorage(str(tmp_path / 'certificates')), LocalStorage(str(tmp_path / 'static'))
+    args = (images, qrs, 'Asha Patil', 'Digital Marketing', 'SB-2024-AAAA0001', URL, '2024-03-01 10:00:00')
+    
+    first = render_to_storage(*args)
+    assert render_to_storage(*args) == first
+    with open(images.local_path(first[2]), 'rb') as f:
+        assert Image.open(f).size == (CertificateTemplate.WIDTH, CertificateTemplate.HEIGHT)
@@ -0,0 +1,95 @@
+import threading
+
+import certificate_generator as certificates
+from certificate_generator import CertificateGenerator
+
+def issue(database, user_id, certificate_id, course_id=1):
+    """Record a certificate the way another process would (bypassing this generator)"""
+    with database.connection() as conn:
+        conn.execute('''
+            INSERT INTO certificates (user_id, course_id, certificate_id, verification_url, status)
+            VALUES (?, ?, ?, ?, 'ready')
+        ''', (user_id, course_id, certificate_id, f'https://skillbridge.edu/verify/{certificate_id}'))
+        conn.commit()
+
+def test_lookups_query_the_database_until_the_filter_is_built(database, make_user):
+    user_id = make_user()
+    issue(database, user_id, 'SB-2024-AAAA0001')
+    generator = CertificateGenerator(database)
+    
+    assert generator.verify_certificate('SB-2024-AAAA0001')['valid']
+    assert not generator.verify_certificate('SB-2024-MADEUP01')['valid']
+    stats = generator.verification_stats()
+    assert stats['filter'] is None
+    assert stats['unfiltered'] == 2
+    assert stats['false_positives'] == 0
+
+def test_filter_rejects_unknown_ids_without_a_query(database, make_user):
+    user_id = make_user()
+    issue(database, user_id, 'SB-2024-AAAA0001')
+    generator = CertificateGenerator(database)
+    generator.filter_sync_interval = 60
+    assert generator.warm_verification_filter()
+    
+    assert not generator.verify_certificate('SB-2024-MADEUP01')['valid']
+    assert generator.get_certificate_status('SB-2024-MADEUP01') is None
+    assert generator.verification_stats()['filter_rejections'] == 1
+    assert generator.verification_stats()['db_lookups'] == 0
+    
+    verification = generator.verify_certificate('SB-2024-AAAA0001')
+    assert verification['valid'] and verification['student_name'] == 'Learner1'
+
+def test_filter_picks_up_certificates_issued_elsewhere(database, make_user):
+    user_id = make_user()
+    generator = CertificateGenerator(database)
+    generator.filter_sync_interval = 0
+    generator.warm_verification_filter()
+    
+    issue(database, user_id, 'SB-2024-BBBB0002')
+    assert generator.verify_certificate('SB-2024-BBBB0002')['valid']
+
+def test_lookups_are_not_blocked_while_the_filter_builds(database, make_user, monkeypatch):
+    user_id = make_user()
+    issue(database, user_id, 'SB-2024-AAAA0001')
+    generator = CertificateGenerator(database)
+    
+    scanning, release = threading.Event(), threading.Event()
+    add = certificates.BloomFilter.add
+    
+    def slow_add(self, item):
+        scanning.set()
+        release.wait(10)
+        add(self, item)
+    
+    monkeypatch.setattr(certificates.BloomFilter, 'add', slow_add)
+    build = generator.start_filter_build()
+    assert scanning.wait(5)
+    
+    # The build is mid-scan; a lookup answers from the database rather than waiting
+    result = []
+    lookup = threading.Thread(target=lambda: result.append(generator.verify_certificate('SB-2024-AAAA0001')))
+    lookup.start()
+    lookup.join(2)
+    release.set()
+    build.join(5)
+    
+    assert result and result[0]['valid']
+    assert generator.verification_stats()['filter']['items'] == 1
+
+def test_filter_sync_queries_without_holding_the_filter_lock(database, make_user, monkeypatch):
+    user_id = make_user()
+    generator = CertificateGenerator(database)
+    generator.filter_sync_interval = 0
+    generator.warm_verification_filter()
+    issue(database, user_id, 'SB-2024-BBBB0002')
+    
+    connection = database.connection
+    lock_held = []
+    
+    def checked_connection():
+        lock_held.append(generator._known_ids_lock.locked())
+        return connection()
+    
+    monkeypatch.setattr(database, 'connection', checked_connection)
+    assert generator._may_exist('SB-2024-BBBB0002') is True
+    assert lock_held == [False]
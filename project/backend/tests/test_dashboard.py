@@ -0,0 +1,45 @@
+import json
+
+from course_manager import CourseManager
+
+def test_snapshot_matches_the_live_dashboard_after_each_write(database, make_user):
+    user_id = make_user()
+    manager = CourseManager(database)
+    
+    for write in (lambda: manager.enroll_user(user_id, 1),
+                  lambda: manager.mark_skillsnap_complete(user_id, 1),
+                  lambda: manager.mark_skillsnap_complete(user_id, 5)):
+        before, _ = manager.get_dashboard_snapshot(user_id)
+        write()
+        version, payload = manager.get_dashboard_snapshot(user_id)
+        assert version > before
+        assert json.loads(payload) == manager.get_user_dashboard(user_id)
+
+def test_current_version_skips_the_payload(database, make_user):
+    user_id, other_id = make_user(), make_user()
+    manager = CourseManager(database)
+    version, payload = manager.get_dashboard_snapshot(user_id)
+    assert payload is not None
+    assert manager.get_dashboard_snapshot(user_id, known_version=version) == (version, None)
+    
+    # Another learner's activity leaves this dashboard's version alone
+    manager.enroll_user(other_id, 1)
+    assert manager.get_dashboard_snapshot(user_id, known_version=version) == (version, None)
+
+def test_dashboard_etag_answers_conditional_requests(client, register):
+    user, headers = register()
+    first = client.get('/api/dashboard', headers=headers)
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    etag = first.headers['ETag']
+    assert etag == f'"dashboard-{user["id"]}-0"'
+    
+    unchanged = client.get('/api/dashboard', headers={**headers, 'If-None-Match': etag})
+    assert unchanged.status_code == 304
+    assert unchanged.data == b''
+    
+    client.post('/api/enrollments', json={'course_id': 1}, headers=headers)
+    changed = client.get('/api/dashboard', headers={**headers, 'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.get_json()['total_courses'] == 1
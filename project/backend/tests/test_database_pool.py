@@ -0,0 +1,75 @@
+import sqlite3
+import threading
+
+import pytest
+
+from database import ConnectionPool, PoolTimeout
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), max_size=2, timeout=0.2)
+    yield pool
+    pool.close_all()
+
+def test_connections_are_reused_and_use_wal(pool):
+    conn = pool.acquire()
+    raw = conn._conn
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+    conn.close()
+    conn.close()  # closing twice is harmless
+    
+    again = pool.acquire()
+    assert again._conn is raw
+    again.close()
+    assert pool.stats()['created'] == 1
+    assert pool.stats()['checkouts'] == 2
+
+def test_closed_connection_cannot_be_used(pool):
+    conn = pool.acquire()
+    conn.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute('SELECT 1')
+
+def test_exhausted_pool_times_out(pool):
+    held = [pool.acquire(), pool.acquire()]
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert pool.stats()['timeouts'] == 1
+    assert pool.stats()['in_use'] == 2
+    
+    # A release wakes a waiting borrower
+    waiter = []
+    thread = threading.Thread(target=lambda: waiter.append(pool.acquire()))
+    pool.timeout = 5
+    thread.start()
+    held.pop().close()
+    thread.join(5)
+    assert waiter
+    waiter[0].close()
+    held[0].close()
+    assert pool.stats()['in_use'] == 0
+
+def test_release_rolls_back_unfinished_work(pool):
+    setup = pool.acquire()
+    setup.execute('CREATE TABLE items (name TEXT)')
+    setup.commit()
+    setup.close()
+    
+    conn = pool.acquire()
+    conn.execute("INSERT INTO items VALUES ('uncommitted')")
+    assert conn.in_transaction
+    conn.close()
+    
+    conn = pool.acquire()
+    assert not conn.in_transaction
+    assert conn.execute('SELECT COUNT(*) FROM items').fetchone()[0] == 0
+    conn.close()
+
+def test_database_context_manager_returns_connection(database):
+    before = database.pool_stats()['in_use']
+    with database.connection() as conn:
+        assert database.pool_stats()['in_use'] == before + 1
+        conn.execute('SELECT 1')
+    assert database.pool_stats()['in_use'] == before
+    assert database.ping() >= 0
@@ -0,0 +1,82 @@
+import pytest
+from flask import Flask, request
+
+from http_cache import IMMUTABLE_CACHE_CONTROL, FileServer
+
+CONTENT = bytes(range(256)) * 4
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    
+    @app.route('/file')
+    def serve():
+        server = app.config['FILE_SERVER']
+        response = server.send(request.args['path'], download_name=request.args.get('name'),
+                               as_attachment='name' in request.args)
+        return response if response is not None else ('', 404)
+    
+    return app
+
+@pytest.fixture
+def png(tmp_path):
+    path = tmp_path / 'cert.png'
+    path.write_bytes(CONTENT)
+    return str(path)
+
+def send(app, server, path, headers=None, download_name=None):
+    app.config['FILE_SERVER'] = server
+    query = {'path': path, **({'name': download_name} if download_name else {})}
+    return app.test_client().get('/file', query_string=query, headers=headers or {})
+
+def test_full_response_has_validators(app, png):
+    response = send(app, FileServer(), png, download_name='certificate.png')
+    assert response.status_code == 200
+    assert response.get_data() == CONTENT
+    assert response.mimetype == 'image/png'
+    assert response.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert response.headers['ETag'] and response.headers['Last-Modified']
+    assert response.headers['Content-Disposition'] == 'attachment; filename=certificate.png'
+
+def test_matching_etag_is_304(app, png):
+    server = FileServer()
+    etag = send(app, server, png).headers['ETag']
+    response = send(app, server, png, {'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+
+def test_range_request_is_206(app, png):
+    response = send(app, FileServer(), png, {'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.get_data() == CONTENT[100:200]
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(CONTENT)}'
+    
+    unsatisfiable = send(app, FileServer(), png, {'Range': f'bytes={len(CONTENT) + 10}-'})
+    assert unsatisfiable.status_code == 416
+
+def test_small_files_are_served_from_memory(app, png):
+    server = FileServer()
+    send(app, server, png)
+    send(app, server, png)
+    assert server.stats()['hits'] == 1 and server.stats()['files'] == 1
+
+def test_large_files_are_streamed_with_the_same_validators(app, png):
+    server = FileServer(max_file_bytes=100)
+    response = send(app, server, png, {'Range': 'bytes=0-9'})
+    assert response.status_code == 206
+    assert response.get_data() == CONTENT[:10]
+    assert server.stats()['files'] == 0
+
+def test_missing_file_is_none(tmp_path):
+    assert FileServer().send(str(tmp_path / 'missing.png')) is None
+
+def test_offloaded_files_leave_the_body_to_the_proxy(app, png, tmp_path):
+    response = send(app, FileServer(offload='x-accel', accel_root=str(tmp_path)), png)
+    assert response.headers['X-Accel-Redirect'] == '/protected/cert.png'
+    assert response.get_data() == b''
+    
+    response = send(app, FileServer(offload='x-sendfile'), png)
+    assert response.headers['X-Sendfile'] == png
+    etag = response.headers['ETag']
+    assert send(app, FileServer(offload='x-sendfile'), png, {'If-None-Match': etag}).status_code == 304
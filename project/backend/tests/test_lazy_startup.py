@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+from app import LazyComponent
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..')
+
+STARTUP = '''
+import json, sys
+sys.path.insert(0, {src!r})
+import app as server
+server.create_app({db!r}, init_db=True, start_background=False)
+client = server.app.test_client()
+statuses = [client.get(path).status_code for path in ('/health', '/api/courses', '/api/quiz/questions')]
+print(json.dumps({{
+    'statuses': statuses,
+    'heavy': sorted(name for name in ('PIL', 'qrcode', 'numpy') if name in sys.modules),
+    'built': sorted(name for name in ('auth_manager', 'course_manager', 'certificate_generator', 'quiz_manager')
+                    if getattr(server, name).built)
+}}))
+'''
+
+def test_api_process_does_not_load_rendering_or_scoring_libraries(tmp_path):
+    script = STARTUP.format(src=os.path.join(BACKEND, 'src'), db=str(tmp_path / 'startup.db'))
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=120,
+                            cwd=str(tmp_path))
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    
+    assert report['statuses'] == [200, 200, 200]
+    assert report['heavy'] == []
+    assert report['built'] == ['course_manager', 'quiz_manager']
+
+def test_lazy_component_builds_once_under_concurrent_access():
+    builds = []
+    barrier = threading.Barrier(8)
+    
+    def factory():
+        builds.append(1)
+        return {'ready': True}
+    
+    component = LazyComponent(factory)
+    assert not component.built
+    
+    def touch():
+        barrier.wait()
+        component.get('ready')
+    
+    threads = [threading.Thread(target=touch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert component.built and len(builds) == 1
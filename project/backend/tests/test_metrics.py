@@ -0,0 +1,51 @@
+import re
+
+from metrics import MetricsRegistry
+
+def samples(text):
+    """Parse the Prometheus text format into {series: value}"""
+    parsed = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            series, value = line.rsplit(' ', 1)
+            assert series not in parsed, f'duplicate series {series}'
+            parsed[series] = float(value)
+    return parsed
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram('latency_seconds', 'Latency', ('route',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe('/api/courses', value=value)
+    
+    parsed = samples(registry.render())
+    assert parsed['latency_seconds_bucket{route="/api/courses",le="0.1"}'] == 1
+    assert parsed['latency_seconds_bucket{route="/api/courses",le="1"}'] == 3
+    assert parsed['latency_seconds_bucket{route="/api/courses",le="+Inf"}'] == 4
+    assert parsed['latency_seconds_count{route="/api/courses"}'] == 4
+    assert parsed['latency_seconds_sum{route="/api/courses"}'] == 4.05
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter('events_total', 'Events', ('name',)).inc('say "hi"\\\n')
+    assert 'events_total{name="say \\"hi\\"\\\\\\n"} 1' in registry.render()
+
+def test_metrics_endpoint_reports_requests_by_route(client):
+    client.get('/api/courses')
+    client.get('/api/courses')
+    client.get('/api/certificates/SB-2024-MISSING1/status')
+    client.get('/no/such/page')
+    
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    parsed = samples(response.get_data(as_text=True))
+    
+    assert parsed['skillbridge_http_requests_total{method="GET",route="/api/courses",status="200"}'] >= 2
+    assert parsed['skillbridge_http_requests_total{method="GET",route="/api/certificates/<certificate_id>/status",'
+                  'status="404"}'] >= 1
+    assert parsed['skillbridge_http_requests_total{method="GET",route="unmatched",status="404"}'] >= 1
+    assert parsed['skillbridge_http_request_duration_seconds_count{method="GET",route="/api/courses"}'] >= 2
+    assert parsed['skillbridge_http_requests_in_flight'] == 1  # the scrape itself
+    assert parsed['skillbridge_db_queries_total'] > 0
+    assert not any(re.search(r'SB-2024', series) for series in parsed)
@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+import migrations
+from database import Database
+from migrations import MIGRATIONS, initial_schema, run_migrations
+
+def legacy_database(path):
+    """A database created by the pre-migration code: base tables, no indexes, user_version 0"""
+    conn = sqlite3.connect(path)
+    initial_schema(conn.cursor())
+    conn.execute("INSERT INTO users (user_id, password_hash, name) VALUES ('asha', 'x', 'Asha')")
+    conn.execute("INSERT INTO courses (course_name) VALUES ('Digital Marketing')")
+    conn.execute("INSERT INTO skillsnaps (course_id, title, order_index) VALUES (1, 'Intro', 1)")
+    conn.executemany('INSERT INTO enrollments (user_id, course_id) VALUES (1, 1)', [()] * 3)
+    conn.executemany(
+        'INSERT INTO user_progress (user_id, skillsnap_id, completed_at) VALUES (1, 1, ?)',
+        [('2024-01-01 10:00:00',), ('2024-01-02 10:00:00',)]
+    )
+    conn.executemany(
+        "INSERT INTO quiz_responses (user_id, question_id, response) VALUES (1, '1', ?)",
+        [('first answer',), ('latest answer',)]
+    )
+    conn.commit()
+    return conn
+
+def test_fresh_database_is_fully_migrated_and_reinitializing_is_a_no_op(tmp_path):
+    path = str(tmp_path / 'fresh.db')
+    db = Database(path)
+    assert db.schema_version() == len(MIGRATIONS)
+    assert db.pending_migrations() == 0
+    with db.connection() as conn:
+        courses = conn.execute('SELECT COUNT(*) FROM courses').fetchone()[0]
+    db.pool.close_all()
+    
+    db = Database(path)
+    assert db.init_database() == 0
+    with db.connection() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM courses').fetchone()[0] == courses
+    db.pool.close_all()
+
+def test_legacy_database_is_upgraded_and_deduplicated(tmp_path):
+    conn = legacy_database(str(tmp_path / 'legacy.db'))
+    
+    assert run_migrations(conn) == len(MIGRATIONS)
+    assert run_migrations(conn) == 0
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == len(MIGRATIONS)
+    
+    assert conn.execute('SELECT COUNT(*) FROM enrollments').fetchone()[0] == 1
+    assert conn.execute('SELECT completed_at FROM user_progress').fetchall() == [('2024-01-01 10:00:00',)]
+    assert conn.execute('SELECT response FROM quiz_responses').fetchall() == [('latest answer',)]
+    
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute('INSERT INTO enrollments (user_id, course_id) VALUES (1, 1)')
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO quiz_responses (user_id, question_id, response) VALUES (1, '1', 'again')")
+    conn.close()
+
+def test_failed_migration_leaves_the_version_unchanged(tmp_path, monkeypatch):
+    conn = sqlite3.connect(str(tmp_path / 'failing.db'))
+    run_migrations(conn)
+    
+    def broken(cursor):
+        cursor.execute('CREATE TABLE half_done (id INTEGER)')
+        raise RuntimeError('migration failed')
+    
+    monkeypatch.setattr(migrations, 'MIGRATIONS', MIGRATIONS + [broken])
+    with pytest.raises(RuntimeError):
+        run_migrations(conn)
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == len(MIGRATIONS)
+    assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'half_done'").fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,72 @@
+import pytest
+
+from course_manager import CourseManager
+from pagination import InvalidCursor, decode_cursor, encode_cursor, parse_limit
+
+def all_pages(fetch, limit):
+    items, cursor, pages = [], None, 0
+    while True:
+        page, cursor = fetch(limit, cursor)
+        items += page
+        pages += 1
+        if cursor is None:
+            return items, pages
+
+def test_cursor_round_trip():
+    for sort_value, row_id in (('2024-03-01 10:00:00', 7), (1709287200, 12), (2.5, 0), ('café ☕', 3)):
+        cursor = encode_cursor(sort_value, row_id)
+        assert '=' not in cursor
+        assert decode_cursor(cursor) == (sort_value, row_id)
+
+@pytest.mark.parametrize('cursor', [
+    'not base64!', encode_cursor('2024-03-01', 'seven'), encode_cursor(None, 7), 'WzEsMiwzXQ', ''
+])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+def test_parse_limit_clamps():
+    assert parse_limit(None) == 50
+    assert parse_limit('10') == 10
+    assert parse_limit('0') == 1
+    assert parse_limit('5000') == 200
+    assert parse_limit('ten') == 50
+
+def test_pages_visit_rows_with_equal_timestamps_exactly_once(database, make_user):
+    user_id = make_user()
+    manager = CourseManager(database)
+    manager.sync_offline_progress(user_id, [
+        {'skillsnap_id': skillsnap_id, 'completed_at': '2024-03-01T10:00:00Z'} for skillsnap_id in range(1, 8)
+    ] + [{'skillsnap_id': 8, 'completed_at': '2024-03-02T10:00:00Z'}])
+    
+    activity, pages = all_pages(lambda limit, after: manager.get_activity_page(user_id, limit, after), 3)
+    assert pages == 3
+    assert [item['skillsnap_id'] for item in activity] == [8, 7, 6, 5, 4, 3, 2, 1]
+
+def test_rows_added_while_paging_do_not_shift_later_pages(database, make_user):
+    user_id = make_user()
+    manager = CourseManager(database)
+    for course_id in (1, 2, 3, 4):
+        manager.enroll_user(user_id, course_id)
+    
+    first, cursor = manager.get_enrollments_page(user_id, 2)
+    manager.enroll_user(user_id, 5)
+    second, cursor = manager.get_enrollments_page(user_id, 2, cursor)
+    assert cursor is None
+    assert [e['course_id'] for e in first + second] == [4, 3, 2, 1]
+
+def test_endpoints_page_and_reject_bad_cursors(client, register):
+    _, headers = register()
+    for course_id in (1, 2, 3):
+        client.post('/api/enrollments', json={'course_id': course_id}, headers=headers)
+    
+    first = client.get('/api/enrollments?limit=2', headers=headers).get_json()
+    assert len(first['enrollments']) == 2 and first['next_cursor']
+    last = client.get('/api/enrollments', query_string={'limit': 2, 'cursor': first['next_cursor']},
+                      headers=headers).get_json()
+    assert len(last['enrollments']) == 1 and last['next_cursor'] is None
+    
+    for path in ('/api/enrollments', '/api/activity', '/api/certificates'):
+        response = client.get(path, query_string={'cursor': 'garbage'}, headers=headers)
+        assert response.status_code == 400
+        assert response.get_json() == {'error': 'Invalid cursor'}
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import bcrypt
+import pytest
+
+import auth
+from auth import HasherBusy, PasswordHasher
+
+@pytest.fixture
+def blocked_bcrypt(monkeypatch):
+    """Make bcrypt.hashpw wait until the returned event is set"""
+    release = threading.Event()
+    hashpw = bcrypt.hashpw
+    
+    def slow_hashpw(password, salt):
+        release.wait(10)
+        return hashpw(password, salt)
+    
+    monkeypatch.setattr(auth.bcrypt, 'hashpw', slow_hashpw)
+    yield release
+    release.set()
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_hash_and_verify_round_trip():
+    hasher = PasswordHasher(rounds=4, workers=1)
+    hashed = hasher.hash('secret-pass')
+    assert hasher.verify('secret-pass', hashed)
+    assert not hasher.verify('wrong-pass', hashed)
+    assert not hasher.needs_rehash(hashed)
+    assert PasswordHasher(rounds=5, workers=1).needs_rehash(hashed)
+    wait_for(lambda: hasher.stats()['completed'] == 3)
+
+def test_saturated_pool_rejects_instead_of_queueing(blocked_bcrypt):
+    hasher = PasswordHasher(rounds=4, workers=1, max_pending=1)
+    admitted = [threading.Thread(target=hasher.hash, args=('secret-pass',)) for _ in range(2)]
+    for thread in admitted:
+        thread.start()
+    wait_for(lambda: hasher.stats()['outstanding'] == 2)
+    
+    with pytest.raises(HasherBusy):
+        hasher.hash('secret-pass')
+    assert hasher.stats()['rejected'] == 1
+    assert hasher.stats()['queued'] == 1
+    
+    blocked_bcrypt.set()
+    for thread in admitted:
+        thread.join(10)
+    wait_for(lambda: hasher.stats()['outstanding'] == 0)
+    hasher.hash('secret-pass')  # capacity is returned once work finishes
+
+def test_slow_hashing_times_out(blocked_bcrypt):
+    hasher = PasswordHasher(rounds=4, workers=1, timeout=0.1)
+    with pytest.raises(HasherBusy):
+        hasher.hash('secret-pass')
+
+def test_busy_hasher_returns_503(server, client, blocked_bcrypt):
+    server.auth_manager._get().hasher = PasswordHasher(rounds=4, workers=1, max_pending=0, timeout=0.1)
+    response = client.post('/api/auth/register', json={
+        'user_id': 'asha', 'password': 'secret-pass', 'name': 'Asha'
+    })
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert not response.get_json()['success']
+
+def test_corrupt_stored_hash_fails_the_login(server, client, register):
+    user, _ = register()
+    with server.db.connection() as conn:
+        conn.execute("UPDATE users SET password_hash = 'legacy-md5:5f4dcc3b' WHERE id = ?", (user['id'],))
+        conn.commit()
+    
+    response = client.post('/api/auth/login', json={'user_id': 'asha', 'password': 'secret-pass'})
+    assert response.status_code == 401
+    assert response.get_json() == {'success': False, 'message': 'Invalid password'}
+
+def test_non_string_passwords_are_rejected(client, register):
+    register()
+    response = client.post('/api/auth/register', json={'user_id': 'ravi', 'password': 12345678, 'name': 'Ravi'})
+    assert response.status_code == 400
+    assert not response.get_json()['success']
+    assert client.post('/api/auth/login', json={'user_id': 'asha', 'password': ['secret-pass']}).status_code == 401
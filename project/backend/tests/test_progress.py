@@ -0,0 +1,67 @@
+from course_manager import CourseManager
+
+def enrollment(manager, user_id, course_id):
+    return next(e for e in manager.get_user_enrollments(user_id) if e['course_id'] == course_id)
+
+def test_completions_update_progress_as_they_happen(database, make_user):
+    user_id = make_user()
+    manager = CourseManager(database)
+    manager.enroll_user(user_id, 1)  # four lessons
+    
+    assert manager.mark_skillsnap_complete(user_id, 1)['success']
+    assert manager.mark_skillsnap_complete(user_id, 2)['success']
+    assert enrollment(manager, user_id, 1)['progress'] == 50.0
+    assert enrollment(manager, user_id, 1)['completed_at'] is None
+    
+    assert manager.mark_skillsnap_complete(user_id, 2)['message'] == 'SkillSnap already completed'
+    assert manager.mark_skillsnap_complete(user_id, 9999)['message'] == 'SkillSnap not found'
+    
+    manager.mark_skillsnap_complete(user_id, 3)
+    manager.mark_skillsnap_complete(user_id, 4)
+    assert enrollment(manager, user_id, 1)['progress'] == 100.0
+    assert enrollment(manager, user_id, 1)['completed_at'] is not None
+    
+    with database.connection() as conn:
+        conn.execute('DELETE FROM user_progress WHERE user_id = ? AND skillsnap_id = 4', (user_id,))
+        conn.commit()
+    assert enrollment(manager, user_id, 1)['progress'] == 75.0
+    assert enrollment(manager, user_id, 1)['completed_at'] is None
+
+def test_lessons_finished_before_enrolling_count(database, make_user):
+    user_id = make_user()
+    manager = CourseManager(database)
+    manager.mark_skillsnap_complete(user_id, 7)  # one of course 4's two lessons
+    
+    manager.enroll_user(user_id, 4)
+    assert enrollment(manager, user_id, 4)['progress'] == 50.0
+
+def test_counters_match_a_full_recount(database, make_user):
+    manager = CourseManager(database)
+    for index, course_id in enumerate((1, 4, 1)):
+        user_id = make_user()
+        manager.enroll_user(user_id, course_id)
+        for skillsnap_id in (1, 2, 7)[:index + 1]:
+            manager.mark_skillsnap_complete(user_id, skillsnap_id)
+    
+    report = manager.reconcile_progress()
+    assert report['success']
+    assert report['courses_fixed'] == 0 and report['enrollments_fixed'] == 0
+
+def test_reconcile_repairs_counters_that_drifted(database, make_user):
+    user_id = make_user()
+    manager = CourseManager(database)
+    manager.enroll_user(user_id, 2)  # one lesson
+    manager.mark_skillsnap_complete(user_id, 5)
+    with database.connection() as conn:
+        conn.execute("INSERT INTO skillsnaps (course_id, title, order_index) VALUES (2, 'Extra', 2)")
+        conn.execute('UPDATE enrollments SET completed_count = 7 WHERE user_id = ?', (user_id,))
+        conn.commit()
+    
+    preview = manager.reconcile_progress(dry_run=True)
+    assert preview['enrollments_fixed'] == 1
+    assert enrollment(manager, user_id, 2)['progress'] == 100.0
+    
+    assert manager.reconcile_progress()['enrollments_fixed'] == 1
+    assert enrollment(manager, user_id, 2)['progress'] == 50.0
+    assert enrollment(manager, user_id, 2)['completed_at'] is None
+    assert manager.reconcile_progress(dry_run=True)['enrollments_fixed'] == 0
@@ -0,0 +1,86 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from course_manager import CourseManager
+
+def progress(database, user_id, skillsnap_id):
+    with database.connection() as conn:
+        return conn.execute('''
+            SELECT completed_at, time_spent_minutes, score FROM user_progress
+            WHERE user_id = ? AND skillsnap_id = ?
+        ''', (user_id, skillsnap_id)).fetchall()
+
+def test_sync_applies_batch_and_reports_each_item(database, make_user):
+    user_id = make_user()
+    manager = CourseManager(database)
+    manager.enroll_user(user_id, 1)
+    manager.mark_skillsnap_complete(user_id, 2)
+    
+    result = manager.sync_offline_progress(user_id, [
+        {'skillsnap_id': 1, 'completed_at': '2024-03-01T10:00:00Z', 'time_spent': 12, 'score': 90},
+        {'skillsnap_id': 1},
+        {'skillsnap_id': 2},
+        {'skillsnap_id': 9999},
+        {'skillsnap_id': 'abc'},
+        'not an object'
+    ])
+    
+    assert result['success']
+    assert [item['status'] for item in result['results']] == [
+        'completed', 'duplicate', 'duplicate', 'not_found', 'invalid', 'invalid'
+    ]
+    assert result['summary'] == {'completed': 1, 'duplicate': 2, 'not_found': 1, 'invalid': 2}
+    assert progress(database, user_id, 1) == [('2024-03-01 10:00:00', 12, 90.0)]
+    
+    enrollment = manager.get_user_enrollments(user_id)[0]
+    assert enrollment['progress'] == 50.0
+
+def test_sync_clamps_future_timestamps_and_converts_to_utc(database, make_user):
+    user_id = make_user()
+    manager = CourseManager(database)
+    future = (datetime.utcnow() + timedelta(days=3)).isoformat() + 'Z'
+    
+    result = manager.sync_offline_progress(user_id, [
+        {'skillsnap_id': 1, 'completed_at': future},
+        {'skillsnap_id': 2, 'completed_at': '2024-03-01T15:30:00+05:30'},
+        {'skillsnap_id': 3, 'completed_at': 'yesterday'}
+    ])
+    
+    assert [item['status'] for item in result['results']] == ['completed', 'completed', 'invalid']
+    clamped = datetime.strptime(progress(database, user_id, 1)[0][0], '%Y-%m-%d %H:%M:%S')
+    assert clamped <= datetime.utcnow()
+    assert progress(database, user_id, 2)[0][0] == '2024-03-01 10:00:00'
+
+def test_sync_rejects_oversized_and_malformed_batches(database, make_user):
+    user_id = make_user()
+    manager = CourseManager(database)
+    
+    assert not manager.sync_offline_progress(user_id, {'skillsnap_id': 1})['success']
+    assert not manager.sync_offline_progress(user_id, [{'skillsnap_id': 1}] * 3, max_items=2)['success']
+
+def test_sync_racing_a_completion_reports_duplicate(database, make_user):
+    user_id = make_user()
+    manager = CourseManager(database)
+    
+    # Another request completes skillsnap 1 while holding the write lock
+    with database.connection() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute('''
+            INSERT INTO user_progress (user_id, skillsnap_id, completed_at) VALUES (?, 1, CURRENT_TIMESTAMP)
+        ''', (user_id,))
+        
+        results = []
+        sync = threading.Thread(target=lambda: results.append(manager.sync_offline_progress(
+            user_id, [{'skillsnap_id': 1}, {'skillsnap_id': 2}]
+        )))
+        sync.start()
+        time.sleep(0.2)
+        conn.commit()
+    sync.join(10)
+    
+    result = results[0]
+    assert result['success'], result
+    assert [item['status'] for item in result['results']] == ['duplicate', 'completed']
+    assert len(progress(database, user_id, 1)) == 1
+    assert len(progress(database, user_id, 2)) == 1
@@ -0,0 +1,88 @@
+from quiz_manager import QuizManager
+
+ANSWERS = {
+    '1': 'Complete beginner',
+    '2': 'Digital marketing',
+    '3': '30 minutes',
+    '4': 'Start a business'
+}
+
+def rollup(database):
+    with database.connection() as conn:
+        return {
+            row[:4]: row[4] for row in conn.execute('''
+                SELECT dimension, dimension_value, question_id, response, count FROM quiz_answer_counts WHERE count != 0
+            ''')
+        }
+
+def recount(database):
+    """Ground truth from the saved answers"""
+    counts = {}
+    with database.connection() as conn:
+        for location, language, question_id, response in conn.execute('''
+            SELECT u.location, u.language_preference, q.question_id, q.response
+            FROM quiz_responses q JOIN users u ON u.id = q.user_id
+        '''):
+            for key in (('all', ''), ('location', location), ('language', language)):
+                counts[key + (question_id, response)] = counts.get(key + (question_id, response), 0) + 1
+    return counts
+
+def test_retake_moves_only_the_changed_answers(database, make_user):
+    user_id = make_user(location='Nagpur', language='Marathi')
+    quiz = QuizManager(database)
+    quiz.save_quiz_responses(user_id, ANSWERS)
+    before = rollup(database)
+    
+    quiz.save_quiz_responses(user_id, {**ANSWERS, '3': '1 hour'})
+    after = rollup(database)
+    
+    assert after == recount(database)
+    changed = {key: (before.get(key, 0), after.get(key, 0)) for key in before.keys() | after.keys()
+               if before.get(key, 0) != after.get(key, 0)}
+    assert changed == {
+        (dimension, value, 3, answer): counts
+        for dimension, value in (('all', ''), ('location', 'Nagpur'), ('language', 'Marathi'))
+        for answer, counts in (('30 minutes', (1, 0)), ('1 hour', (0, 1)))
+    }
+
+def test_rollups_match_a_recount_across_users_and_retakes(database, make_user):
+    quiz = QuizManager(database)
+    users = [make_user(location=('Pune', 'Nagpur')[i % 2], language=('Hindi', 'English', 'Marathi')[i % 3])
+             for i in range(12)]
+    for i, user_id in enumerate(users):
+        quiz.save_quiz_responses(user_id, {**ANSWERS, '2': ('Digital marketing', 'Data entry & analysis')[i % 2]})
+    for user_id in users[::3]:
+        quiz.save_quiz_responses(user_id, {'1': 'Advanced user', '4': 'Find employment'})
+    
+    assert rollup(database) == recount(database)
+
+def test_distribution_withholds_small_groups(database, make_user):
+    quiz = QuizManager(database)
+    for i in range(6):
+        quiz.save_quiz_responses(make_user(location='Pune'), ANSWERS)
+    quiz.save_quiz_responses(make_user(location='Nagpur'), ANSWERS)
+    
+    distribution = quiz.get_answer_distribution('location')
+    
+    assert [group['value'] for group in distribution['groups']] == ['Pune']
+    assert distribution['suppressed_groups'] == 1
+    question = distribution['groups'][0]['questions'][1]
+    assert question['respondents'] == 6
+    assert question['answers'] == {
+        'Basic computer literacy': 0, 'Digital marketing': 6, 'Data entry & analysis': 0, 'Online business skills': 0
+    }
+    assert quiz.get_answer_distribution('location', 'Nagpur')['groups'] == []
+
+def test_analytics_endpoint_is_staff_only(server, client, register):
+    _, learner = register('learner')
+    staff_user, staff = register('coordinator')
+    with server.db.connection() as conn:
+        conn.execute("UPDATE users SET role = 'staff' WHERE id = ?", (staff_user['id'],))
+        conn.commit()
+    
+    assert client.get('/api/analytics/quiz').status_code == 401
+    assert client.get('/api/analytics/quiz', headers=learner).status_code == 403
+    response = client.get('/api/analytics/quiz?dimension=language', headers=staff)
+    assert response.status_code == 200
+    assert response.get_json()['dimension'] == 'language'
+    assert client.get('/api/analytics/quiz?dimension=age', headers=staff).status_code == 400
@@ -0,0 +1,118 @@
+import time
+
+from quiz_manager import QuizManager
+
+ANSWERS = {
+    '1': 'Complete beginner',
+    '2': 'Digital marketing',
+    '3': '30 minutes',
+    '4': 'Start a business'
+}
+
+def wait_until_fresh(quizzes, user_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        result = quizzes.get_recommendations(user_id)
+        if not result['stale']:
+            return result
+        assert time.monotonic() < deadline, 'recommendations were not refreshed'
+        time.sleep(0.02)
+
+def stored(database, user_id):
+    with database.connection() as conn:
+        return conn.execute('''
+            SELECT version, built_version, catalog_version FROM user_recommendations WHERE user_id = ?
+        ''', (user_id,)).fetchone()
+
+def test_first_request_computes_and_stores_the_list(database, make_user):
+    user_id = make_user(aptitude_level='intermediate', interests='Digital marketing', goals='Start a business')
+    quizzes = QuizManager(database)
+    
+    first = quizzes.get_recommendations(user_id)
+    assert first['stale'] is False and first['recommendations']
+    assert stored(database, user_id) is not None
+    
+    second = quizzes.get_recommendations(user_id)
+    assert second['recommendations'] == first['recommendations']
+    assert second['built_at'] is not None
+
+def test_profile_change_serves_the_old_list_marked_stale_until_refreshed(database, make_user):
+    user_id = make_user(aptitude_level='advanced', interests='Data entry & analysis')
+    quizzes = QuizManager(database)
+    before = quizzes.get_recommendations(user_id)['recommendations']
+    
+    with database.connection() as conn:
+        conn.execute("UPDATE users SET aptitude_level = 'beginner', interests = 'Digital marketing' WHERE id = ?",
+                     (user_id,))
+        conn.commit()
+    version, built_version, _ = stored(database, user_id)
+    assert version != built_version
+    
+    stale = quizzes.get_recommendations(user_id)
+    assert stale['stale'] and stale['recommendations'] == before
+    
+    fresh = wait_until_fresh(quizzes, user_id)
+    assert fresh['recommendations'] == quizzes.recommender.recommend_users([user_id])[user_id]
+    assert all(item['difficulty'].lower() in ('beginner', 'basic') for item in fresh['recommendations'])
+
+def test_quiz_submission_queues_a_refresh(database, make_user):
+    user_id = make_user()
+    quizzes = QuizManager(database)
+    quizzes.get_recommendations(user_id)
+    
+    assert quizzes.save_quiz_responses(user_id, ANSWERS)['success']
+    wait_until_fresh(quizzes, user_id)
+    version, built_version, _ = stored(database, user_id)
+    assert version == built_version
+
+def test_catalog_change_marks_every_list_stale_and_sweeps_them(database, make_user):
+    users = [make_user(aptitude_level='intermediate', interests='Digital marketing') for _ in range(3)]
+    quizzes = QuizManager(database)
+    for user_id in users:
+        quizzes.get_recommendations(user_id)
+    quizzes.recommender.check_interval = 0
+    
+    with database.connection() as conn:
+        conn.execute("UPDATE courses SET description = description || ' (updated)' WHERE id = 4")
+        conn.commit()
+    
+    assert quizzes.get_recommendations(users[0])['stale']
+    for user_id in users:
+        wait_until_fresh(quizzes, user_id)
+    assert quizzes.recommender.refresh_all() == 0  # nothing left to rebuild
+
+def test_refresh_does_not_overwrite_a_newer_profile(database, make_user, monkeypatch):
+    user_id = make_user(aptitude_level='advanced')
+    quizzes = QuizManager(database)
+    engine = quizzes.recommender
+    score = engine._score_profiles
+    
+    def retake_while_scoring(catalog, profiles, k):
+        with database.connection() as conn:
+            conn.execute("UPDATE users SET aptitude_level = 'beginner' WHERE id = ?", (user_id,))
+            conn.commit()
+        return score(catalog, profiles, k)
+    
+    monkeypatch.setattr(engine, '_score_profiles', retake_while_scoring)
+    engine.refresh_users([user_id])
+    assert stored(database, user_id)[1] is None  # scored from the old profile, so not stored
+
+def test_refresh_all_only_rebuilds_stale_and_missing_rows(database, make_user):
+    users = [make_user(aptitude_level='basic') for _ in range(4)]
+    quizzes = QuizManager(database)
+    engine = quizzes.recommender
+    assert engine.refresh_all() >= 4
+    assert engine.refresh_all() == 0
+    
+    with database.connection() as conn:
+        conn.execute("UPDATE users SET goals = 'Find employment' WHERE id = ?", (users[1],))
+        conn.commit()
+    assert engine.refresh_all() == 1
+    assert engine.refresh_all(stale_only=False) >= 4
+
+def test_recommendations_endpoint(client, register):
+    _, headers = register()
+    response = client.get('/api/recommendations', headers=headers)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['stale'] is False and len(body['recommendations']) == 3
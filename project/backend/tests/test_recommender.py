@@ -0,0 +1,124 @@
+import random
+
+import numpy as np
+
+from database import Database
+from recommender import CourseMatrix, RecommendationEngine
+
+def synthetic_catalog(count, seed=7):
+    rng = random.Random(seed)
+    words = 'digital marketing data entry spreadsheet email computer business online payment career job'.split()
+    courses = [
+        (course_id, f'Course {course_id} {rng.choice(words)}', ' '.join(rng.sample(words, 4)),
+         rng.choice(('Beginner', 'Intermediate', 'Advanced')), rng.choice((60, 90, 120)))
+        for course_id in range(1, count + 1)
+    ]
+    return CourseMatrix(courses, {})
+
+def reference_top_k(scores, k, eligible):
+    """Plain-Python ranking: best score first, catalog order among equal scores"""
+    ranked = sorted((index for index in range(len(scores)) if eligible[index]), key=lambda index: (-scores[index], index))
+    return ranked[:k]
+
+def test_top_k_matches_a_reference_ranking(database):
+    catalog = synthetic_catalog(400)
+    rng = random.Random(3)
+    aptitudes = ('beginner', 'basic', 'intermediate', 'advanced', None)
+    profiles = [
+        (rng.choice(aptitudes), rng.choice(('Digital Marketing', 'Data Entry & Analysis', None)),
+         rng.choice(('10-15 minutes', '1 hour', None)), rng.choice(('Find employment', 'Start a business', None)))
+        for _ in range(200)
+    ]
+    vectors = np.stack([catalog.profile_vector(*profile) for profile in profiles])
+    eligible = np.stack([catalog.eligible(profile[0]) for profile in profiles])
+    
+    indices, scores = catalog.top_k(vectors, 5, eligible)
+    
+    for row in range(len(profiles)):
+        expected = reference_top_k(scores[row].tolist(), 5, eligible[row])
+        assert [index for index in indices[row] if eligible[row, index]] == expected
+
+def test_equal_scores_keep_catalog_order():
+    courses = [(course_id, 'Same Course', 'same words', 'Intermediate', 60) for course_id in range(1, 5001)]
+    catalog = CourseMatrix(courses, {})
+    vector = catalog.profile_vector('intermediate', 'same words', None, None)
+    
+    indices, _ = catalog.top_k(vector[None, :], 3)
+    
+    assert indices.tolist() == [[0, 1, 2]]
+
+def test_small_score_differences_are_not_outweighed_by_catalog_position():
+    courses = [(course_id, f'Course {course_id}', 'office tools', 'Intermediate', 60) for course_id in range(1, 3001)]
+    # The last course is marginally shorter, so a short-course profile prefers it by ~2e-4
+    courses[1] = (2, 'Course 2', 'office tools', 'Intermediate', 360)
+    courses[-1] = (3000, 'Course 3000', 'office tools', 'Intermediate', 59)
+    catalog = CourseMatrix(courses, {})
+    vector = catalog.profile_vector('intermediate', None, '1 hour', None)
+    
+    indices, _ = catalog.top_k(vector[None, :], 1)
+    
+    assert indices.tolist() == [[2999]]
+
+def test_beginners_only_get_beginner_courses_like_the_old_scorer(database):
+    engine = RecommendationEngine(database)
+    with database.connection() as conn:
+        beginner_courses = {row[0] for row in conn.execute('''
+            SELECT course_name FROM courses WHERE difficulty_level = 'Beginner' AND is_active = 1
+        ''')}
+    
+    for aptitude in ('beginner', 'basic'):
+        recommended = engine.recommend((aptitude, 'Digital Marketing', '1 hour', 'Start a business'), k=3)
+        assert {item['course_name'] for item in recommended} == beginner_courses
+        # Asking for more than there are returns only the eligible ones
+        assert len(engine.recommend((aptitude, None, None, None), k=5)) == len(beginner_courses)
+    
+    difficulties = {item['difficulty'] for item in engine.recommend(('advanced', 'Online Business Skills', None, None), k=6)}
+    assert difficulties == {'Beginner', 'Intermediate', 'Advanced'}
+
+def test_batch_results_match_single_profile_results(database, make_user):
+    engine = RecommendationEngine(database)
+    users = {
+        make_user(aptitude_level='intermediate', interests='Digital Marketing', goals='Start a business'): None,
+        make_user(aptitude_level='beginner', interests='Basic Computer Literacy', goals='Find employment'): None,
+        make_user(): None
+    }
+    with database.connection() as conn:
+        for user_id in users:
+            users[user_id] = conn.execute('''
+                SELECT aptitude_level, interests, time_commitment, goals FROM users WHERE id = ?
+            ''', (user_id,)).fetchone()
+    
+    batch = engine.recommend_users(list(users), k=3)
+    
+    assert set(batch) == set(users)
+    for user_id, profile in users.items():
+        assert batch[user_id] == engine.recommend(profile, k=3)
+
+def test_batch_scoring_needs_only_one_pooled_connection(database, make_user):
+    users = [make_user(aptitude_level='basic'), make_user(aptitude_level='advanced')]
+    single = Database(database.db_path, pool_size=1, pool_timeout=0.5, initialize=False)
+    engine = RecommendationEngine(single)
+    
+    # The catalog is loaded after the user rows are read, not on a second connection
+    assert set(engine.recommend_users(users)) == set(users)
+    assert single.pool_stats()['timeouts'] == 0
+    single.pool.close_all()
+
+def test_refresh_stamps_the_catalog_version_that_scored_the_rows(database, make_user, monkeypatch):
+    user_id = make_user(aptitude_level='intermediate', interests='Digital Marketing')
+    engine = RecommendationEngine(database)
+    courses = engine.courses
+    
+    def courses_then_reload(check=False):
+        catalog, version = courses(check)
+        engine._version = version + 100  # another thread reloads a newer catalog meanwhile
+        return catalog, version
+    
+    monkeypatch.setattr(engine, 'courses', courses_then_reload)
+    engine.refresh_users([user_id])
+    
+    with database.connection() as conn:
+        stored, current = conn.execute('''
+            SELECT r.catalog_version, cv.version FROM user_recommendations r, catalog_version cv WHERE r.user_id = ?
+        ''', (user_id,)).fetchone()
+    assert stored == current
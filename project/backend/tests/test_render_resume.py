@@ -0,0 +1,55 @@
+import threading
+
+from certificate_generator import CertificateGenerator
+
+def add_pending(database, user_id, count, claimed_at=None):
+    with database.connection() as conn:
+        conn.executemany('''
+            INSERT INTO certificates (user_id, course_id, certificate_id, verification_url, status,
+                                      render_claimed_at)
+            VALUES (?, 1, ?, 'https://skillbridge.edu/verify/x', 'pending', ?)
+        ''', [(user_id, f'SB-2024-PEND{i:04d}', claimed_at) for i in range(count)])
+        conn.commit()
+
+def queued_renders(generator, monkeypatch):
+    """Record resumed renders instead of rendering them"""
+    queued = []
+    monkeypatch.setattr(generator, '_submit_render', lambda certificate_id, *args: queued.append(certificate_id))
+    return queued
+
+def test_concurrent_workers_split_pending_renders(database, make_user, monkeypatch):
+    add_pending(database, make_user(), 40)
+    workers = [CertificateGenerator(database) for _ in range(4)]
+    queues = [queued_renders(worker, monkeypatch) for worker in workers]
+    
+    threads = [threading.Thread(target=worker.resume_pending_renders) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    resumed = [certificate_id for queue in queues for certificate_id in queue]
+    assert sorted(resumed) == [f'SB-2024-PEND{i:04d}' for i in range(40)]
+
+def test_replacement_worker_reclaims_renders_of_a_lost_worker(database, make_user, monkeypatch):
+    add_pending(database, make_user(), 3)
+    first = CertificateGenerator(database)
+    queued_renders(first, monkeypatch)
+    assert first.resume_pending_renders() == 3
+    
+    # A live claim is left alone; once it has expired the rows are claimed again
+    replacement = CertificateGenerator(database)
+    queued = queued_renders(replacement, monkeypatch)
+    assert replacement.resume_pending_renders() == 0
+    assert replacement.resume_pending_renders(claim_seconds=0) == 3
+    assert len(queued) == 3
+
+def test_renders_queued_by_a_request_are_not_resumed_elsewhere(database, make_user, monkeypatch):
+    user_id = make_user()
+    issuing = CertificateGenerator(database)
+    queued_renders(issuing, monkeypatch)
+    issuing.generate_certificate(user_id, 1)
+    
+    other = CertificateGenerator(database)
+    queued_renders(other, monkeypatch)
+    assert other.resume_pending_renders() == 0
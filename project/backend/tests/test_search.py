@@ -0,0 +1,60 @@
+import pytest
+
+from course_manager import CourseManager
+from search import InvalidQuery, match_expression
+
+def add_skillsnaps(database, rows):
+    with database.connection() as conn:
+        conn.executemany('''
+            INSERT INTO skillsnaps (course_id, title, description, content, category, order_index)
+            VALUES (?, ?, ?, ?, ?, 99)
+        ''', rows)
+        conn.commit()
+
+def test_match_expression_quotes_terms_and_handles_type_ahead():
+    assert match_expression('Email  skills') == '"email" "skills"*'
+    assert match_expression('email skills ', prefix=True) == '"email" "skills"'
+    assert match_expression('email sk', prefix=False) == '"email" "sk"'
+    assert match_expression('NEAR(a OR "b") -c') == '"near" "a" "or" "b"'
+    assert match_expression('email s') == '"email"'
+    assert match_expression('?!') is None
+    with pytest.raises(InvalidQuery):
+        match_expression('   ')
+
+def test_best_match_ranks_first_however_many_newer_matches_exist(database):
+    add_skillsnaps(database, [(1, 'Spreadsheet formulas', 'Formulas in depth', 'spreadsheet formulas', 'Data Skills')])
+    add_skillsnaps(database, [
+        (2, f'Lesson {i}', 'Office practice', 'a passing mention of formulas', 'Practice') for i in range(1500)
+    ])
+    manager = CourseManager(database)
+    
+    results = manager.search_catalog('formulas', limit=5, prefix=False, kinds=('skillsnaps',))
+    
+    assert results['skillsnaps'][0]['title'] == 'Spreadsheet formulas'
+    assert len(results['skillsnaps']) == 5
+
+def test_search_follows_catalog_changes(database):
+    manager = CourseManager(database)
+    assert manager.search_catalog('paym')['skillsnaps'][0]['title'] == 'Digital Payment Systems'
+    
+    with database.connection() as conn:
+        conn.execute("UPDATE skillsnaps SET title = 'Mobile Wallets' WHERE title = 'Digital Payment Systems'")
+        conn.execute("UPDATE courses SET is_active = 0 WHERE course_name = 'Data Entry & Analysis'")
+        conn.execute("DELETE FROM skillsnaps WHERE title = 'Web Browser Mastery'")
+        conn.commit()
+    
+    assert manager.search_catalog('wallets')['skillsnaps'][0]['title'] == 'Mobile Wallets'
+    assert manager.search_catalog('spreadsheet') == {'courses': [], 'skillsnaps': []}
+    assert manager.search_catalog('browser mastery ')['skillsnaps'] == []
+
+def test_search_endpoint(client):
+    # Public like the course list it searches
+    response = client.get('/api/search?q=email&type=courses')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['query'] == 'email'
+    assert [course['name'] for course in body['courses']] == ['Internet & Email Skills']
+    assert 'skillsnaps' not in body
+    
+    assert client.get('/api/search?q=%20').status_code == 400
+    assert client.get('/api/search?q=email&type=videos').status_code == 400
@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from database import Database
+from migrations import MIGRATIONS
+
+BACKEND = os.path.join(os.path.dirname(__file__), '..')
+
+def run(*args, env=None):
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, timeout=120,
+                          env={**os.environ, **(env or {})})
+
+def test_init_db_migrates_once(tmp_path):
+    path = str(tmp_path / 'deploy.db')
+    first = run(os.path.join(BACKEND, 'manage.py'), '--db', path, 'init-db')
+    assert first.returncode == 0, first.stderr
+    assert json.loads(first.stdout)['applied'] == len(MIGRATIONS)
+    
+    second = run(os.path.join(BACKEND, 'manage.py'), '--db', path, 'init-db')
+    assert json.loads(second.stdout)['applied'] == 0
+    assert json.loads(second.stdout)['schema_version'] == len(MIGRATIONS)
+
+def test_wsgi_refuses_an_uninitialized_database(tmp_path):
+    path = str(tmp_path / 'fresh.db')
+    env = {'SKILLBRIDGE_DB': path, 'SKILLBRIDGE_FORKING_SERVER': '1'}
+    load = f'import sys; sys.path.insert(0, {BACKEND!r}); import wsgi; print(wsgi.app.name)'
+    
+    refused = run('-c', load, env=env)
+    assert refused.returncode != 0
+    assert 'run `python manage.py init-db`' in refused.stderr
+    assert Database(path, initialize=False).schema_version() == 0
+    
+    run(os.path.join(BACKEND, 'manage.py'), '--db', path, 'init-db')
+    started = run('-c', load, env=env)
+    assert started.returncode == 0, started.stderr
+
+def test_commands_other_than_init_db_refuse_an_uninitialized_database(tmp_path):
+    path = str(tmp_path / 'fresh.db')
+    for command in ('reconcile-progress', 'refresh-recommendations', 'migrate-storage', 'seed'):
+        refused = run(os.path.join(BACKEND, 'manage.py'), '--db', path, command)
+        assert refused.returncode != 0, command
+        assert 'run `python manage.py init-db` first' in refused.stderr
+    assert Database(path, initialize=False).schema_version() == 0
+    
+    run(os.path.join(BACKEND, 'manage.py'), '--db', path, 'init-db')
+    reconciled = run(os.path.join(BACKEND, 'manage.py'), '--db', path, 'reconcile-progress', '--dry-run')
+    assert reconciled.returncode == 0, reconciled.stderr
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_forked_worker_opens_its_own_connections(database):
+    with database.connection() as conn:
+        conn.execute('SELECT 1')
+    parent_created = database.pool_stats()['created']
+    
+    pid = os.fork()
+    if pid == 0:
+        try:
+            fresh = database.pool_stats()['created'] == 0 and database.pool_stats()['idle'] == 0
+            with database.connection() as conn:
+                conn.execute("UPDATE courses SET description = 'from worker' WHERE id = 1")
+                conn.commit()
+            os._exit(0 if fresh and database.pool_stats()['created'] == 1 else 1)
+        except BaseException:
+            os._exit(2)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    
+    assert database.pool_stats()['created'] == parent_created
+    with database.connection() as conn:
+        assert conn.execute('SELECT description FROM courses WHERE id = 1').fetchone()[0] == 'from worker'
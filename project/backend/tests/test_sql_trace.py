@@ -0,0 +1,66 @@
+import logging
+
+from sql_trace import statement_shape
+
+def test_statement_shape_ignores_literals_and_in_list_length():
+    assert statement_shape("SELECT * FROM users WHERE id = 42 AND name = 'O''Brien'") == \
+        statement_shape("SELECT *  FROM users\n WHERE id = 7 AND name = 'Asha'")
+    assert statement_shape('SELECT * FROM courses WHERE id IN (?, ?, ?)') == \
+        'SELECT * FROM courses WHERE id IN (?)'
+
+def test_repeated_statements_in_one_request_warn(database, caplog):
+    tracer = database.enable_tracing(slow_ms=10000, repeat_threshold=3)
+    tracer.begin('GET /api/example')
+    with database.connection() as conn:
+        for course_id in range(1, 5):
+            conn.execute('SELECT course_name FROM courses WHERE id = ?', (course_id,)).fetchone()
+        conn.execute('SELECT COUNT(*) FROM skillsnaps').fetchone()
+    
+    with caplog.at_level(logging.WARNING, logger='skillbridge.sql'):
+        trace = tracer.end()
+    
+    assert trace.query_count == 5
+    assert trace.repeated_shapes(3) == [('SELECT course_name FROM courses WHERE id = ?', 4)]
+    assert 'Possible N+1 in GET /api/example: 4 executions' in caplog.text
+    assert tracer.stats()['repeat_warnings'] == 1
+    assert tracer.end() is None
+
+def test_slow_statements_are_logged_with_their_plan(database, caplog):
+    tracer = database.enable_tracing(slow_ms=0, repeat_threshold=100)
+    with caplog.at_level(logging.WARNING, logger='skillbridge.sql'):
+        with database.connection() as conn:
+            conn.execute('SELECT id FROM enrollments WHERE user_id = ? AND course_id = ?', (1, 1)).fetchall()
+    
+    assert tracer.stats()['slow_queries'] >= 1
+    assert 'Slow query' in caplog.text
+    assert 'idx_enrollments_user_course' in caplog.text
+
+def test_batched_statements_are_explained_with_their_first_row(database, caplog):
+    tracer = database.enable_tracing(slow_ms=0, repeat_threshold=100)
+    with caplog.at_level(logging.WARNING, logger='skillbridge.sql'):
+        with database.connection() as conn:
+            conn.execute('CREATE TEMP TABLE batch (user_id INTEGER, course_id INTEGER)')
+            # Peeking at the first row must not drop it from a one-shot iterator
+            conn.executemany('INSERT INTO batch VALUES (?, ?)', ((user_id, 1) for user_id in range(3)))
+            assert conn.execute('SELECT COUNT(*) FROM batch').fetchone()[0] == 3
+            conn.executemany('''
+                UPDATE enrollments SET progress_percentage = progress_percentage
+                WHERE user_id = ? AND course_id = ?
+            ''', [(1, 1), (2, 1)])
+            conn.rollback()
+    
+    assert 'plan unavailable' not in caplog.text
+    assert 'idx_enrollments_user_course' in caplog.text
+
+def test_api_requests_are_traced(server, client, register):
+    _, headers = register()
+    tracer = server.db.enable_tracing(slow_ms=10000, repeat_threshold=2)
+    server.app.debug = True
+    try:
+        response = client.get('/api/dashboard', headers=headers)
+    finally:
+        server.app.debug = False
+    
+    assert int(response.headers['X-SQL-Queries']) > 0
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+    assert tracer.stats()['slow_queries'] == 0
@@ -0,0 +1,48 @@
+import hashlib
+import os
+import stat
+
+import pytest
+
+from storage import LocalStorage, StorageBackend
+
+def test_put_is_content_addressed_and_sharded(tmp_path):
+    storage = LocalStorage(str(tmp_path / 'blobs'))
+    data = b'certificate bytes'
+    digest = hashlib.sha256(data).hexdigest()
+    
+    key, stored_digest = storage.put(data, '.png')
+    
+    assert stored_digest == digest
+    assert key == f'{digest[:2]}/{digest[2:4]}/{digest}.png'
+    assert storage.get(key) == data
+    assert storage.put(data, '.png') == (key, digest)
+    assert os.listdir(os.path.dirname(storage.local_path(key))) == [f'{digest}.png']
+
+def test_stored_files_are_readable_by_other_users(tmp_path):
+    storage = LocalStorage(str(tmp_path / 'blobs'))
+    
+    key, _ = storage.put(b'qr code', '.png')
+    
+    # Same permissions as a file created with open(), not mkstemp's 0600
+    plain = tmp_path / 'plain.png'
+    plain.write_bytes(b'')
+    mode = stat.S_IMODE(os.stat(storage.local_path(key)).st_mode)
+    assert mode == stat.S_IMODE(os.stat(plain).st_mode)
+
+def test_delete_is_idempotent(tmp_path):
+    storage = LocalStorage(str(tmp_path / 'blobs'))
+    key, _ = storage.put(b'gone soon')
+    
+    storage.delete(key)
+    storage.delete(key)
+    
+    assert not storage.exists(key)
+
+def test_incomplete_backends_cannot_be_instantiated():
+    class ReadOnly(StorageBackend):
+        def get(self, key):
+            return b''
+    
+    with pytest.raises(TypeError):
+        ReadOnly()
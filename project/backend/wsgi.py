@@ -0,0 +1,21 @@
+"""
+SkillBridge WSGI entry point for production servers
+
+    python manage.py init-db                  # once per deploy, before starting workers
+    gunicorn -c gunicorn.conf.py wsgi:app     # Linux, preloaded multi-process
+    waitress-serve --threads 8 wsgi:app       # Windows / single process
+
+Importing this module never changes the schema; it fails fast if init-db
+has not been run.
+"""
+
+import os
+import sys
+
+# Add the src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from app import create_app
+
+# gunicorn.conf.py sets this so background work starts in the workers, not the preloading master
+app = create_app(start_background=os.environ.get('SKILLBRIDGE_FORKING_SERVER') != '1')